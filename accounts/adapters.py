@@ -0,0 +1,17 @@
+"""
+Account Adapters
+allauth hooks for this site's account rules
+"""
+from allauth.socialaccount.adapter import DefaultSocialAccountAdapter
+
+
+class SocialAccountAdapter(DefaultSocialAccountAdapter):
+    """
+    Social signups may reuse an address already registered locally
+    The flag tells the profile email sync (accounts.signals) to keep such
+    an account out of the email index rather than fail the signup.
+    """
+
+    def save_user(self, request, sociallogin, form=None):
+        sociallogin.user._social_signup = True
+        return super().save_user(request, sociallogin, form)
@@ -0,0 +1,40 @@
+"""
+Account Authentication Backends
+Sign in with either a username or an email address
+Architecture: email logins resolve the user through the indexed
+UserProfile.email column instead of scanning auth_user.email
+"""
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.models import User
+from .models import UserProfile
+
+
+class UsernameOrEmailBackend(ModelBackend):
+    """
+    ModelBackend that also accepts an email address as the login name
+    Design decisions:
+    - Anything containing '@' is treated as an email; usernames may contain
+      '@' too, so an exact username match is tried first
+    - Unknown logins still pay one hash, like ModelBackend, so response time
+      does not reveal which accounts exist
+    """
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        if username is None:
+            username = kwargs.get(User.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+
+        if '@' not in username:
+            return super().authenticate(request, username=username, password=password, **kwargs)
+
+        user = (
+            User._default_manager.filter(username=username).first()
+            or UserProfile.user_for_email(username)
+        )
+        if user is None:
+            User().set_password(password)
+            return None
+        if user.check_password(password) and self.user_can_authenticate(user):
+            return user
+        return None
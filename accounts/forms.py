@@ -5,6 +5,7 @@ Custom authentication forms with styling
 from django import forms
 from django.contrib.auth.forms import UserCreationForm, AuthenticationForm
 from django.contrib.auth.models import User
+from .models import UserProfile, normalize_email
 
 
 class UserRegistrationForm(UserCreationForm):
@@ -58,7 +59,8 @@ class UserRegistrationForm(UserCreationForm):
     
     def clean_email(self):
         email = self.cleaned_data.get('email')
-        if User.objects.filter(email=email).exists():
+        # Indexed, case-insensitive lookup instead of a scan of auth_user.email
+        if UserProfile.objects.filter(email=normalize_email(email)).exists():
             raise forms.ValidationError('This email is already registered.')
         return email
 
@@ -68,9 +70,10 @@ class UserLoginForm(AuthenticationForm):
     Custom login form with styling
     """
     username = forms.CharField(
+        label='Username or email',
         widget=forms.TextInput(attrs={
             'class': 'form-input',
-            'placeholder': 'Username'
+            'placeholder': 'Username or email'
         })
     )
     password = forms.CharField(
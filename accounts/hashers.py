@@ -0,0 +1,20 @@
+"""
+Password Hashers
+PBKDF2 with the work factor taken from settings
+"""
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+
+
+class ConfigurablePBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """
+    Django's PBKDF2 hasher with PASSWORD_HASH_ITERATIONS iterations
+    Same algorithm name, so existing hashes keep verifying; Django rehashes
+    a password on its next successful login when the iteration count changes.
+    Lower the count only where hashing cost matters more than strength
+    (development, test runs).
+    """
+
+    @property
+    def iterations(self):
+        return settings.PASSWORD_HASH_ITERATIONS
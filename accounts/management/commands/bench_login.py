@@ -0,0 +1,92 @@
+"""
+Login Benchmark Command
+Measure login requests/sec under a credential-stuffing style burst, with and
+without the login throttle, plus the cost of one password hash
+
+Runs the full middleware stack in-process against a throwaway user; every
+database change is rolled back. Use the same settings (cache, hasher work
+factor) as the environment being sized.
+
+Usage:
+    python manage.py bench_login
+    python manage.py bench_login --attempts 500 --ips 20 --usernames 100
+"""
+import time
+from django.conf import settings
+from django.contrib.auth.hashers import check_password, make_password
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test import Client, override_settings
+from django.urls import reverse
+
+
+class Command(BaseCommand):
+    help = 'Benchmark login attempts/sec with and without throttling'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--attempts', type=int, default=200, help='Login POSTs per run (default: 200)')
+        parser.add_argument('--ips', type=int, default=1, help='Distinct attacker IPs (default: 1)')
+        parser.add_argument('--usernames', type=int, default=50, help='Distinct usernames tried (default: 50)')
+
+    def _host(self):
+        for host in settings.ALLOWED_HOSTS:
+            if host != '*' and not host.startswith('.'):
+                return host
+        return 'localhost'
+
+    def _run(self, attempts, ips, usernames):
+        """POST wrong passwords; returns (elapsed seconds, {status code: count})"""
+        client = Client(HTTP_HOST=self._host())
+        secure = getattr(settings, 'SECURE_SSL_REDIRECT', False)
+        url = reverse('accounts:login')
+        statuses = {}
+        started = time.perf_counter()
+        for attempt in range(attempts):
+            response = client.post(
+                url,
+                {'username': f'bench-{attempt % usernames}', 'password': 'wrong-password'},
+                REMOTE_ADDR=f'198.51.100.{attempt % ips % 254 + 1}',
+                secure=secure
+            )
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+        return time.perf_counter() - started, statuses
+
+    def _report(self, label, attempts, elapsed, statuses):
+        codes = ', '.join(f'{count}x {code}' for code, count in sorted(statuses.items()))
+        self.stdout.write(
+            f'{label}: {attempts / elapsed:.0f} attempts/s '
+            f'({elapsed * 1000 / attempts:.2f} ms each; {codes})'
+        )
+
+    def handle(self, *args, **options):
+        attempts, ips, usernames = options['attempts'], options['ips'], options['usernames']
+        if min(attempts, ips, usernames) < 1:
+            raise CommandError('--attempts, --ips and --usernames must be at least 1.')
+
+        encoded = make_password('correct-password')
+        started = time.perf_counter()
+        check_password('wrong-password', encoded)
+        self.stdout.write(
+            f'Password hash: {(time.perf_counter() - started) * 1000:.1f} ms '
+            f'({settings.PASSWORD_HASH_ITERATIONS} PBKDF2 iterations)'
+        )
+
+        with transaction.atomic():
+            for index in range(usernames):
+                User.objects.create(username=f'bench-{index}', password=encoded)
+
+            cache.clear()
+            with override_settings(LOGIN_THROTTLE_ENABLED=False):
+                elapsed, statuses = self._run(attempts, ips, usernames)
+            self._report('Unthrottled', attempts, elapsed, statuses)
+
+            cache.clear()
+            elapsed, statuses = self._run(attempts, ips, usernames)
+            self._report('Throttled  ', attempts, elapsed, statuses)
+            cache.clear()
+
+            transaction.set_rollback(True)
+
+        self.stdout.write(self.style.SUCCESS('Benchmark finished; all changes rolled back.'))
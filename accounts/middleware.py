@@ -0,0 +1,63 @@
+"""
+Account Middleware
+Throttle login POSTs before the login view (and its password hash) runs
+"""
+import math
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.shortcuts import render
+from django.utils.deprecation import MiddlewareMixin
+from . import throttle
+
+
+class LoginThrottleMiddleware(MiddlewareMixin):
+    """
+    Reject login attempts over the IP or username rate with HTTP 429
+    Applies to the views named in LOGIN_THROTTLE_VIEWS (our login page,
+    allauth's and the admin's).
+    Design decisions:
+    - Under ASGI the handler awaits process_view on every request and
+      would run a sync one through sync_to_async; in async mode an async
+      process_view is installed instead, so the method and view-name check
+      stays on the event loop and only login POSTs hop to the sync thread
+    - Under WSGI process_view is the plain sync method
+    """
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        if iscoroutinefunction(self.get_response):
+            self.process_view = self._aprocess_view
+
+    @staticmethod
+    def _applies(request):
+        return (
+            request.method == 'POST'
+            and settings.LOGIN_THROTTLE_ENABLED
+            and request.resolver_match.view_name in settings.LOGIN_THROTTLE_VIEWS
+        )
+
+    def _throttle(self, request):
+        """Take a login attempt; a 429 response if over the rate, else None"""
+        retry_after = throttle.take_login_attempt(
+            throttle.client_ip(request),
+            throttle.submitted_username(request)
+        )
+        if not retry_after:
+            return None
+
+        retry_after = math.ceil(retry_after)
+        response = render(request, 'accounts/throttled.html', {
+            'retry_after': retry_after
+        }, status=429)
+        response['Retry-After'] = str(retry_after)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if not self._applies(request):
+            return None
+        return self._throttle(request)
+
+    async def _aprocess_view(self, request, view_func, view_args, view_kwargs):
+        if not self._applies(request):
+            return None
+        return await sync_to_async(self._throttle)(request)
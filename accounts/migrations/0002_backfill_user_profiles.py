@@ -0,0 +1,36 @@
+# Generated by Django 5.0.1 on 2026-10-19 04:42
+
+from django.db import migrations
+
+
+def create_profiles(apps, schema_editor):
+    """Index every existing address; where one is shared, the oldest account keeps it"""
+    User = apps.get_model('auth', 'User')
+    UserProfile = apps.get_model('accounts', 'UserProfile')
+    seen = set()
+
+    def profiles():
+        for user_id, email in User.objects.order_by('id').values_list('id', 'email').iterator():
+            email = (email or '').strip().lower() or None
+            if email in seen:
+                email = None
+            elif email:
+                seen.add(email)
+            yield UserProfile(user_id=user_id, email=email)
+
+    UserProfile.objects.bulk_create(profiles(), batch_size=1000)
+
+
+def delete_profiles(apps, schema_editor):
+    apps.get_model('accounts', 'UserProfile').objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_profiles, delete_profiles),
+    ]
@@ -1,17 +1,83 @@
 """
 Account Models
-Using Django's built-in User model
-Future: Can extend with UserProfile model for additional fields
+Using Django's built-in User model, extended with a one-to-one profile
+Architecture: the profile carries data auth_user cannot index for us
 """
-from django.db import models
+from django.db import IntegrityError, models, transaction
 from django.contrib.auth.models import User
 
-# Using Django's default User model
-# Future extension example:
-#
-# class UserProfile(models.Model):
-#     user = models.OneToOneField(User, on_delete=models.CASCADE)
-#     phone = models.CharField(max_length=20, blank=True)
-#     address = models.TextField(blank=True)
-#     date_of_birth = models.DateField(null=True, blank=True)
-#     avatar = models.ImageField(upload_to='avatars/', blank=True)
+
+def normalize_email(email):
+    """Lookup form of an address: trimmed and lowercased ('' stays '')"""
+    return (email or '').strip().lower()
+
+
+class UserProfile(models.Model):
+    """
+    Per-user extension of auth_user
+    Design decisions:
+    - auth_user.email has no index and is compared case-sensitively, so a
+      normalized copy lives here under a unique index; registration and
+      email login look users up through it
+    - Kept in sync from User's post_save (accounts.signals); saves that
+      only touch other columns (e.g. last_login) are skipped
+    - NULL rather than '' for users without an address, so they do not
+      collide on the unique index
+    """
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='profile'
+    )
+    email = models.EmailField(max_length=254, unique=True, null=True, blank=True)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return self.email or f'user {self.user_id}'
+
+    @classmethod
+    def sync(cls, user, social=False):
+        """
+        Upsert the user's normalized email in a single statement
+        An address already indexed for another account raises IntegrityError,
+        so a registration that lost the race for it fails inside its own
+        transaction. Social accounts are the exception: the provider vouches
+        for the address, which may share a mailbox with a local account, so
+        they are left out of the index instead of failing the signup.
+        """
+        profile = cls(user=user, email=normalize_email(user.email) or None)
+        upsert = dict(update_conflicts=True, unique_fields=['user'], update_fields=['email', 'updated_at'])
+        try:
+            with transaction.atomic():
+                cls.objects.bulk_create([profile], **upsert)
+        except IntegrityError:
+            if not (social or user.socialaccount_set.exists()):
+                raise
+            profile.email = None
+            cls.objects.bulk_create([profile], **upsert)
+
+    @classmethod
+    def reindex(cls, email):
+        """
+        Give an address that has left the index to the oldest account still
+        using it (matching the backfill), e.g. after its holder was deleted
+        """
+        email = normalize_email(email)
+        if not email or cls.objects.filter(email=email).exists():
+            return
+        successor = User.objects.filter(
+            email__iexact=email,
+            profile__email__isnull=True
+        ).order_by('date_joined', 'pk').first()
+        if successor is not None:
+            cls.sync(successor, social=True)
+
+    @classmethod
+    def user_for_email(cls, email):
+        """User owning this address (any case), or None; one indexed query"""
+        email = normalize_email(email)
+        if not email:
+            return None
+        return User.objects.filter(profile__email=email).first()
@@ -0,0 +1,31 @@
+"""
+Account Signals
+Refill a user's login throttle bucket once they have signed in, and keep
+the indexed profile email in step with auth_user
+"""
+from django.contrib.auth.models import User
+from django.contrib.auth.signals import user_logged_in
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from .models import UserProfile
+from .throttle import reset_username
+
+
+@receiver(user_logged_in)
+def reset_login_throttle(sender, request, user, **kwargs):
+    reset_username(user.get_username(), user.email)
+
+
+@receiver(post_save, sender=User)
+def sync_profile_email(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Upsert the normalized email unless the save could not have changed it"""
+    if raw or (update_fields is not None and 'email' not in update_fields):
+        return
+    # Flagged by accounts.adapters.SocialAccountAdapter during social signups
+    UserProfile.sync(instance, social=getattr(instance, '_social_signup', False))
+
+
+@receiver(post_delete, sender=User)
+def reindex_profile_email(sender, instance, **kwargs):
+    """Another account sharing the deleted user's address may now hold it"""
+    UserProfile.reindex(instance.email)
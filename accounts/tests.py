@@ -0,0 +1,136 @@
+"""
+Account Tests
+The indexed profile email: registration, email login and shared addresses;
+login throttling under ASGI
+"""
+from unittest import mock
+from allauth.socialaccount.models import SocialApp
+from django.contrib.auth.models import User
+from django.db import IntegrityError, transaction
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from . import middleware
+from .backends import UsernameOrEmailBackend
+from .forms import UserRegistrationForm
+from .models import UserProfile
+
+
+def registration(username, email):
+    return {
+        'username': username,
+        'first_name': 'Foo',
+        'last_name': 'Bar',
+        'email': email,
+        'password1': 'a-long-pass-phrase',
+        'password2': 'a-long-pass-phrase',
+    }
+
+
+class EmailLoginBackendTests(TestCase):
+    """Email logins resolve through the index, in any case"""
+
+    def setUp(self):
+        self.user = User.objects.create_user('foo', 'Foo@Example.com', 'a-long-pass-phrase')
+        self.backend = UsernameOrEmailBackend()
+
+    def test_login_by_email_in_any_case(self):
+        for login in ['Foo@Example.com', 'foo@example.COM', ' foo@example.com ']:
+            self.assertEqual(
+                self.backend.authenticate(None, username=login, password='a-long-pass-phrase'),
+                self.user
+            )
+
+    def test_login_by_username_and_wrong_password(self):
+        self.assertEqual(
+            self.backend.authenticate(None, username='foo', password='a-long-pass-phrase'),
+            self.user
+        )
+        self.assertIsNone(self.backend.authenticate(None, username='foo@example.com', password='wrong'))
+        self.assertIsNone(self.backend.authenticate(None, username='nobody@example.com', password='x'))
+
+
+class RegistrationEmailTests(TestCase):
+    """An address can be registered once, whatever its case"""
+
+    def setUp(self):
+        SocialApp.objects.create(provider='google', name='Google', client_id='x', secret='y')
+        User.objects.create_user('foo', 'Foo@Example.com', 'a-long-pass-phrase')
+
+    def test_form_rejects_address_in_other_case(self):
+        form = UserRegistrationForm(registration('foo2', 'foo@example.COM'))
+        self.assertFalse(form.is_valid())
+        self.assertIn('email', form.errors)
+
+    def test_local_collision_is_not_indexed_silently(self):
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            User.objects.create_user('foo2', 'foo@example.COM')
+        self.assertFalse(User.objects.filter(username='foo2').exists())
+
+    # Pages render without collectstatic having been run
+    @override_settings(STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage')
+    def test_concurrent_registration_becomes_form_error(self):
+        # The duplicate check passed before the other registration committed
+        with mock.patch.object(UserRegistrationForm, 'clean_email', lambda form: form.cleaned_data['email']):
+            response = self.client.post(
+                reverse('accounts:register'),
+                registration('foo2', 'FOO@example.com'),
+                secure=True
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('This email is already registered.', response.context['form'].errors['email'])
+        self.assertFalse(User.objects.filter(username='foo2').exists())
+
+
+class SharedSocialEmailTests(TestCase):
+    """A social account sharing a local address stays out of the index until it is free"""
+
+    def setUp(self):
+        self.local = User.objects.create_user('foo', 'Foo@Example.com', 'a-long-pass-phrase')
+        self.social = User(username='foo-google', email='foo@example.com')
+        self.social._social_signup = True
+        self.social.save()
+
+    def test_social_signup_is_kept_out_of_index(self):
+        self.assertIsNone(UserProfile.objects.get(user=self.social).email)
+        self.assertEqual(UserProfile.user_for_email('FOO@example.com'), self.local)
+
+    def test_address_passes_to_remaining_holder_on_delete(self):
+        self.local.delete()
+
+        self.assertEqual(UserProfile.objects.get(user=self.social).email, 'foo@example.com')
+        self.assertEqual(UserProfile.user_for_email('foo@example.com'), self.social)
+        form = UserRegistrationForm(registration('foo3', 'Foo@example.com'))
+        self.assertFalse(form.is_valid())
+
+
+@override_settings(
+    STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage',
+    LOGIN_THROTTLE_ENABLED=True,
+    LOGIN_THROTTLE_IP_BURST=1
+)
+class AsyncLoginThrottleTests(TestCase):
+    """Under ASGI only login POSTs leave the event loop for the throttle"""
+
+    def setUp(self):
+        cache.clear()
+        SocialApp.objects.create(provider='google', name='Google', client_id='x', secret='y')
+
+    async def test_other_requests_do_not_hop(self):
+        with mock.patch.object(middleware, 'sync_to_async', wraps=middleware.sync_to_async) as hop:
+            await self.async_client.get(reverse('accounts:login'), secure=True)
+            self.assertFalse(hop.called)
+            await self.async_client.post(
+                reverse('accounts:login'),
+                {'username': 'foo', 'password': 'x'},
+                secure=True
+            )
+            self.assertTrue(hop.called)
+
+    async def test_login_posts_over_the_rate_are_throttled(self):
+        data = {'username': 'foo', 'password': 'x'}
+        first = await self.async_client.post(reverse('accounts:login'), data, secure=True)
+        second = await self.async_client.post(reverse('accounts:login'), data, secure=True)
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(second.status_code, 429)
+        self.assertIn('Retry-After', second)
@@ -2,10 +2,14 @@
 Account Views
 User authentication and profile management
 """
+from django.conf import settings
+from django.db import IntegrityError, transaction
 from django.shortcuts import render, redirect
-from django.contrib.auth import login, logout, authenticate
+from django.contrib.auth import login, logout
 from django.contrib.auth.decorators import login_required
+from django.contrib.auth.models import User
 from django.contrib import messages
+from orders import dashboard
 from .forms import UserRegistrationForm, UserLoginForm
 
 
@@ -17,16 +21,28 @@ def register(request):
     if request.method == 'POST':
         form = UserRegistrationForm(request.POST)
         if form.is_valid():
-            user = form.save()
-            login(request, user)
-            messages.success(request, 'Account created successfully!')
-            return redirect('products:home')
-        else:
-            messages.error(request, 'Please correct the errors below.')
+            try:
+                with transaction.atomic():
+                    user = form.save()
+            except IntegrityError:
+                # Lost a race with a concurrent registration for the same
+                # address (the email index) or username; nothing was saved
+                if User.objects.filter(username=form.cleaned_data['username']).exists():
+                    form.add_error('username', 'A user with that username already exists.')
+                else:
+                    form.add_error('email', 'This email is already registered.')
+            else:
+                login(request, user)
+                messages.success(request, 'Account created successfully!')
+                return redirect('products:home')
+        messages.error(request, 'Please correct the errors below.')
     else:
         form = UserRegistrationForm()
     
-    return render(request, 'accounts/register.html', {'form': form})
+    return render(request, 'accounts/register.html', {
+        'form': form,
+        'social_login_enabled': settings.SOCIAL_LOGIN_ENABLED
+    })
 
 
 def user_login(request):
@@ -35,24 +51,26 @@ def user_login(request):
         return redirect('products:home')
     
     if request.method == 'POST':
+        # Throttled by LoginThrottleMiddleware before we get here
         form = UserLoginForm(request, data=request.POST)
         if form.is_valid():
-            username = form.cleaned_data.get('username')
-            password = form.cleaned_data.get('password')
-            user = authenticate(username=username, password=password)
-            if user is not None:
-                login(request, user)
-                messages.success(request, f'Welcome back, {user.first_name or user.username}!')
-                
-                # Redirect to next page or home
-                next_page = request.GET.get('next', 'products:home')
-                return redirect(next_page)
+            # The form has already authenticated; don't hash the password twice
+            user = form.get_user()
+            login(request, user)
+            messages.success(request, f'Welcome back, {user.first_name or user.username}!')
+            
+            # Redirect to next page or home
+            next_page = request.GET.get('next', 'products:home')
+            return redirect(next_page)
         else:
-            messages.error(request, 'Invalid username or password.')
+            messages.error(request, 'Invalid username, email or password.')
     else:
         form = UserLoginForm()
     
-    return render(request, 'accounts/login.html', {'form': form})
+    return render(request, 'accounts/login.html', {
+        'form': form,
+        'social_login_enabled': settings.SOCIAL_LOGIN_ENABLED
+    })
 
 
 def user_logout(request):
@@ -65,9 +83,10 @@ def user_logout(request):
 @login_required
 def profile(request):
     """User profile page"""
-    # Get user's recent orders
-    recent_orders = request.user.orders.all()[:5]
+    # Recent orders, spend and open orders: one cache read, shared with the account menu
+    summary = dashboard.for_request(request)
     
     return render(request, 'accounts/profile.html', {
-        'recent_orders': recent_orders
+        'summary': summary,
+        'recent_orders': summary['recent_orders']
     })
@@ -1,4 +1,5 @@
 """
 Cart App
-Session-based shopping cart with item management
+Shopping cart with item management
+Session-backed for visitors, database-backed for logged-in users
 """
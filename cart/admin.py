@@ -1,8 +1,25 @@
 """
 Cart Admin
-Currently no database models for cart (session-based)
-Future: Admin for persistent cart models
+Session carts are not visible here; persistent carts of logged-in users are
 """
 from django.contrib import admin
+from .models import CartItem, StockReservation
 
-# Register cart models here when moving to database-backed carts
+
+@admin.register(CartItem)
+class CartItemAdmin(admin.ModelAdmin):
+    list_display = ['user', 'product', 'quantity', 'price', 'updated_at']
+    list_select_related = ['user', 'product']
+    search_fields = ['user__username', 'user__email', 'product__name']
+    raw_id_fields = ['user', 'product']
+    readonly_fields = ['created_at', 'updated_at']
+
+
+@admin.register(StockReservation)
+class StockReservationAdmin(admin.ModelAdmin):
+    list_display = ['product', 'holder', 'quantity', 'expires_at']
+    list_select_related = ['product']
+    list_filter = ['expires_at']
+    search_fields = ['holder', 'product__name']
+    raw_id_fields = ['product']
+    readonly_fields = ['created_at', 'updated_at']
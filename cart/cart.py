@@ -1,27 +1,118 @@
 """
 Cart Service
-Session-based cart with business logic separation
-Architecture: Service pattern for cart operations, easily upgradeable to database-backed cart
+Session-based cart for visitors, database-backed cart for logged-in users
+Architecture: Service pattern for cart operations; views never touch storage directly
 """
+import uuid
 from decimal import Decimal
+from asgiref.sync import sync_to_async
 from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+from products.cache import CATALOG_STATE_FIELDS, product_state_cache_key
 from products.models import Product
+from . import reservations
+from .models import CartItem
+
+# Session entry holding the anonymous visitor's stock reservation key
+HOLDER_SESSION_KEY = 'cart_holder'
 
 
 class Cart:
     """
-    Session-based shopping cart
-    Design: Can be upgraded to database model for persistent carts later
+    Shopping cart with two storage backends
+    - Anonymous visitors: dict stored in the session
+    - Authenticated users: CartItem rows, loaded with one query per request
+    Both expose the same in-memory dict ({product_id: {'quantity', 'price'}})
+    so the rest of the class does not care where the data lives.
+    Every change also refreshes the matching stock reservations.
     """
     
     def __init__(self, request):
-        """Initialize the cart from session"""
+        """Initialize the cart from the database or the session"""
         self.session = request.session
-        cart = self.session.get(settings.CART_SESSION_ID)
-        if not cart:
-            # Save an empty cart in the session
-            cart = self.session[settings.CART_SESSION_ID] = {}
+        user = getattr(request, 'user', None)
+        self.user = user if user is not None and user.is_authenticated else None
+
+        if self.user is not None:
+            # Share one load between the context processor and the view
+            cart = getattr(request, '_cart_items', None)
+            if cart is None:
+                cart = request._cart_items = self._load_items(self.user)
+        else:
+            # An empty cart is not written to the session until something is
+            # added, so browsing visitors never create a django_session row
+            cart = self.session.get(settings.CART_SESSION_ID) or {}
         self.cart = cart
+
+    @staticmethod
+    def _load_items(user):
+        """Read the persistent cart in a single indexed query"""
+        return {
+            str(product_id): {'quantity': quantity, 'price': str(price)}
+            for product_id, quantity, price in CartItem.objects.filter(
+                user=user
+            ).values_list('product_id', 'quantity', 'price')
+        }
+
+    def _persist(self, product_id):
+        """Upsert one line of the persistent cart in a single statement"""
+        self._write_lines([product_id], [])
+
+    @property
+    def holder(self):
+        """Stock reservation holder key; None for a visitor without a session yet"""
+        if self.user is not None:
+            return f'user:{self.user.pk}'
+        return self.session.get(HOLDER_SESSION_KEY)
+
+    def _hold(self, product_ids):
+        """Bring the stock holds for these lines in line with the cart"""
+        if self.holder is None:
+            # First item for this visitor. A random token rather than the
+            # session key, which changes on login.
+            self.session[HOLDER_SESSION_KEY] = f'session:{uuid.uuid4().hex}'
+        reservations.hold(self.holder, {
+            product_id: self.cart[product_id]['quantity'] if product_id in self.cart else 0
+            for product_id in product_ids
+        })
+
+    def refresh_holds(self):
+        """Extend (or, where stock allows, re-take) the holds for every line"""
+        if self.holder is None or not self.cart:
+            return
+        reservations.refresh(self.holder, {
+            product_id: item['quantity'] for product_id, item in self.cart.items()
+        })
+
+    def _write_lines(self, product_ids, deleted_ids):
+        """
+        Persist several changed lines at once
+        One bulk upsert for changed lines plus one delete for removed ones.
+        """
+        if self.user is None:
+            return
+        if product_ids:
+            CartItem.objects.bulk_create(
+                [CartItem(
+                    user=self.user,
+                    product_id=int(product_id),
+                    quantity=self.cart[product_id]['quantity'],
+                    price=Decimal(self.cart[product_id]['price'])
+                ) for product_id in product_ids],
+                update_conflicts=True,
+                unique_fields=['user', 'product'],
+                update_fields=['quantity', 'price', 'updated_at']
+            )
+        if deleted_ids:
+            CartItem.objects.filter(
+                user=self.user,
+                product_id__in=[int(product_id) for product_id in deleted_ids]
+            ).delete()
+
+    def _delete(self, product_id):
+        """Delete one line of the persistent cart"""
+        CartItem.objects.filter(user=self.user, product_id=int(product_id)).delete()
     
     def add(self, product, quantity=1, override_quantity=False):
         """
@@ -45,17 +136,25 @@ class Cart:
         else:
             self.cart[product_id]['quantity'] += quantity
         
+        if self.user is not None:
+            self._persist(product_id)
+        self._hold([product_id])
         self.save()
     
     def save(self):
-        """Mark the session as modified"""
-        self.session.modified = True
+        """Store the cart in the session (session-backed carts only)"""
+        if self.user is None:
+            self.session[settings.CART_SESSION_ID] = self.cart
+            self.session.modified = True
     
     def remove(self, product):
         """Remove a product from the cart"""
         product_id = str(product.id)
         if product_id in self.cart:
             del self.cart[product_id]
+            if self.user is not None:
+                self._delete(product_id)
+            self._hold([product_id])
             self.save()
     
     def update_quantity(self, product_id, quantity):
@@ -64,9 +163,208 @@ class Cart:
         if product_id in self.cart:
             if quantity > 0:
                 self.cart[product_id]['quantity'] = quantity
+                if self.user is not None:
+                    self._persist(product_id)
             else:
                 del self.cart[product_id]
+                if self.user is not None:
+                    self._delete(product_id)
+            self._hold([product_id])
             self.save()
+
+    def update_quantities(self, quantities):
+        """
+        Apply several quantity changes at once
+        Persistent carts get one bulk upsert plus one delete, however many lines change.
+
+        Args:
+            quantities: dict of {product_id: quantity}; 0 or less removes the line
+        """
+        upserts, deletes = [], []
+        for product_id, quantity in quantities.items():
+            product_id = str(product_id)
+            if product_id not in self.cart:
+                continue
+            if quantity > 0:
+                self.cart[product_id]['quantity'] = quantity
+                upserts.append(product_id)
+            else:
+                del self.cart[product_id]
+                deletes.append(product_id)
+
+        self._write_lines(upserts, deletes)
+        if upserts or deletes:
+            self._hold(upserts + deletes)
+        self.save()
+
+    @staticmethod
+    def _catalog_state(product_ids, use_cache):
+        """
+        Current price, stock and availability for the given products
+        Fresh reads cost one query. Cached reads cost one cache round-trip
+        and a single query for the products that were not cached.
+        """
+        keys = {product_state_cache_key(pid): pid for pid in product_ids}
+        state = {}
+        if use_cache:
+            for key, value in cache.get_many(keys).items():
+                state[keys[key]] = value
+
+        missing = [pid for pid in product_ids if pid not in state]
+        if missing:
+            fresh = {
+                str(row['id']): row
+                for row in Product.objects.filter(id__in=missing).values(
+                    *CATALOG_STATE_FIELDS
+                )
+            }
+            state.update(fresh)
+            cache.set_many(
+                {product_state_cache_key(pid): row for pid, row in fresh.items()},
+                settings.CART_REVALIDATION_CACHE_TIMEOUT
+            )
+        return state
+
+    @staticmethod
+    async def _acatalog_state(product_ids, use_cache):
+        """_catalog_state() for async views: the same reads, awaited"""
+        keys = {product_state_cache_key(pid): pid for pid in product_ids}
+        state = {}
+        if use_cache:
+            for key, value in (await cache.aget_many(keys)).items():
+                state[keys[key]] = value
+
+        missing = [pid for pid in product_ids if pid not in state]
+        if missing:
+            fresh = {
+                str(row['id']): row
+                async for row in Product.objects.filter(id__in=missing).values(
+                    *CATALOG_STATE_FIELDS
+                )
+            }
+            state.update(fresh)
+            await cache.aset_many(
+                {product_state_cache_key(pid): row for pid, row in fresh.items()},
+                settings.CART_REVALIDATION_CACHE_TIMEOUT
+            )
+        return state
+
+    def revalidate(self, use_cache=False):
+        """
+        Compare every cart line with the current catalog and fix it up
+        - Price changed: the line takes the current price
+        - Stock dropped below the quantity: the quantity is reduced
+        - Product inactive or deleted: the line is removed
+        All lines are checked with a single query (or a cache lookup when
+        use_cache is set, which is good enough for the cart page; checkout
+        should always read fresh data).
+
+        Returns:
+            List of change dicts, one per affected line, each with a
+            human-readable 'message'. Empty if nothing changed.
+        """
+        if not self.cart:
+            return []
+
+        state = self._catalog_state(list(self.cart.keys()), use_cache)
+        changes, upserts, deletes = self._reconcile(state)
+        if changes:
+            self._store_changes(upserts, deletes)
+        return changes
+
+    async def arevalidate(self, use_cache=False):
+        """
+        revalidate() for async views
+        The catalog state is read with the async cache and ORM APIs; only
+        the write-back of changed lines, which is rare, hops to the sync thread.
+        """
+        if not self.cart:
+            return []
+
+        state = await self._acatalog_state(list(self.cart.keys()), use_cache)
+        changes, upserts, deletes = self._reconcile(state)
+        if changes:
+            await sync_to_async(self._store_changes)(upserts, deletes)
+        return changes
+
+    def _reconcile(self, state):
+        """
+        Apply the catalog state to the in-memory cart
+        Returns (changes, changed line ids, removed line ids); nothing is stored.
+        """
+        changes, upserts, deletes = [], [], []
+
+        for product_id, item in list(self.cart.items()):
+            current = state.get(product_id)
+            change = {
+                'product_id': int(product_id),
+                'name': current['name'] if current else '',
+                'old_price': Decimal(item['price']),
+                'new_price': Decimal(current['price']) if current else None,
+                'old_quantity': item['quantity'],
+                'new_quantity': item['quantity'],
+            }
+
+            if current is None or not current['is_active'] or current['stock_quantity'] == 0:
+                change['reason'] = 'unavailable'
+                change['new_quantity'] = 0
+                change['message'] = (
+                    f"{change['name'] or 'A product'} is no longer available "
+                    "and was removed from your cart."
+                )
+                del self.cart[product_id]
+                deletes.append(product_id)
+                changes.append(change)
+                continue
+
+            price_changed = change['new_price'] != change['old_price']
+            quantity_reduced = current['stock_quantity'] < item['quantity']
+            if not (price_changed or quantity_reduced):
+                continue
+
+            notes = []
+            if price_changed:
+                item['price'] = str(change['new_price'])
+                notes.append(
+                    f"price changed from NPR {change['old_price']} to NPR {change['new_price']}"
+                )
+            if quantity_reduced:
+                item['quantity'] = change['new_quantity'] = current['stock_quantity']
+                notes.append(f"only {current['stock_quantity']} left in stock")
+
+            if price_changed and quantity_reduced:
+                change['reason'] = 'price_and_quantity_changed'
+            elif price_changed:
+                change['reason'] = 'price_changed'
+            else:
+                change['reason'] = 'quantity_reduced'
+            change['message'] = f"{change['name']}: {' and '.join(notes)}."
+            upserts.append(product_id)
+            changes.append(change)
+
+        return changes, upserts, deletes
+
+    def _store_changes(self, upserts, deletes):
+        """Persist lines changed by revalidation and their stock holds"""
+        self._write_lines(upserts, deletes)
+        self._hold(upserts + deletes)
+        self.save()
+
+    def get_line(self, product_id):
+        """
+        Summary of a single cart line without loading the product
+        Returns None if the product is not in the cart
+        """
+        item = self.cart.get(str(product_id))
+        if item is None:
+            return None
+        price = Decimal(item['price'])
+        return {
+            'product_id': int(product_id),
+            'quantity': item['quantity'],
+            'price': price,
+            'total_price': price * item['quantity'],
+        }
     
     def __iter__(self):
         """
@@ -75,10 +373,16 @@ class Cart:
         product_ids = self.cart.keys()
         # Get products and add them to the cart
         products = Product.objects.filter(id__in=product_ids)
-        cart = self.cart.copy()
+        return self._lines(products)
+
+    def _lines(self, products):
+        """Cart lines with their products attached; extra products are ignored"""
+        # Copy each line so the Decimal/Product values never leak into the session
+        cart = {product_id: dict(item) for product_id, item in self.cart.items()}
         
         for product in products:
-            cart[str(product.id)]['product'] = product
+            if str(product.id) in cart:
+                cart[str(product.id)]['product'] = product
         
         for item in cart.values():
             item['price'] = Decimal(item['price'])
@@ -96,15 +400,113 @@ class Cart:
             for item in self.cart.values()
         )
     
+    def get_weight(self):
+        """
+        Shipping weight of the cart in grams
+        Read from the cached catalog state, so it costs no query on a cache hit.
+        """
+        state = self._catalog_state(list(self.cart.keys()), use_cache=True)
+        return sum(
+            state[product_id]['weight_grams'] * item['quantity']
+            for product_id, item in self.cart.items()
+            if product_id in state
+        )
+    
     def get_item_count(self):
         """Get total number of items (same as __len__)"""
         return len(self)
     
     def clear(self):
-        """Remove cart from session"""
-        del self.session[settings.CART_SESSION_ID]
-        self.save()
+        """Remove all items from the cart and release its stock holds"""
+        if self.holder is not None:
+            reservations.release(self.holder)
+        if self.user is not None:
+            CartItem.objects.filter(user=self.user).delete()
+            self.cart.clear()
+            return
+        self.session.pop(settings.CART_SESSION_ID, None)
+        self.cart = {}
     
-    def get_items(self):
-        """Get all cart items as a list"""
+    def get_items(self, products=None):
+        """
+        Get all cart items as a list
+        Pass `products` when they have already been fetched (async views).
+        """
+        if products is not None:
+            return list(self._lines(products))
         return list(self.__iter__())
+
+
+def prime_catalog_state(limit=100):
+    """
+    Fill the revalidation cache for the products most likely to be in carts
+    The featured, bestseller and new-arrival products the home page shows,
+    most recently updated first and at most `limit` of them: one query, and
+    few enough entries that a small cache (locmem keeps 300) never culls
+    other keys to make room. Used by the worker warm-up so the first cart
+    pages after a deploy don't all miss at once.
+
+    Returns:
+        Number of products cached
+    """
+    product_ids = [
+        str(pid) for pid in Product.objects.filter(
+            Q(is_featured=True) | Q(is_bestseller=True) | Q(is_new_arrival=True),
+            is_active=True
+        ).order_by('-updated_at').values_list('id', flat=True)[:limit]
+    ]
+    if product_ids:
+        Cart._catalog_state(product_ids, use_cache=False)
+    return len(product_ids)
+
+
+def merge_session_cart(request, user):
+    """
+    Merge the anonymous session cart into the user's persistent cart
+    One read of the overlapping rows, then a single bulk upsert.
+    Quantities of products already in the persistent cart are summed.
+    """
+    session_cart = request.session.get(settings.CART_SESSION_ID)
+    if not session_cart:
+        return
+
+    # Skip lines whose product has been deleted since it was added
+    product_ids = set(
+        Product.objects.filter(
+            id__in=[int(pid) for pid in session_cart]
+        ).values_list('id', flat=True)
+    )
+    existing = dict(
+        CartItem.objects.filter(
+            user=user,
+            product_id__in=product_ids
+        ).values_list('product_id', 'quantity')
+    )
+
+    items = [
+        CartItem(
+            user=user,
+            product_id=int(pid),
+            quantity=existing.get(int(pid), 0) + item['quantity'],
+            price=Decimal(item['price'])
+        )
+        for pid, item in session_cart.items()
+        if int(pid) in product_ids and item['quantity'] > 0
+    ]
+    if items:
+        CartItem.objects.bulk_create(
+            items,
+            update_conflicts=True,
+            unique_fields=['user', 'product'],
+            update_fields=['quantity', 'price', 'updated_at']
+        )
+
+    # Move the stock holds over to the user
+    session_holder = request.session.pop(HOLDER_SESSION_KEY, None)
+    if session_holder:
+        reservations.release(session_holder)
+    reservations.hold(f'user:{user.pk}', {item.product_id: item.quantity for item in items})
+
+    del request.session[settings.CART_SESSION_ID]
+    # Drop any copy cached for this request before the login happened
+    request.__dict__.pop('_cart_items', None)
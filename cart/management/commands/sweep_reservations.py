@@ -0,0 +1,43 @@
+"""
+Sweep Reservations Command
+Delete expired stock holds in bulk
+Expired holds are already ignored by availability queries; this keeps the table small.
+
+Usage:
+    python manage.py sweep_reservations
+    python manage.py sweep_reservations --batch-size 5000
+"""
+import time
+from django.core.management.base import BaseCommand, CommandError
+from cart.reservations import sweep_expired
+
+
+class Command(BaseCommand):
+    help = 'Delete expired stock reservations in batches'
+    # Cron job; system checks run at deploy, not on every invocation
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Reservations deleted per statement (default: 1000)'
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        if batch_size < 1:
+            raise CommandError('--batch-size must be at least 1.')
+
+        started = time.monotonic()
+        total = 0
+        while True:
+            deleted = sweep_expired(batch_size)
+            total += deleted
+            if deleted < batch_size:
+                break
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Swept {total} expired reservation(s) in {time.monotonic() - started:.2f}s.'
+        ))
@@ -1,19 +1,98 @@
 """
 Cart Models
-Currently using session-based cart
-Future: Can add CartModel and CartItemModel for persistent carts
+Anonymous visitors keep their cart in the session.
+Authenticated users get a persistent, database-backed cart shared across devices.
 """
 from django.db import models
+from django.contrib.auth.models import User
+from django.core.validators import MinValueValidator
+from decimal import Decimal
+from products.models import Product
 
-# Session-based cart is used currently
-# Future models for database-backed carts:
-#
-# class Cart(models.Model):
-#     user = models.ForeignKey(User, on_delete=models.CASCADE)
-#     created_at = models.DateTimeField(auto_now_add=True)
-#     updated_at = models.DateTimeField(auto_now=True)
-#
-# class CartItem(models.Model):
-#     cart = models.ForeignKey(Cart, on_delete=models.CASCADE)
-#     product = models.ForeignKey(Product, on_delete=models.CASCADE)
-#     quantity = models.PositiveIntegerField()
+
+class CartItem(models.Model):
+    """
+    Persistent cart line for a logged-in user
+    Design decisions:
+    - One row per (user, product), enforced by a unique constraint so
+      session carts can be merged with a single upsert on login
+    - The whole cart is read with one query on the (user, product) index
+    - Price snapshot mirrors the session cart format
+    """
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='cart_items'
+    )
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.CASCADE,
+        related_name='cart_items'
+    )
+    quantity = models.PositiveIntegerField(
+        default=1,
+        validators=[MinValueValidator(1)]
+    )
+    price = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        validators=[MinValueValidator(Decimal('0.01'))]
+    )
+
+    # Metadata
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['created_at']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'product'],
+                name='cart_item_unique_user_product'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.quantity}x {self.product_id} for {self.user_id}"
+
+    @property
+    def total_price(self):
+        return self.price * self.quantity
+
+
+class StockReservation(models.Model):
+    """
+    Temporary hold on stock between "add to cart" and checkout
+    Design decisions:
+    - holder is 'user:<id>' or 'session:<key>', so one unique constraint
+      covers both and holds can be upserted in bulk
+    - Holds expire on their own; expired rows are ignored by availability
+      queries and swept in bulk by `manage.py sweep_reservations`
+    - Checkout turns holds into real stock decrements and deletes them
+    """
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.CASCADE,
+        related_name='reservations'
+    )
+    holder = models.CharField(max_length=64)
+    quantity = models.PositiveIntegerField(validators=[MinValueValidator(1)])
+    expires_at = models.DateTimeField()
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['holder', 'product'],
+                name='stock_reservation_unique_holder_product'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['product', 'expires_at']),
+            models.Index(fields=['expires_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.quantity}x {self.product_id} held by {self.holder}"
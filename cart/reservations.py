@@ -0,0 +1,147 @@
+"""
+Stock Reservations
+Short-lived holds that keep stock in carts from being sold twice
+Availability = stock_quantity minus everyone else's active holds
+"""
+from datetime import timedelta
+from django.conf import settings
+from django.db.models import OuterRef, PositiveIntegerField, Q, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from products.models import Product
+from .models import StockReservation
+
+
+def available_stock(product_ids, holder=None):
+    """
+    Stock available to `holder` for each product, in one aggregate query
+    The holder's own holds are not subtracted, so they can keep or raise them.
+
+    Returns:
+        dict of {product_id: available quantity}; missing/inactive products are absent
+    """
+    active = Q(reservations__expires_at__gt=timezone.now())
+    if holder is not None:
+        active &= ~Q(reservations__holder=holder)
+
+    rows = Product.objects.filter(
+        id__in=product_ids,
+        is_active=True
+    ).annotate(
+        held=Coalesce(Sum('reservations__quantity', filter=active), 0)
+    ).values_list('id', 'stock_quantity', 'held')
+
+    return {
+        product_id: max(stock - held, 0)
+        for product_id, stock, held in rows
+    }
+
+
+def held_by_others(holder=None):
+    """
+    Expression for the quantity of a product held by other shoppers' active holds
+    Usable wherever the product row is the outer query, including the WHERE
+    of an UPDATE, so availability can be checked in the same statement.
+    """
+    holds = StockReservation.objects.filter(
+        product=OuterRef('pk'),
+        expires_at__gt=timezone.now()
+    )
+    if holder is not None:
+        holds = holds.exclude(holder=holder)
+    return Coalesce(
+        Subquery(
+            holds.values('product').annotate(total=Sum('quantity')).values('total'),
+            output_field=PositiveIntegerField()
+        ),
+        0
+    )
+
+
+def refresh(holder, quantities):
+    """
+    Keep a cart's holds alive while the shopper is still active
+    Live holds are extended as they are. Lapsed ones are taken again only
+    as far as stock not held by anyone else allows, so coming back late
+    never eats into another shopper's valid reservation.
+
+    Args:
+        holder: 'user:<id>' or 'session:<key>'
+        quantities: dict of {product_id: quantity in the cart}
+    """
+    quantities = {int(product_id): quantity for product_id, quantity in quantities.items()}
+    if not quantities:
+        return
+    live = set(
+        StockReservation.objects.filter(
+            holder=holder,
+            product_id__in=quantities,
+            expires_at__gt=timezone.now()
+        ).values_list('product_id', flat=True)
+    )
+    lapsed = [product_id for product_id in quantities if product_id not in live]
+    available = available_stock(lapsed, holder=holder) if lapsed else {}
+    hold(holder, {
+        product_id: (
+            quantity if product_id in live
+            else min(quantity, available.get(product_id, 0))
+        )
+        for product_id, quantity in quantities.items()
+    })
+
+
+def hold(holder, quantities):
+    """
+    Create or refresh holds for several products with a single upsert
+    Quantities of 0 or less release the hold instead.
+
+    Args:
+        holder: 'user:<id>' or 'session:<key>'
+        quantities: dict of {product_id: quantity}
+    """
+    expires_at = timezone.now() + timedelta(seconds=settings.STOCK_RESERVATION_TTL)
+    keep = [
+        StockReservation(
+            holder=holder,
+            product_id=int(product_id),
+            quantity=quantity,
+            expires_at=expires_at
+        )
+        for product_id, quantity in quantities.items()
+        if quantity > 0
+    ]
+    drop = [int(product_id) for product_id, quantity in quantities.items() if quantity <= 0]
+
+    if keep:
+        StockReservation.objects.bulk_create(
+            keep,
+            update_conflicts=True,
+            unique_fields=['holder', 'product'],
+            update_fields=['quantity', 'expires_at', 'updated_at']
+        )
+    if drop:
+        release(holder, drop)
+
+
+def release(holder, product_ids=None):
+    """Release the holder's holds (all of them if product_ids is None)"""
+    holds = StockReservation.objects.filter(holder=holder)
+    if product_ids is not None:
+        holds = holds.filter(product_id__in=[int(product_id) for product_id in product_ids])
+    holds.delete()
+
+
+def sweep_expired(batch_size=1000):
+    """
+    Delete one batch of expired holds
+    Returns the number of rows deleted; call until it returns 0.
+    """
+    ids = list(
+        StockReservation.objects.filter(
+            expires_at__lte=timezone.now()
+        ).values_list('id', flat=True)[:batch_size]
+    )
+    if not ids:
+        return 0
+    deleted, _ = StockReservation.objects.filter(id__in=ids).delete()
+    return deleted
@@ -0,0 +1,14 @@
+"""
+Cart Signals
+Move the anonymous session cart into the persistent cart on login
+"""
+from django.contrib.auth.signals import user_logged_in
+from django.dispatch import receiver
+from .cart import merge_session_cart
+
+
+@receiver(user_logged_in)
+def merge_cart_on_login(sender, request, user, **kwargs):
+    """Merge session cart lines into the user's CartItem rows"""
+    if request is not None:
+        merge_session_cart(request, user)
@@ -1,14 +1,21 @@
 """
 Cart URL Configuration
 """
+from django.conf import settings
 from django.urls import path
 from . import views
 
 app_name = 'cart'
 
 urlpatterns = [
-    path('', views.cart_detail, name='detail'),
+    path('', views.cart_detail_async if settings.ASYNC_VIEWS else views.cart_detail, name='detail'),
     path('add/<int:product_id>/', views.cart_add, name='add'),
     path('remove/<int:product_id>/', views.cart_remove, name='remove'),
     path('update/<int:product_id>/', views.cart_update, name='update'),
+
+    # JSON API for in-place cart updates
+    path('api/add/<int:product_id>/', views.api_cart_add, name='api_add'),
+    path('api/remove/<int:product_id>/', views.api_cart_remove, name='api_remove'),
+    path('api/update/<int:product_id>/', views.api_cart_update, name='api_update'),
+    path('api/update/', views.api_cart_batch_update, name='api_batch_update'),
 ]
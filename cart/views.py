@@ -2,17 +2,77 @@
 Cart Views
 Handle add/remove/update operations
 """
+import asyncio
+import json
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse
 from django.shortcuts import render, redirect, get_object_or_404
+from django.template.response import TemplateResponse
 from django.views.decorators.http import require_POST
 from django.contrib import messages
+from django.conf import settings
+from orders.rates import get_rate_table, quote_cart
 from products.models import Product
 from .cart import Cart
+from .reservations import available_stock
 
 
 def cart_detail(request):
-    """Display cart contents"""
+    """
+    Display cart contents
+    Lines are revalidated against (cached) catalog prices and stock first
+    Shipping and tax are estimated from the in-memory rate tables
+    """
     cart = Cart(request)
-    return render(request, 'cart/cart_detail.html', {'cart': cart})
+    cart_changes = cart.revalidate(use_cache=True)
+    # Viewing the cart counts as activity; keep its stock held
+    cart.refresh_holds()
+    for change in cart_changes:
+        messages.warning(request, change['message'])
+    items = cart.get_items()
+    subtotal = cart.get_total_price()
+    estimate = quote_cart(items, subtotal)
+    return render(request, 'cart/cart_detail.html', {
+        'cart': cart,
+        'items': items,
+        'estimate': estimate,
+        'estimated_total': subtotal + estimate['tax'] + estimate['shipping_cost'],
+        'cart_changes': cart_changes
+    })
+
+
+async def cart_detail_async(request):
+    """
+    cart_detail for ASGI
+    The catalog state for revalidation and the products shown on the page
+    are read together with the async cache and ORM APIs. Loading the cart
+    (Django 5.0's session store is sync-only), writing it back and the rate
+    table lookup stay on the sync thread.
+    """
+    cart = await sync_to_async(Cart)(request)
+    cart_changes, products = await asyncio.gather(
+        cart.arevalidate(use_cache=True),
+        _fetch_products(list(cart.cart))
+    )
+    # Viewing the cart counts as activity; keep its stock held
+    await sync_to_async(cart.refresh_holds)()
+    for change in cart_changes:
+        messages.warning(request, change['message'])
+    items = cart.get_items(products)
+    subtotal = cart.get_total_price()
+    estimate = await sync_to_async(quote_cart)(items, subtotal)
+    # Templates (and context processors) render on the sync thread
+    return TemplateResponse(request, 'cart/cart_detail.html', {
+        'cart': cart,
+        'items': items,
+        'estimate': estimate,
+        'estimated_total': subtotal + estimate['tax'] + estimate['shipping_cost'],
+        'cart_changes': cart_changes
+    })
+
+
+async def _fetch_products(product_ids):
+    return [product async for product in Product.objects.filter(id__in=product_ids)]
 
 
 @require_POST
@@ -23,9 +83,11 @@ def cart_add(request, product_id):
     
     quantity = int(request.POST.get('quantity', 1))
     
-    # Check stock availability
-    if product.stock_quantity < quantity:
-        messages.error(request, f'Sorry, only {product.stock_quantity} items available in stock.')
+    # Check stock availability (stock minus other shoppers' holds)
+    available = available_stock([product.id], holder=cart.holder).get(product.id, 0)
+    in_cart = cart.cart.get(str(product.id), {}).get('quantity', 0)
+    if available < in_cart + quantity:
+        messages.error(request, f'Sorry, only {available} items available in stock.')
         return redirect('products:detail', slug=product.slug)
     
     cart.add(product=product, quantity=quantity)
@@ -57,9 +119,10 @@ def cart_update(request, product_id):
     quantity = int(request.POST.get('quantity', 1))
     
     if quantity > 0:
-        # Check stock availability
-        if product.stock_quantity < quantity:
-            messages.error(request, f'Sorry, only {product.stock_quantity} items available in stock.')
+        # Check stock availability (stock minus other shoppers' holds)
+        available = available_stock([product.id], holder=cart.holder).get(product.id, 0)
+        if available < quantity:
+            messages.error(request, f'Sorry, only {available} items available in stock.')
             return redirect('cart:detail')
         
         cart.update_quantity(product_id, quantity)
@@ -69,3 +132,147 @@ def cart_update(request, product_id):
         messages.success(request, f'{product.name} removed from cart.')
     
     return redirect('cart:detail')
+
+
+# JSON API
+# Same operations as above, but answer with the changed line and cart totals
+# so the cart page can update in place instead of redirecting and re-rendering.
+
+def _cart_summary(cart):
+    """
+    Totals shared by every JSON cart response
+    The shipping/tax estimate needs only product weights, read from the
+    cached catalog state rather than the database
+    """
+    subtotal = cart.get_total_price()
+    estimate = get_rate_table().quote(
+        settings.SHIPPING_ESTIMATE_COUNTRY,
+        weight_grams=cart.get_weight(),
+        subtotal=subtotal
+    )
+    return {
+        'item_count': cart.get_item_count(),
+        'total_price': str(subtotal),
+        'estimated_shipping': str(estimate['shipping_cost']),
+        'estimated_tax': str(estimate['tax']),
+        'estimated_total': str(subtotal + estimate['tax'] + estimate['shipping_cost']),
+    }
+
+
+def _line_payload(cart, product_id):
+    """Serialize one cart line; None once it has been removed"""
+    line = cart.get_line(product_id)
+    if line is None:
+        return None
+    line['price'] = str(line['price'])
+    line['total_price'] = str(line['total_price'])
+    return line
+
+
+def _parse_quantity(value, default=1):
+    """Parse a quantity from request data; None if it is not an integer"""
+    try:
+        return int(value if value is not None else default)
+    except (TypeError, ValueError):
+        return None
+
+
+@require_POST
+def api_cart_add(request, product_id):
+    """Add product to cart and return the updated line"""
+    cart = Cart(request)
+    product = get_object_or_404(Product, id=product_id, is_active=True)
+
+    quantity = _parse_quantity(request.POST.get('quantity'))
+    if quantity is None or quantity < 1:
+        return JsonResponse({'error': 'Invalid quantity.'}, status=400)
+
+    available = available_stock([product.id], holder=cart.holder).get(product.id, 0)
+    in_cart = cart.cart.get(str(product.id), {}).get('quantity', 0)
+    if available < in_cart + quantity:
+        return JsonResponse({
+            'error': f'Sorry, only {available} items available in stock.',
+            'available': available,
+        }, status=409)
+
+    cart.add(product=product, quantity=quantity)
+    return JsonResponse({'line': _line_payload(cart, product_id), **_cart_summary(cart)})
+
+
+@require_POST
+def api_cart_remove(request, product_id):
+    """Remove product from cart; no product lookup needed"""
+    cart = Cart(request)
+    cart.update_quantity(product_id, 0)
+    return JsonResponse({'line': None, 'product_id': product_id, **_cart_summary(cart)})
+
+
+@require_POST
+def api_cart_update(request, product_id):
+    """Set the quantity of one cart line and return it"""
+    cart = Cart(request)
+    product = get_object_or_404(Product, id=product_id, is_active=True)
+
+    quantity = _parse_quantity(request.POST.get('quantity'))
+    if quantity is None:
+        return JsonResponse({'error': 'Invalid quantity.'}, status=400)
+
+    available = available_stock([product.id], holder=cart.holder).get(product.id, 0)
+    if quantity > 0 and available < quantity:
+        return JsonResponse({
+            'error': f'Sorry, only {available} items available in stock.',
+            'available': available,
+        }, status=409)
+
+    cart.update_quantity(product_id, quantity)
+    return JsonResponse({
+        'line': _line_payload(cart, product_id),
+        'product_id': product_id,
+        **_cart_summary(cart)
+    })
+
+
+@require_POST
+def api_cart_batch_update(request):
+    """
+    Apply several quantity changes in one request
+    Body: {"items": [{"product_id": 1, "quantity": 2}, ...]}
+    Availability for every line is checked with a single query; nothing is
+    changed unless every line passes.
+    """
+    cart = Cart(request)
+
+    try:
+        payload = json.loads(request.body)
+        quantities = {
+            int(entry['product_id']): int(entry['quantity'])
+            for entry in payload['items']
+        }
+    except (ValueError, KeyError, TypeError):
+        return JsonResponse({'error': 'Invalid request body.'}, status=400)
+
+    stock = available_stock(
+        [pid for pid, quantity in quantities.items() if quantity > 0],
+        holder=cart.holder
+    )
+
+    errors = {}
+    for product_id, quantity in quantities.items():
+        if quantity <= 0:
+            continue
+        available = stock.get(product_id)
+        if available is None:
+            errors[product_id] = 'Product is no longer available.'
+        elif available < quantity:
+            errors[product_id] = f'Sorry, only {available} items available in stock.'
+    if errors:
+        return JsonResponse({'errors': errors}, status=409)
+
+    cart.update_quantities(quantities)
+    return JsonResponse({
+        'lines': {
+            product_id: _line_payload(cart, product_id)
+            for product_id in quantities
+        },
+        **_cart_summary(cart)
+    })
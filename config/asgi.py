@@ -1,6 +1,7 @@
 """
 ASGI config for Vantor project.
-For future WebSocket/async features.
+Run with uvicorn (and ASYNC_VIEWS=True) to serve the async catalog views:
+    uvicorn config.asgi:application --workers 4
 """
 
 import os
@@ -0,0 +1,36 @@
+"""
+Pagination helpers
+Admin changelists over tables with millions of rows
+"""
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator that skips COUNT(*) on large unfiltered tables
+    Design decisions:
+    - On PostgreSQL an unfiltered changelist uses the planner's row estimate
+      (pg_class.reltuples), one catalog lookup instead of a full scan
+    - Small tables, filtered lists and other databases count exactly, so
+      page numbers stay correct wherever counting is cheap or required
+    Pair with ModelAdmin.show_full_result_count = False.
+    """
+    estimate_threshold = 10000
+
+    @cached_property
+    def count(self):
+        query = getattr(self.object_list, 'query', None)
+        if query is not None and not query.where:
+            connection = connections[self.object_list.db]
+            if connection.vendor == 'postgresql':
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        'SELECT reltuples::bigint FROM pg_class WHERE relname = %s',
+                        [self.object_list.model._meta.db_table]
+                    )
+                    row = cursor.fetchone()
+                if row and row[0] >= self.estimate_threshold:
+                    return row[0]
+        return super().count
@@ -26,6 +26,10 @@ DEBUG = env('DEBUG')
 
 ALLOWED_HOSTS = env.list('ALLOWED_HOSTS', default=['localhost', '127.0.0.1'])
 
+# Google sign-in. Turn off for processes that never render the login pages
+# (outbox worker, cron commands): the provider imports `requests` at startup
+SOCIAL_LOGIN_ENABLED = env.bool('SOCIAL_LOGIN_ENABLED', default=True)
+
 # Application definition
 INSTALLED_APPS = [
     'django.contrib.admin',
@@ -38,7 +42,7 @@ INSTALLED_APPS = [
     'allauth.account',
     'allauth.socialaccount',
 
-    'allauth.socialaccount.providers.google',
+    *(['allauth.socialaccount.providers.google'] if SOCIAL_LOGIN_ENABLED else []),
     
     # Local apps
     'products.apps.ProductsConfig',
@@ -59,6 +63,7 @@ MIDDLEWARE = [
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'allauth.account.middleware.AccountMiddleware',
+    'accounts.middleware.LoginThrottleMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -78,12 +83,16 @@ TEMPLATES = [
                 'django.contrib.messages.context_processors.messages',
                 'django.template.context_processors.media',
                 'cart.context_processors.cart_context',
+                'orders.context_processors.account_summary',
             ],
         },
     },
 ]
 
 WSGI_APPLICATION = 'config.wsgi.application'
+ASGI_APPLICATION = 'config.asgi.application'
+# Serve the async catalog/cart views; turn on when deploying with an ASGI server (uvicorn)
+ASYNC_VIEWS = env.bool('ASYNC_VIEWS', default=False)
 
 # Database
 # https://docs.djangoproject.com/en/5.0/ref/settings/#databases
@@ -91,6 +100,11 @@ DATABASES = {
     'default': env.db('DATABASE_URL', default='sqlite:///db.sqlite3')
 }
 
+# Cache (locmem per process by default)
+CACHES = {
+    'default': env.cache('CACHE_URL', default='locmemcache://')
+}
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -107,9 +121,20 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# PBKDF2 work factor; lower it per environment (e.g. tests) via PASSWORD_HASH_ITERATIONS
+PASSWORD_HASH_ITERATIONS = env.int('PASSWORD_HASH_ITERATIONS', default=720000)
+PASSWORD_HASHERS = [
+    'accounts.hashers.ConfigurablePBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+
 AUTHENTICATION_BACKENDS = [
 
-    'django.contrib.auth.backends.ModelBackend',
+    # ModelBackend plus login by email through the indexed profile column
+    'accounts.backends.UsernameOrEmailBackend',
 
     'allauth.account.auth_backends.AuthenticationBackend',
 
@@ -142,11 +167,34 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 SESSION_ENGINE = 'django.contrib.sessions.backends.db'
 SESSION_COOKIE_AGE = 86400 * 30  # 30 days
 CART_SESSION_ID = 'cart'
+# How long the cart page may trust cached catalog prices/stock (checkout always reads fresh)
+CART_REVALIDATION_CACHE_TIMEOUT = env.int('CART_REVALIDATION_CACHE_TIMEOUT', default=60)
+# Seconds that items in a cart hold stock before other shoppers can buy them
+STOCK_RESERVATION_TTL = env.int('STOCK_RESERVATION_TTL', default=60 * 15)
+# Seconds a process may quote from its compiled tax/shipping table before checking the rules for changes
+RATE_TABLE_MAX_AGE = env.int('RATE_TABLE_MAX_AGE', default=30)
+# Region used for the shipping/tax estimate on the cart page
+SHIPPING_ESTIMATE_COUNTRY = env('SHIPPING_ESTIMATE_COUNTRY', default='Nepal')
+# Upper bound on how long a cached account dashboard lives (order writes drop it sooner)
+ACCOUNT_DASHBOARD_CACHE_TIMEOUT = env.int('ACCOUNT_DASHBOARD_CACHE_TIMEOUT', default=60 * 60)
 
 # Authentication
 LOGIN_URL = 'accounts:login'
 LOGIN_REDIRECT_URL = 'products:home'
 LOGOUT_REDIRECT_URL = 'products:home'
+# Social signups may share an address with a local account (see accounts.adapters)
+SOCIALACCOUNT_ADAPTER = 'accounts.adapters.SocialAccountAdapter'
+
+# Login throttling (token buckets held in the cache; use a shared CACHE_URL
+# in production so every worker sees the same buckets)
+LOGIN_THROTTLE_ENABLED = env.bool('LOGIN_THROTTLE_ENABLED', default=True)
+LOGIN_THROTTLE_VIEWS = ['accounts:login', 'account_login', 'admin:login']
+LOGIN_THROTTLE_IP_BURST = env.int('LOGIN_THROTTLE_IP_BURST', default=20)
+LOGIN_THROTTLE_IP_PER_MINUTE = env.int('LOGIN_THROTTLE_IP_PER_MINUTE', default=10)
+LOGIN_THROTTLE_USERNAME_BURST = env.int('LOGIN_THROTTLE_USERNAME_BURST', default=5)
+LOGIN_THROTTLE_USERNAME_PER_MINUTE = env.int('LOGIN_THROTTLE_USERNAME_PER_MINUTE', default=2)
+# Reverse proxies in front of the app that append to X-Forwarded-For
+TRUSTED_PROXY_COUNT = env.int('TRUSTED_PROXY_COUNT', default=0)
 
 # Email configuration (for order confirmations)
 EMAIL_BACKEND = env('EMAIL_BACKEND', default='django.core.mail.backends.console.EmailBackend')
@@ -155,6 +203,17 @@ EMAIL_PORT = env('EMAIL_PORT', default=587)
 EMAIL_USE_TLS = env('EMAIL_USE_TLS', default=True)
 EMAIL_HOST_USER = env('EMAIL_HOST_USER', default='')
 EMAIL_HOST_PASSWORD = env('EMAIL_HOST_PASSWORD', default='')
+DEFAULT_FROM_EMAIL = env('DEFAULT_FROM_EMAIL', default='Vantor <orders@vantor.com.np>')
+ADMINS = [('Vantor Admin', email) for email in env.list('ADMIN_EMAILS', default=[])]
+
+# Default stock level at or below which a product is low stock (ADMINS are alerted)
+LOW_STOCK_THRESHOLD = env.int('LOW_STOCK_THRESHOLD', default=5)
+# Products expected to sell out within this many days also count as low stock
+STOCKOUT_WARNING_DAYS = env.int('STOCKOUT_WARNING_DAYS', default=7)
+# Days of recent order lines averaged into each product's sales velocity
+SALES_VELOCITY_DAYS = env.int('SALES_VELOCITY_DAYS', default=28)
+# A running bulk edit job whose progress hasn't moved for this many seconds has lost its worker
+BULK_EDIT_STALE_AFTER = env.int('BULK_EDIT_STALE_AFTER', default=60 * 10)
 
 # Site configuration
 SITE_NAME = env('SITE_NAME', default='Vantor')
@@ -162,7 +221,8 @@ SITE_URL = env('SITE_URL', default='http://localhost:8000')
 
 # Security settings for production
 if not DEBUG:
-    SECURE_SSL_REDIRECT = True
+    # Off when TLS is terminated elsewhere and plain HTTP never reaches the app (or for local benchmarks)
+    SECURE_SSL_REDIRECT = env.bool('SECURE_SSL_REDIRECT', default=True)
     SESSION_COOKIE_SECURE = True
     CSRF_COOKIE_SECURE = True
     SECURE_BROWSER_XSS_FILTER = True
@@ -0,0 +1,87 @@
+"""
+Worker Warm-up
+Do the lazy per-process work up front, before a worker accepts traffic
+Architecture: called from the gunicorn hooks (config/gunicorn.py). With
+preload_app it runs once in the master and every forked worker inherits
+the compiled URL patterns, templates and in-memory tables.
+"""
+import time
+from pathlib import Path
+from django.apps import apps
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import caches
+from django.db import connections
+from django.template import TemplateDoesNotExist, TemplateSyntaxError, engines
+from django.urls import URLResolver, get_resolver
+
+# Set once this process (or the master it was forked from) is warm
+_warmed = False
+
+
+def resolve_urls(resolver=None):
+    """Populate every resolver's reverse lookups and compile every route; returns the route count"""
+    resolver = resolver or get_resolver()
+    resolver.reverse_dict  # noqa: B018 - populating is the point
+    count = 0
+    for pattern in resolver.url_patterns:
+        pattern.pattern.regex  # noqa: B018 - compiled lazily otherwise
+        if isinstance(pattern, URLResolver):
+            count += resolve_urls(pattern)
+        else:
+            count += 1
+    return count
+
+
+def load_templates():
+    """
+    Compile every template into the cached loader
+    Returns (loaded, skipped); third-party templates that need optional
+    libraries are skipped rather than failing the worker.
+    """
+    loaded = skipped = 0
+    for engine in engines.all():
+        for directory in map(Path, engine.template_dirs):
+            for path in directory.rglob('*'):
+                if path.suffix not in ('.html', '.txt') or not path.is_file():
+                    continue
+                try:
+                    engine.get_template(path.relative_to(directory).as_posix())
+                    loaded += 1
+                except (TemplateDoesNotExist, TemplateSyntaxError):
+                    skipped += 1
+    return loaded, skipped
+
+
+def prime_caches():
+    """Rate table, content types and the cart's catalog cache for the hot products; returns products cached"""
+    from cart.cart import prime_catalog_state
+    from orders.rates import get_rate_table
+
+    get_rate_table()
+    ContentType.objects.get_for_models(*apps.get_models())
+    return prime_catalog_state()
+
+
+def warm_up():
+    """
+    Run every warm-up step once per process tree
+    Returns a one-line summary, or None if this process was already warm.
+    Database and cache connections are closed afterwards so they are
+    never shared with forked workers.
+    """
+    global _warmed
+    if _warmed:
+        return None
+
+    started = time.monotonic()
+    routes = resolve_urls()
+    templates, skipped = load_templates()
+    products = prime_caches()
+    connections.close_all()
+    for cache in caches.all(initialized_only=True):
+        cache.close()
+    _warmed = True
+    return (
+        f'{routes} routes, {templates} templates ({skipped} skipped), '
+        f'{products} products cached in {time.monotonic() - started:.2f}s'
+    )
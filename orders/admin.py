@@ -2,9 +2,32 @@
 Order Admin
 Enhanced admin for order management
 """
-from django.contrib import admin
+import uuid
+from datetime import timedelta
+from django.contrib import admin, messages
+from django.db.models import Sum
+from django.http import StreamingHttpResponse
+from django.shortcuts import redirect
+from django.template.response import TemplateResponse
+from django.urls import path
+from django.utils import timezone
 from django.utils.html import format_html
-from .models import Order, OrderItem
+from config.pagination import EstimatedCountPaginator
+from products.models import Category
+from . import transitions
+from .exports import export_lines, render_lines
+from .models import (
+    ArchivedOrder,
+    Order,
+    OrderItem,
+    OrderStatusHistory,
+    OrderStatusRollup,
+    OutboxEvent,
+    RollupCheckpoint,
+    SalesRollup,
+    ShippingRate,
+    TaxRate,
+)
 
 
 class OrderItemInline(admin.TabularInline):
@@ -14,11 +37,28 @@ class OrderItemInline(admin.TabularInline):
     readonly_fields = ['product_name', 'price', 'quantity', 'get_total']
     can_delete = False
     
+    def has_add_permission(self, request, obj=None):
+        # Lines are snapshots taken at checkout; the blank add row also
+        # has no price to total
+        return False
+    
     def get_total(self, obj):
         return f"NPR {obj.total_price:.2f}"
     get_total.short_description = 'Total'
 
 
+class OrderStatusHistoryInline(admin.TabularInline):
+    """Read-only audit trail of status changes"""
+    model = OrderStatusHistory
+    extra = 0
+    fields = ['created_at', 'from_status', 'to_status', 'source', 'changed_by', 'note']
+    readonly_fields = fields
+    can_delete = False
+    
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
 @admin.register(Order)
 class OrderAdmin(admin.ModelAdmin):
     list_display = [
@@ -38,8 +78,14 @@ class OrderAdmin(admin.ModelAdmin):
         'last_name',
         'phone'
     ]
+    autocomplete_fields = ['user']
+    date_hierarchy = 'created_at'
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     readonly_fields = [
         'order_number',
+        'status',
+        'is_paid',
         'created_at',
         'updated_at',
         'paid_at',
@@ -50,7 +96,7 @@ class OrderAdmin(admin.ModelAdmin):
         'shipping_cost',
         'total'
     ]
-    inlines = [OrderItemInline]
+    inlines = [OrderItemInline, OrderStatusHistoryInline]
     
     fieldsets = (
         ('Order Information', {
@@ -92,6 +138,9 @@ class OrderAdmin(admin.ModelAdmin):
                 'payment_id'
             )
         }),
+        ('Shipment', {
+            'fields': ('carrier', 'tracking_number')
+        }),
         ('Timestamps', {
             'fields': (
                 'created_at',
@@ -119,24 +168,171 @@ class OrderAdmin(admin.ModelAdmin):
         )
     status_badge.short_description = 'Status'
     
-    actions = ['mark_as_processing', 'mark_as_shipped', 'mark_as_delivered']
+    def changelist_view(self, request, extra_context=None):
+        """Searching for an archived order number opens the archived copy"""
+        query = request.GET.get('q', '').strip()
+        if query:
+            try:
+                order_number = uuid.UUID(query)
+            except ValueError:
+                order_number = None
+            if order_number and not Order.objects.filter(order_number=order_number).exists():
+                archived = ArchivedOrder.objects.filter(
+                    order_number=order_number
+                ).values_list('pk', flat=True).first()
+                if archived is not None:
+                    return redirect('admin:orders_archivedorder_change', archived)
+        return super().changelist_view(request, extra_context)
+    
+    def get_urls(self):
+        custom_urls = [
+            path(
+                'dashboard/',
+                self.admin_site.admin_view(self.sales_dashboard_view),
+                name='orders_order_dashboard'
+            ),
+        ]
+        return custom_urls + super().get_urls()
+    
+    def sales_dashboard_view(self, request):
+        """
+        Sales dashboard built only from the rollup tables
+        Query cost is independent of the size of the order history.
+        """
+        try:
+            days = min(max(int(request.GET.get('days', 30)), 1), 366)
+        except ValueError:
+            days = 30
+        since = timezone.localtime().replace(
+            hour=0, minute=0, second=0, microsecond=0
+        ) - timedelta(days=days - 1)
+        
+        sales = SalesRollup.objects.filter(granularity='day', bucket__gte=since)
+        statuses = OrderStatusRollup.objects.filter(granularity='day', bucket__gte=since)
+        
+        daily = {
+            row['bucket']: row
+            for row in sales.values('bucket').annotate(
+                units_sum=Sum('units'),
+                revenue_sum=Sum('revenue')
+            ).order_by()
+        }
+        daily_orders = dict(
+            statuses.exclude(status='cancelled').values('bucket').annotate(
+                orders_sum=Sum('orders')
+            ).order_by().values_list('bucket', 'orders_sum')
+        )
+        daily_rows = [
+            {
+                'day': bucket,
+                'orders': daily_orders.get(bucket, 0),
+                'units': daily.get(bucket, {}).get('units_sum', 0),
+                'revenue': daily.get(bucket, {}).get('revenue_sum', 0),
+            }
+            for bucket in sorted(set(daily) | set(daily_orders), reverse=True)
+        ]
+        
+        top_products = sales.values('product_id', 'product_name').annotate(
+            units_sum=Sum('units'),
+            revenue_sum=Sum('revenue')
+        ).order_by('-revenue_sum')[:10]
+        
+        by_category = list(
+            sales.values('category_id').annotate(
+                units_sum=Sum('units'),
+                revenue_sum=Sum('revenue')
+            ).order_by('-revenue_sum')
+        )
+        category_names = dict(
+            Category.objects.filter(
+                id__in=[row['category_id'] for row in by_category if row['category_id']]
+            ).values_list('id', 'name')
+        )
+        for row in by_category:
+            row['name'] = category_names.get(row['category_id'], 'Uncategorized')
+        
+        status_counts = statuses.values('status').annotate(
+            orders_sum=Sum('orders'),
+            revenue_sum=Sum('revenue')
+        ).order_by('status')
+        
+        context = {
+            **self.admin_site.each_context(request),
+            'opts': self.model._meta,
+            'title': f'Sales dashboard (last {days} days)',
+            'days': days,
+            'daily_rows': daily_rows,
+            'totals': {
+                'orders': sum(row['orders'] for row in daily_rows),
+                'units': sum(row['units'] for row in daily_rows),
+                'revenue': sum(row['revenue'] for row in daily_rows),
+            },
+            'top_products': top_products,
+            'by_category': by_category,
+            'status_counts': status_counts,
+            'checkpoint': RollupCheckpoint.objects.filter(name='sales').first(),
+        }
+        return TemplateResponse(request, 'admin/orders/sales_dashboard.html', context)
+    
+    actions = [
+        'mark_as_processing',
+        'mark_as_shipped',
+        'mark_as_delivered',
+        'mark_as_cancelled',
+        'mark_as_paid',
+        'export_lines_csv',
+        'export_lines_jsonl'
+    ]
+    
+    def _transition(self, request, queryset, to_status):
+        """Apply a status change through the state machine and report skips"""
+        moved, rejected = transitions.transition(
+            queryset, to_status, source='admin', user=request.user
+        )
+        self.message_user(request, f'{len(moved)} order(s) marked as {to_status}.')
+        if rejected:
+            self.message_user(
+                request,
+                f'{len(rejected)} order(s) skipped: their current status cannot become {to_status}.',
+                messages.WARNING
+            )
     
     def mark_as_processing(self, request, queryset):
-        updated = queryset.update(status='processing')
-        self.message_user(request, f'{updated} order(s) marked as processing.')
+        self._transition(request, queryset, 'processing')
     mark_as_processing.short_description = 'Mark as Processing'
     
     def mark_as_shipped(self, request, queryset):
-        from django.utils import timezone
-        updated = queryset.update(status='shipped', shipped_at=timezone.now())
-        self.message_user(request, f'{updated} order(s) marked as shipped.')
+        self._transition(request, queryset, 'shipped')
     mark_as_shipped.short_description = 'Mark as Shipped'
     
     def mark_as_delivered(self, request, queryset):
-        from django.utils import timezone
-        updated = queryset.update(status='delivered', delivered_at=timezone.now())
-        self.message_user(request, f'{updated} order(s) marked as delivered.')
+        self._transition(request, queryset, 'delivered')
     mark_as_delivered.short_description = 'Mark as Delivered'
+    
+    def mark_as_cancelled(self, request, queryset):
+        self._transition(request, queryset, 'cancelled')
+    mark_as_cancelled.short_description = 'Cancel'
+    
+    def mark_as_paid(self, request, queryset):
+        paid = transitions.mark_paid(queryset, source='admin', user=request.user)
+        self.message_user(request, f'{len(paid)} order(s) marked as paid.')
+    mark_as_paid.short_description = 'Mark as Paid'
+    
+    def _export_response(self, queryset, fmt, content_type):
+        """Stream the order lines of the selected orders"""
+        lines = export_lines(orders=queryset)
+        response = StreamingHttpResponse(render_lines(lines, fmt), content_type=content_type)
+        filename = f'orders-{timezone.localtime():%Y%m%d-%H%M}.{fmt}'
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+    
+    def export_lines_csv(self, request, queryset):
+        return self._export_response(queryset, 'csv', 'text/csv')
+    export_lines_csv.short_description = 'Export order lines (CSV)'
+    
+    def export_lines_jsonl(self, request, queryset):
+        return self._export_response(queryset, 'jsonl', 'application/x-ndjson')
+    export_lines_jsonl.short_description = 'Export order lines (JSON Lines)'
 
 
 @admin.register(OrderItem)
@@ -145,7 +341,87 @@ class OrderItemAdmin(admin.ModelAdmin):
     list_filter = ['order__created_at']
     search_fields = ['product_name', 'order__order_number']
     readonly_fields = ['order', 'product_name', 'price', 'quantity']
+    list_select_related = ['order']
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     
     def get_total(self, obj):
         return f"NPR {obj.total_price:.2f}"
     get_total.short_description = 'Total'
+
+
+@admin.register(OutboxEvent)
+class OutboxEventAdmin(admin.ModelAdmin):
+    list_display = ['id', 'topic', 'status', 'attempts', 'available_at', 'created_at', 'processed_at']
+    list_filter = ['status', 'topic']
+    readonly_fields = [
+        'topic',
+        'payload',
+        'attempts',
+        'last_error',
+        'created_at',
+        'processed_at'
+    ]
+    
+    actions = ['retry_now']
+    
+    def retry_now(self, request, queryset):
+        updated = queryset.exclude(status='done').update(
+            status='pending',
+            available_at=timezone.now()
+        )
+        self.message_user(request, f'{updated} event(s) queued for retry.')
+    retry_now.short_description = 'Retry now'
+
+
+@admin.register(ArchivedOrder)
+class ArchivedOrderAdmin(admin.ModelAdmin):
+    """Read-only view of orders moved out of the hot tables"""
+    list_display = ['order_number', 'user', 'status', 'total', 'created_at', 'archived_at']
+    list_filter = ['status']
+    search_fields = ['order_number']
+    raw_id_fields = ['user']
+    readonly_fields = [
+        'order_number',
+        'user',
+        'status',
+        'total',
+        'created_at',
+        'archived_at',
+        'data',
+        'items'
+    ]
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(TaxRate)
+class TaxRateAdmin(admin.ModelAdmin):
+    """Saving or deleting a rule recompiles the checkout rate tables"""
+    list_display = ['country', 'state_province', 'rate', 'is_active']
+    list_filter = ['is_active', 'country']
+    list_editable = ['rate', 'is_active']
+    search_fields = ['country', 'state_province']
+
+
+@admin.register(ShippingRate)
+class ShippingRateAdmin(admin.ModelAdmin):
+    """Saving or deleting a rule recompiles the checkout rate tables"""
+    list_display = [
+        'name',
+        'country',
+        'state_province',
+        'postal_code_prefix',
+        'min_weight_grams',
+        'max_weight_grams',
+        'min_subtotal',
+        'cost',
+        'is_active'
+    ]
+    list_filter = ['is_active', 'country']
+    list_editable = ['cost', 'is_active']
+    search_fields = ['name', 'country', 'state_province', 'postal_code_prefix']
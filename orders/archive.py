@@ -0,0 +1,60 @@
+"""
+Order Archive
+Move finished orders out of the hot tables, and read them back by order number
+"""
+from django.db import transaction
+from .models import ArchivedOrder, Order
+
+# Only orders in a final state are archived
+ARCHIVABLE_STATUSES = ['delivered', 'cancelled']
+
+
+def archive_batch(cutoff, batch_size=500):
+    """
+    Archive up to `batch_size` finished orders created before `cutoff`
+    Each batch is one transaction: one select (+ items and status history), one bulk
+    insert into the archive, one delete of the hot rows.
+
+    Returns:
+        Number of orders archived; 0 when there is nothing left to do
+    """
+    with transaction.atomic():
+        orders = list(
+            Order.objects.filter(
+                status__in=ARCHIVABLE_STATUSES,
+                created_at__lt=cutoff
+            ).order_by('pk').select_for_update(
+                skip_locked=True
+            ).prefetch_related('items', 'status_history')[:batch_size]
+        )
+        if not orders:
+            return 0
+
+        # ignore_conflicts makes re-running after a crash safe
+        ArchivedOrder.objects.bulk_create(
+            [ArchivedOrder.from_order(order) for order in orders],
+            ignore_conflicts=True
+        )
+        # Order post_delete drops the owners' dashboards: spend is unchanged,
+        # but the orders leave the recent list
+        Order.objects.filter(pk__in=[order.pk for order in orders]).delete()
+    return len(orders)
+
+
+def find_order(order_number, **filters):
+    """
+    Look an order up in the hot table, falling back to the archive
+    Extra filters (e.g. user=...) apply to both.
+
+    Returns:
+        (order, items) or (None, None); archived orders come back as
+        unsaved instances that are only meant for display
+    """
+    order = Order.objects.filter(order_number=order_number, **filters).first()
+    if order is not None:
+        return order, order.items.all()
+
+    archived = ArchivedOrder.objects.filter(order_number=order_number, **filters).first()
+    if archived is not None:
+        return archived.to_order(), archived.to_items()
+    return None, None
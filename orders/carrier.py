@@ -0,0 +1,129 @@
+"""
+Carrier Tracking Imports
+Apply warehouse/carrier shipment files to orders in bulk
+Architecture: rows are streamed in chunks; each chunk resolves its order
+numbers with one in_bulk() query, moves orders through the state machine
+in bulk and writes tracking numbers with one UPDATE ... CASE.
+"""
+import csv
+import uuid
+from django.db import transaction
+from django.db.models import Case, CharField, F, Value, When
+from django.utils import timezone
+from .models import Order
+from .transitions import transition
+
+REQUIRED_COLUMNS = {'order_number', 'tracking_number'}
+CARRIER_STATUSES = ('shipped', 'delivered')
+TRACKING_NUMBER_MAX_LENGTH = Order._meta.get_field('tracking_number').max_length
+CARRIER_MAX_LENGTH = Order._meta.get_field('carrier').max_length
+
+
+def read_rows(stream):
+    """
+    Yield (line number, row) from a carrier CSV
+    Columns: order_number, tracking_number (required on every row), and
+    optionally status (shipped or delivered, default shipped) and carrier.
+    """
+    reader = csv.DictReader(stream)
+    missing = REQUIRED_COLUMNS - set(reader.fieldnames or [])
+    if missing:
+        raise ValueError(f"Missing column(s): {', '.join(sorted(missing))}")
+    for row in reader:
+        yield reader.line_num, row
+
+
+def apply_chunk(rows, carrier='', note=''):
+    """
+    Apply one chunk of carrier rows
+
+    Args:
+        rows: list of (line number, row dict) from read_rows()
+        carrier: carrier name for rows without a carrier column
+
+    Returns:
+        (updated, rejects): number of rows applied (including orders that
+        were already in the reported status) and a list of
+        (line number, order number, reason) for rows that were not
+    """
+    rejects = []
+    wanted = {}
+    for line, row in rows:
+        raw_number = (row.get('order_number') or '').strip()
+        try:
+            number = uuid.UUID(raw_number)
+        except ValueError:
+            rejects.append((line, raw_number, 'invalid order number'))
+            continue
+        status = (row.get('status') or 'shipped').strip().lower()
+        if status not in CARRIER_STATUSES:
+            rejects.append((line, raw_number, f'unknown status {status!r}'))
+            continue
+        # Checked here, before any order moves: an overlong value would only
+        # fail in the final UPDATE, after the transitions
+        tracking = (row.get('tracking_number') or '').strip()
+        row_carrier = (row.get('carrier') or carrier).strip()
+        if not tracking:
+            rejects.append((line, raw_number, 'missing tracking number'))
+            continue
+        if len(tracking) > TRACKING_NUMBER_MAX_LENGTH:
+            rejects.append((line, raw_number, 'tracking number too long'))
+            continue
+        if len(row_carrier) > CARRIER_MAX_LENGTH:
+            rejects.append((line, raw_number, 'carrier name too long'))
+            continue
+        # A later row for the same order wins
+        wanted[number] = (line, status, tracking, row_carrier)
+
+    orders = Order.objects.only('pk', 'order_number', 'status').in_bulk(
+        list(wanted), field_name='order_number'
+    )
+    for number in [number for number in wanted if number not in orders]:
+        line = wanted.pop(number)[0]
+        rejects.append((line, str(number), 'unknown order'))
+
+    # Delivered rows for orders we never saw ship go through shipped first
+    to_ship = [
+        orders[number].pk for number, (_, status, _, _) in wanted.items()
+        if (status == 'shipped' and orders[number].status not in CARRIER_STATUSES)
+        or (status == 'delivered' and orders[number].status == 'processing')
+    ]
+    to_deliver = [
+        orders[number].pk for number, (_, status, _, _) in wanted.items()
+        if status == 'delivered' and orders[number].status != 'delivered'
+    ]
+    # Status moves and tracking numbers commit together
+    with transaction.atomic():
+        refused = {}
+        if to_ship:
+            refused.update(transition(to_ship, 'shipped', source='carrier', note=note)[1])
+        if to_deliver:
+            refused.update(transition(
+                [pk for pk in to_deliver if pk not in refused],
+                'delivered',
+                source='carrier',
+                note=note
+            )[1])
+
+        accepted = []
+        for number, (line, status, tracking, row_carrier) in wanted.items():
+            order = orders[number]
+            if order.pk in refused:
+                rejects.append((line, str(number), f'cannot go from {refused[order.pk]} to {status}'))
+            else:
+                accepted.append((order.pk, tracking, row_carrier))
+
+        if accepted:
+            Order.objects.filter(pk__in=[pk for pk, _, _ in accepted]).update(
+                tracking_number=Case(
+                    *[When(pk=pk, then=Value(tracking)) for pk, tracking, _ in accepted],
+                    output_field=CharField()
+                ),
+                carrier=Case(
+                    *[When(pk=pk, then=Value(row_carrier)) for pk, _, row_carrier in accepted if row_carrier],
+                    default=F('carrier'),
+                    output_field=CharField()
+                ),
+                updated_at=timezone.now()
+            )
+    return len(accepted), sorted(rejects)
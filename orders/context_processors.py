@@ -0,0 +1,17 @@
+"""
+Orders Context Processors
+Makes the signed-in user's order summary available to the account menu
+"""
+from django.utils.functional import SimpleLazyObject
+from . import dashboard
+
+
+def account_summary(request):
+    """
+    Add the cached dashboard summary to template context
+    Lazy, so pages that never show it don't touch the cache
+    """
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_authenticated:
+        return {}
+    return {'account_summary': SimpleLazyObject(lambda: dashboard.for_request(request))}
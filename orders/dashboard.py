@@ -0,0 +1,83 @@
+"""
+Account Dashboard
+Per-user order summary for the profile page and the account menu
+Architecture: built from a few aggregate queries, cached per user and
+dropped whenever one of that user's orders is written.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from .models import ArchivedOrder, Order
+
+# Orders still on their way to the customer
+OPEN_STATUSES = ['pending', 'processing', 'shipped']
+RECENT_ORDER_COUNT = 5
+
+
+def cache_key(user_id):
+    return f'orders:dashboard:{user_id}'
+
+
+def build_summary(user_id):
+    """
+    Fresh summary for one user, as plain values so it can be cached
+    One aggregate over hot orders, one over archived orders, one query for
+    the recent orders with their item counts.
+    """
+    spent = Sum('total', filter=~Q(status='cancelled'))
+    hot = Order.objects.filter(user_id=user_id).aggregate(
+        order_count=Count('pk'),
+        open_orders=Count('pk', filter=Q(status__in=OPEN_STATUSES)),
+        lifetime_spend=spent
+    )
+    archived = ArchivedOrder.objects.filter(user_id=user_id).aggregate(
+        order_count=Count('pk'),
+        lifetime_spend=spent
+    )
+    statuses = dict(Order.STATUS_CHOICES)
+    recent = [
+        dict(order, status_display=statuses.get(order['status'], order['status']))
+        for order in Order.objects.filter(user_id=user_id).with_totals().order_by(
+            '-created_at'
+        ).values(
+            'order_number', 'created_at', 'status', 'total', 'item_count', 'unit_count'
+        )[:RECENT_ORDER_COUNT]
+    ]
+    return {
+        'order_count': hot['order_count'] + archived['order_count'],
+        'open_orders': hot['open_orders'],
+        'lifetime_spend': (hot['lifetime_spend'] or 0) + (archived['lifetime_spend'] or 0),
+        'recent_orders': recent,
+    }
+
+
+def get_summary(user_id):
+    """Cached summary: one cache read, and the queries above only on a miss"""
+    key = cache_key(user_id)
+    summary = cache.get(key)
+    if summary is None:
+        summary = build_summary(user_id)
+        cache.set(key, summary, settings.ACCOUNT_DASHBOARD_CACHE_TIMEOUT)
+    return summary
+
+
+def for_request(request):
+    """
+    Summary for the signed-in user, shared by the context processor and views
+    so a page that shows both the menu and the dashboard reads the cache once
+    """
+    summary = getattr(request, '_account_summary', None)
+    if summary is None:
+        summary = request._account_summary = get_summary(request.user.pk)
+    return summary
+
+
+def invalidate(user_ids):
+    """
+    Drop the cached summaries of these users once the current transaction
+    commits, so a concurrent request cannot re-cache the old state
+    """
+    keys = [cache_key(user_id) for user_id in set(user_ids) if user_id is not None]
+    if keys:
+        transaction.on_commit(lambda: cache.delete_many(keys))
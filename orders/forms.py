@@ -11,6 +11,7 @@ class OrderCreateForm(forms.ModelForm):
     Checkout form for creating orders
     Custom styling can be added via widgets
     """
+    checkout_token = forms.UUIDField(widget=forms.HiddenInput)
     
     class Meta:
         model = Order
@@ -0,0 +1,69 @@
+"""
+Archive Orders Command
+Move old delivered/cancelled orders into the ArchivedOrder cold table in batches
+
+Usage:
+    python manage.py archive_orders
+    python manage.py archive_orders --older-than-days 180 --batch-size 1000
+"""
+import time
+from datetime import timedelta
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from orders.archive import ARCHIVABLE_STATUSES, archive_batch
+
+
+class Command(BaseCommand):
+    help = 'Archive finished orders older than a cutoff'
+    # Cron job; system checks run at deploy, not on every invocation
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--older-than-days',
+            type=int,
+            default=365,
+            help='Archive orders created more than this many days ago (default: 365)'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Orders moved per transaction (default: 500)'
+        )
+        parser.add_argument(
+            '--sleep',
+            type=float,
+            default=0.1,
+            help='Seconds to pause between batches (default: 0.1)'
+        )
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1.')
+
+        cutoff = timezone.now() - timedelta(days=options['older_than_days'])
+        self.stdout.write(
+            f"Archiving {'/'.join(ARCHIVABLE_STATUSES)} orders created before {cutoff:%Y-%m-%d}"
+        )
+
+        started = time.monotonic()
+        total = batches = 0
+        while True:
+            moved = archive_batch(cutoff, options['batch_size'])
+            if not moved:
+                break
+            total += moved
+            batches += 1
+            elapsed = time.monotonic() - started
+            self.stdout.write(
+                f'Batch {batches}: {total} archived ({total / elapsed if elapsed else 0:.0f} orders/s)'
+            )
+            if moved < options['batch_size']:
+                break
+            time.sleep(options['sleep'])
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Archived {total} order(s) in {batches} batch(es), {elapsed:.2f}s.'
+        ))
@@ -0,0 +1,102 @@
+"""
+Import Tracking Command
+Apply a carrier/warehouse shipment file: tracking numbers plus shipped and
+delivered status changes through the order state machine
+
+The file is a CSV with order_number and tracking_number columns, and
+optionally status (shipped or delivered, default shipped) and carrier.
+
+Usage:
+    python manage.py import_tracking shipments.csv --carrier "Nepal Post"
+    python manage.py import_tracking shipments.csv.gz --rejects rejects.csv
+    cat shipments.csv | python manage.py import_tracking -
+"""
+import csv
+import gzip
+import os
+import sys
+import time
+from itertools import islice
+from django.core.management.base import BaseCommand, CommandError
+from orders.carrier import apply_chunk, read_rows
+
+
+class Command(BaseCommand):
+    help = 'Apply a carrier tracking file to orders in bulk'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="CSV file (gzip if it ends in .gz), or - for stdin")
+        parser.add_argument(
+            '--carrier',
+            default='',
+            help='Carrier name for rows without a carrier column'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=1000,
+            help='Rows applied per chunk (default: 1000)'
+        )
+        parser.add_argument(
+            '--rejects',
+            help='Write rejected rows (line, order_number, reason) to this CSV'
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        if chunk_size < 1:
+            raise CommandError('--chunk-size must be at least 1.')
+
+        path = options['path']
+        if path == '-':
+            stream = sys.stdin
+        else:
+            opener = gzip.open if path.endswith('.gz') else open
+            try:
+                stream = opener(path, 'rt', encoding='utf-8-sig', newline='')
+            except OSError as exc:
+                raise CommandError(f'Cannot open {path}: {exc}')
+        note = f'Carrier file {os.path.basename(path)}' if path != '-' else 'Carrier file'
+
+        rejects_out = None
+        if options['rejects']:
+            rejects_file = open(options['rejects'], 'w', encoding='utf-8', newline='')
+            rejects_out = csv.writer(rejects_file)
+            rejects_out.writerow(['line', 'order_number', 'reason'])
+
+        started = time.monotonic()
+        total = updated = rejected = 0
+        try:
+            rows = read_rows(stream)
+            while True:
+                chunk = list(islice(rows, chunk_size))
+                if not chunk:
+                    break
+                applied, rejects = apply_chunk(chunk, carrier=options['carrier'], note=note)
+                total += len(chunk)
+                updated += applied
+                rejected += len(rejects)
+                for reject in rejects:
+                    if rejects_out is not None:
+                        rejects_out.writerow(reject)
+                    else:
+                        self.stderr.write('Line {}: {} rejected: {}'.format(*reject))
+
+                elapsed = time.monotonic() - started
+                self.stdout.write(
+                    f'{total} rows: {updated} applied, {rejected} rejected '
+                    f'({total / elapsed if elapsed else 0:.0f} rows/s)'
+                )
+        except ValueError as exc:
+            raise CommandError(str(exc))
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+            if rejects_out is not None:
+                rejects_file.close()
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {total} row(s): {updated} applied, {rejected} rejected, '
+            f'{elapsed:.2f}s, {total / elapsed if elapsed else 0:.0f} rows/s.'
+        ))
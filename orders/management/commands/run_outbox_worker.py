@@ -0,0 +1,90 @@
+"""
+Outbox Worker Command
+Drain the order outbox: confirmation emails, stock alerts, cache invalidation
+Several workers can run at once on PostgreSQL (rows are claimed with SKIP LOCKED)
+
+Usage:
+    python manage.py run_outbox_worker
+    python manage.py run_outbox_worker --once
+    python manage.py run_outbox_worker --batch-size 200 --poll-interval 2
+"""
+import time
+from django.core.management.base import BaseCommand, CommandError
+from orders.outbox import process_batch
+
+
+class Command(BaseCommand):
+    help = 'Process pending outbox events in batches with retries and backoff'
+    # Long-running worker; restarts should not wait on system checks
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=100,
+            help='Events claimed per transaction (default: 100)'
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=1.0,
+            help='Seconds to wait when the outbox is empty (default: 1)'
+        )
+        parser.add_argument(
+            '--max-attempts',
+            type=int,
+            default=5,
+            help='Attempts before an event is marked failed (default: 5)'
+        )
+        parser.add_argument(
+            '--backoff',
+            type=float,
+            default=30,
+            help='Base retry delay in seconds, doubled on every attempt (default: 30)'
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Exit as soon as no events are due instead of polling'
+        )
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1.')
+
+        started = time.monotonic()
+        total_ok = total_failed = 0
+
+        try:
+            while True:
+                batch_started = time.monotonic()
+                ok, failed = process_batch(
+                    batch_size=options['batch_size'],
+                    max_attempts=options['max_attempts'],
+                    backoff_seconds=options['backoff']
+                )
+                handled = ok + failed
+
+                if handled:
+                    total_ok += ok
+                    total_failed += failed
+                    elapsed = time.monotonic() - batch_started
+                    self.stdout.write(
+                        f'{ok} done, {failed} failed '
+                        f'({handled / elapsed if elapsed else 0:.0f} events/s)'
+                    )
+
+                if handled < options['batch_size']:
+                    if options['once']:
+                        break
+                    time.sleep(options['poll_interval'])
+        except KeyboardInterrupt:
+            pass
+
+        elapsed = time.monotonic() - started
+        total = total_ok + total_failed
+        self.stdout.write(self.style.SUCCESS(
+            f'Processed {total} event(s): {total_ok} done, {total_failed} failed, '
+            f'{elapsed:.2f}s, {total / elapsed if elapsed else 0:.0f} events/s.'
+        ))
@@ -0,0 +1,55 @@
+"""
+Sales Rollups Command
+Keep the hourly/daily sales rollups in sync with orders
+Run it from cron every few minutes; use --backfill once (or after data fixes).
+
+Usage:
+    python manage.py update_sales_rollups
+    python manage.py update_sales_rollups --backfill --chunk-days 14
+"""
+import time
+from django.core.management.base import BaseCommand, CommandError
+from orders import rollups
+
+
+class Command(BaseCommand):
+    help = 'Incrementally update sales rollups, or rebuild them from history'
+    # Cron job; system checks run at deploy, not on every invocation
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--backfill',
+            action='store_true',
+            help='Rebuild rollups for the whole order history'
+        )
+        parser.add_argument(
+            '--chunk-days',
+            type=int,
+            default=7,
+            help='Days of history rebuilt per transaction during backfill (default: 7)'
+        )
+
+    def handle(self, *args, **options):
+        if options['chunk_days'] < 1:
+            raise CommandError('--chunk-days must be at least 1.')
+
+        started = time.monotonic()
+
+        def progress(start, end, sales_rows, status_rows):
+            self.stdout.write(
+                f'{start:%Y-%m-%d} to {end:%Y-%m-%d}: '
+                f'{sales_rows} sales row(s), {status_rows} status row(s)'
+            )
+
+        if options['backfill']:
+            chunks = rollups.backfill(options['chunk_days'], progress=progress)
+            summary = f'Backfilled {chunks} chunk(s)'
+        else:
+            days = rollups.refresh(progress=progress)
+            summary = 'No checkpoint yet, rebuilt all history' if days is None \
+                else f'Recomputed {days} day(s)'
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{summary} in {time.monotonic() - started:.2f}s.'
+        ))
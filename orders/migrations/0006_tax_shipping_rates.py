@@ -0,0 +1,49 @@
+# Generated by Django 5.0.1 on 2026-10-19 04:25
+
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0005_archivedorder'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ShippingRate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('country', models.CharField(max_length=100)),
+                ('state_province', models.CharField(blank=True, max_length=100)),
+                ('postal_code_prefix', models.CharField(blank=True, max_length=20)),
+                ('min_weight_grams', models.PositiveIntegerField(default=0)),
+                ('max_weight_grams', models.PositiveIntegerField(blank=True, help_text='Exclusive upper bound; blank for no limit', null=True)),
+                ('min_subtotal', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=10)),
+                ('cost', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('is_active', models.BooleanField(default=True)),
+            ],
+            options={
+                'ordering': ['country', 'state_province', 'postal_code_prefix', 'min_weight_grams', 'min_subtotal'],
+            },
+        ),
+        migrations.CreateModel(
+            name='TaxRate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('country', models.CharField(max_length=100)),
+                ('state_province', models.CharField(blank=True, max_length=100)),
+                ('rate', models.DecimalField(decimal_places=2, help_text='Percentage of the subtotal, e.g. 13.00', max_digits=5)),
+                ('is_active', models.BooleanField(default=True)),
+            ],
+            options={
+                'ordering': ['country', 'state_province'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='taxrate',
+            constraint=models.UniqueConstraint(fields=('country', 'state_province'), name='tax_rate_unique_region'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.0.1 on 2026-10-19 04:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0007_order_status_history'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='carrier',
+            field=models.CharField(blank=True, max_length=50),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='tracking_number',
+            field=models.CharField(blank=True, max_length=100),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.0.1 on 2026-10-19 05:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0008_order_tracking_number'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='shippingrate',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='taxrate',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
@@ -3,12 +3,26 @@ Order Models
 Architecture: Denormalized data for historical accuracy
 """
 from django.db import models
+from django.db.models.functions import Coalesce
 from django.contrib.auth.models import User
+from django.core.serializers.json import DjangoJSONEncoder
 from django.core.validators import MinValueValidator
+from django.utils import timezone
 from decimal import Decimal
 import uuid
 
 
+class OrderQuerySet(models.QuerySet):
+    """Reusable order queries"""
+    
+    def with_totals(self):
+        """Item and unit counts computed by the database, not by loading items"""
+        return self.annotate(
+            item_count=models.Count('items'),
+            unit_count=Coalesce(models.Sum('items__quantity'), 0)
+        )
+
+
 class Order(models.Model):
     """
     Order Model
@@ -35,6 +49,15 @@ class Order(models.Model):
         db_index=True
     )
     
+    # One token per rendered checkout form; replays of the same submission
+    # find the existing order instead of creating a second one
+    checkout_token = models.UUIDField(
+        unique=True,
+        null=True,
+        blank=True,
+        editable=False
+    )
+    
     # Customer Information (denormalized for historical accuracy)
     user = models.ForeignKey(
         User, 
@@ -94,6 +117,10 @@ class Order(models.Model):
     payment_method = models.CharField(max_length=50, blank=True)
     payment_id = models.CharField(max_length=200, blank=True)
     
+    # Shipment (filled in by carrier file imports)
+    carrier = models.CharField(max_length=50, blank=True)
+    tracking_number = models.CharField(max_length=100, blank=True)
+    
     # Timestamps
     created_at = models.DateTimeField(auto_now_add=True, db_index=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -101,6 +128,8 @@ class Order(models.Model):
     shipped_at = models.DateTimeField(null=True, blank=True)
     delivered_at = models.DateTimeField(null=True, blank=True)
     
+    objects = OrderQuerySet.as_manager()
+    
     class Meta:
         ordering = ['-created_at']
         indexes = [
@@ -165,3 +194,316 @@ class OrderItem(models.Model):
     
     def __str__(self):
         return f"{self.quantity}x {self.product_name}"
+
+
+class OrderStatusHistory(models.Model):
+    """
+    Audit trail of order status changes
+    Written in bulk by orders.transitions, one row per order moved
+    """
+    SOURCE_CHOICES = [
+        ('admin', 'Admin'),
+        ('api', 'API'),
+        ('carrier', 'Carrier import'),
+        ('system', 'System'),
+    ]
+    
+    order = models.ForeignKey(
+        Order,
+        on_delete=models.CASCADE,
+        related_name='status_history'
+    )
+    from_status = models.CharField(max_length=20, choices=Order.STATUS_CHOICES)
+    to_status = models.CharField(max_length=20, choices=Order.STATUS_CHOICES)
+    source = models.CharField(max_length=20, choices=SOURCE_CHOICES)
+    changed_by = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+'
+    )
+    note = models.CharField(max_length=255, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['created_at', 'id']
+        verbose_name_plural = 'order status history'
+        indexes = [
+            models.Index(fields=['order', 'created_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.order_id}: {self.from_status} -> {self.to_status}"
+
+
+class OutboxEvent(models.Model):
+    """
+    Transactional outbox for side effects of order writes
+    Design decisions:
+    - Written in the same transaction as the order, so an event exists
+      if and only if the order was committed
+    - Drained by `manage.py run_outbox_worker`, keeping SMTP and other
+      slow work off the request path
+    - Failed events are retried with exponential backoff until max attempts
+    """
+
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+
+    topic = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict)
+    status = models.CharField(
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default='pending'
+    )
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+
+    # Timestamps
+    available_at = models.DateTimeField(default=timezone.now)
+    created_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['status', 'available_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.topic} #{self.pk} ({self.status})"
+
+
+class SalesRollup(models.Model):
+    """
+    Pre-aggregated sales per product per hour/day
+    Maintained by orders.rollups; dashboards read these rows instead of
+    aggregating Order/OrderItem. Cancelled orders are excluded.
+    """
+
+    GRANULARITY_CHOICES = [
+        ('hour', 'Hourly'),
+        ('day', 'Daily'),
+    ]
+
+    granularity = models.CharField(max_length=4, choices=GRANULARITY_CHOICES)
+    bucket = models.DateTimeField(help_text="Start of the hour/day (local time)")
+
+    # Product snapshot (not FKs, like OrderItem)
+    product_id = models.PositiveIntegerField()
+    product_name = models.CharField(max_length=200)
+    category_id = models.PositiveIntegerField(null=True, blank=True)
+
+    orders = models.PositiveIntegerField(default=0)
+    units = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        default=Decimal('0.00')
+    )
+
+    class Meta:
+        ordering = ['-bucket']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['granularity', 'bucket', 'product_id'],
+                name='sales_rollup_unique_bucket_product'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['granularity', 'category_id', 'bucket']),
+        ]
+
+    def __str__(self):
+        return f"{self.product_name} {self.granularity} {self.bucket:%Y-%m-%d %H:%M}"
+
+
+class OrderStatusRollup(models.Model):
+    """
+    Pre-aggregated order counts and value per status per hour/day
+    """
+    granularity = models.CharField(max_length=4, choices=SalesRollup.GRANULARITY_CHOICES)
+    bucket = models.DateTimeField(help_text="Start of the hour/day (local time)")
+    status = models.CharField(max_length=20, choices=Order.STATUS_CHOICES)
+
+    orders = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        default=Decimal('0.00')
+    )
+
+    class Meta:
+        ordering = ['-bucket']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['granularity', 'bucket', 'status'],
+                name='status_rollup_unique_bucket_status'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.status} {self.granularity} {self.bucket:%Y-%m-%d %H:%M}"
+
+
+class RollupCheckpoint(models.Model):
+    """
+    High-water mark of Order.updated_at already folded into the rollups
+    """
+    name = models.CharField(max_length=50, unique=True)
+    value = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.name}: {self.value}"
+
+
+class ArchivedOrder(models.Model):
+    """
+    Cold storage for old delivered/cancelled orders
+    Design decisions:
+    - One row per order; the full order and its items are kept as JSON,
+      so the hot Order/OrderItem tables and their indexes stay small
+    - order_number, user, status, total and created_at stay as real
+      columns for lookups and reporting
+    - to_order()/to_items() rebuild unsaved instances for read-only views
+    """
+    order_number = models.UUIDField(unique=True, editable=False)
+    user = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='archived_orders'
+    )
+    status = models.CharField(max_length=20, choices=Order.STATUS_CHOICES)
+    total = models.DecimalField(max_digits=10, decimal_places=2)
+    created_at = models.DateTimeField(db_index=True)
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    data = models.JSONField(encoder=DjangoJSONEncoder)
+    items = models.JSONField(encoder=DjangoJSONEncoder, default=list)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"Archived order {self.order_number}"
+
+    @classmethod
+    def from_order(cls, order):
+        """Build (unsaved) archive row from an Order with prefetched items and history"""
+        data = {
+            field.attname: field.value_from_object(order)
+            for field in Order._meta.concrete_fields
+        }
+        data['status_history'] = [
+            {
+                field.attname: field.value_from_object(change)
+                for field in OrderStatusHistory._meta.concrete_fields
+                if field.attname not in ('id', 'order_id')
+            }
+            for change in order.status_history.all()
+        ]
+        return cls(
+            order_number=order.order_number,
+            user_id=order.user_id,
+            status=order.status,
+            total=order.total,
+            created_at=order.created_at,
+            data=data,
+            items=[
+                {
+                    field.attname: field.value_from_object(item)
+                    for field in OrderItem._meta.concrete_fields
+                    if field.attname != 'order_id'
+                }
+                for item in order.items.all()
+            ]
+        )
+
+    def to_order(self):
+        """Unsaved Order rebuilt from the archive, for display only"""
+        return Order(**{
+            field.attname: field.to_python(self.data.get(field.attname))
+            for field in Order._meta.concrete_fields
+        })
+
+    def to_items(self):
+        """Unsaved OrderItems rebuilt from the archive, for display only"""
+        return [
+            OrderItem(**{
+                field.attname: field.to_python(item.get(field.attname))
+                for field in OrderItem._meta.concrete_fields
+                if field.attname != 'order_id'
+            })
+            for item in self.items
+        ]
+
+
+class TaxRate(models.Model):
+    """
+    Tax rate by region
+    Leave state_province blank for a country-wide rate; the most specific
+    active rule wins. Compiled into memory by orders.rates.
+    """
+    country = models.CharField(max_length=100)
+    state_province = models.CharField(max_length=100, blank=True)
+    rate = models.DecimalField(
+        max_digits=5,
+        decimal_places=2,
+        help_text="Percentage of the subtotal, e.g. 13.00"
+    )
+    is_active = models.BooleanField(default=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['country', 'state_province']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['country', 'state_province'],
+                name='tax_rate_unique_region'
+            ),
+        ]
+
+    def __str__(self):
+        region = f"{self.country} / {self.state_province}" if self.state_province else self.country
+        return f"{region}: {self.rate}%"
+
+
+class ShippingRate(models.Model):
+    """
+    Shipping cost by region, order weight and subtotal
+    Region matching, most specific first: postal code prefix, state, country.
+    Within a region a rule applies to weights in [min_weight, max_weight)
+    and subtotals from min_subtotal up (e.g. free shipping over a threshold).
+    Compiled into memory by orders.rates.
+    """
+    name = models.CharField(max_length=100)
+    country = models.CharField(max_length=100)
+    state_province = models.CharField(max_length=100, blank=True)
+    postal_code_prefix = models.CharField(max_length=20, blank=True)
+    min_weight_grams = models.PositiveIntegerField(default=0)
+    max_weight_grams = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        help_text="Exclusive upper bound; blank for no limit"
+    )
+    min_subtotal = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        default=Decimal('0.00')
+    )
+    cost = models.DecimalField(max_digits=10, decimal_places=2)
+    is_active = models.BooleanField(default=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['country', 'state_province', 'postal_code_prefix', 'min_weight_grams', 'min_subtotal']
+
+    def __str__(self):
+        return f"{self.name}: NPR {self.cost}"
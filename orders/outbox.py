@@ -0,0 +1,152 @@
+"""
+Order Outbox
+Side effects of order writes, recorded in the order's transaction and
+performed later by `manage.py run_outbox_worker`
+"""
+from datetime import timedelta
+from django.conf import settings
+from django.core.cache import cache
+from django.core.mail import mail_admins, send_mail
+from django.db import transaction
+from django.template.loader import render_to_string
+from django.utils import timezone
+from products import low_stock
+from products.cache import product_state_cache_key
+from products.models import Product
+from .models import Order, OutboxEvent
+
+
+def enqueue(topic, payload):
+    """Record one event; call inside the transaction that caused it"""
+    return OutboxEvent.objects.create(topic=topic, payload=payload)
+
+
+def enqueue_many(events):
+    """Record several (topic, payload) events with one INSERT"""
+    return OutboxEvent.objects.bulk_create([
+        OutboxEvent(topic=topic, payload=payload)
+        for topic, payload in events
+    ])
+
+
+def enqueue_order_placed(order, product_ids):
+    """Events that follow every successful checkout"""
+    product_ids = sorted(product_ids)
+    return enqueue_many([
+        ('order.confirmation_email', {'order_id': order.pk}),
+        ('stock.low_stock_alert', {'product_ids': product_ids}),
+        ('cache.invalidate_products', {'product_ids': product_ids}),
+    ])
+
+
+# Handlers
+# Each takes the event payload and raises on failure so the event is retried.
+
+def send_order_confirmation(payload):
+    """Email the customer a summary of their order"""
+    order = Order.objects.prefetch_related('items').get(pk=payload['order_id'])
+    send_mail(
+        subject=f'{settings.SITE_NAME} order confirmation #{str(order.order_number)[:8]}',
+        message=render_to_string('orders/email/confirmation.txt', {
+            'order': order,
+            'site_name': settings.SITE_NAME,
+            'site_url': settings.SITE_URL,
+        }),
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        recipient_list=[order.email],
+    )
+
+
+def send_low_stock_alert(payload):
+    """
+    Update the low-stock index for the products checkout sold and tell the
+    admins about those that are now running low
+    """
+    entries = low_stock.refresh(payload['product_ids'])
+    if not entries:
+        return
+    names = dict(
+        Product.objects.filter(
+            id__in=[entry.product_id for entry in entries]
+        ).values_list('id', 'name')
+    )
+    mail_admins(
+        subject=f'Low stock: {len(entries)} product(s)',
+        message='\n'.join(
+            f'{names.get(entry.product_id, entry.product_id)}: {entry.stock_quantity} left'
+            + (
+                f' (about {entry.days_until_stockout} days of sales)'
+                if entry.days_until_stockout is not None else ''
+            )
+            for entry in entries
+        ),
+    )
+
+
+def invalidate_product_caches(payload):
+    """Drop cached catalog state for products whose stock changed"""
+    cache.delete_many([
+        product_state_cache_key(product_id)
+        for product_id in payload['product_ids']
+    ])
+
+
+HANDLERS = {
+    'order.confirmation_email': send_order_confirmation,
+    'stock.low_stock_alert': send_low_stock_alert,
+    'cache.invalidate_products': invalidate_product_caches,
+}
+
+
+def process_batch(batch_size=100, max_attempts=5, backoff_seconds=30):
+    """
+    Claim and handle up to `batch_size` due events
+    Rows are locked with SKIP LOCKED where the database supports it, so
+    several workers can drain the outbox side by side.
+    Each handler runs in its own savepoint, so a database error in one
+    handler rolls back only that handler's writes and leaves the batch
+    transaction usable for the rest of the batch and the bookkeeping.
+    Results are written back with one bulk UPDATE per batch.
+
+    Returns:
+        (succeeded, failed) counts for this batch
+    """
+    now = timezone.now()
+    succeeded = failed = 0
+
+    with transaction.atomic():
+        events = list(
+            OutboxEvent.objects.select_for_update(skip_locked=True).filter(
+                status='pending',
+                available_at__lte=now
+            ).order_by('id')[:batch_size]
+        )
+
+        for event in events:
+            event.attempts += 1
+            handler = HANDLERS.get(event.topic)
+            try:
+                if handler is None:
+                    raise LookupError(f'No handler for topic {event.topic!r}')
+                with transaction.atomic():
+                    handler(event.payload)
+            except Exception as exc:
+                failed += 1
+                event.last_error = f'{type(exc).__name__}: {exc}'
+                if event.attempts >= max_attempts:
+                    event.status = 'failed'
+                else:
+                    delay = backoff_seconds * 2 ** (event.attempts - 1)
+                    event.available_at = timezone.now() + timedelta(seconds=delay)
+            else:
+                succeeded += 1
+                event.status = 'done'
+                event.last_error = ''
+                event.processed_at = timezone.now()
+
+        OutboxEvent.objects.bulk_update(
+            events,
+            ['status', 'attempts', 'last_error', 'available_at', 'processed_at']
+        )
+
+    return succeeded, failed
@@ -0,0 +1,209 @@
+"""
+Tax and Shipping Rates
+Rate rules live in the database but are compiled into an in-memory lookup
+Architecture: each process rebuilds its table only when the rules have changed.
+The rules' version (row count and latest updated_at) is read from the database
+at most every RATE_TABLE_MAX_AGE seconds, so it needs no shared cache and
+most quotes never query the database.
+"""
+import time
+from bisect import bisect_right
+from decimal import Decimal
+from django.conf import settings
+from django.db.models import Count, Max
+from .models import ShippingRate, TaxRate
+
+CENT = Decimal('0.01')
+ZERO = Decimal('0.00')
+
+
+def _normalize(value):
+    """Region names are matched case- and whitespace-insensitively"""
+    return (value or '').strip().casefold()
+
+
+def _postal(value):
+    """Postal codes are matched on their prefix, ignoring spaces and case"""
+    return ''.join((value or '').split()).upper()
+
+
+class RateTable:
+    """
+    Compiled tax and shipping rules
+    Design decisions:
+    - Tax: dict keyed by (country, state); falls back to the country-wide rate
+    - Shipping: dict keyed by (country, state, postal prefix), each holding
+      weight bands sorted by lower bound, each band holding subtotal
+      thresholds sorted ascending; both are searched with bisect
+    - Regions are tried most specific first, longest postal prefix first
+    """
+
+    def __init__(self, tax_rules, shipping_rules, version=None):
+        self.version = version
+        self.tax = {
+            (_normalize(rule.country), _normalize(rule.state_province)): rule.rate
+            for rule in tax_rules
+        }
+
+        regions = {}
+        for rule in shipping_rules:
+            key = (
+                _normalize(rule.country),
+                _normalize(rule.state_province),
+                _postal(rule.postal_code_prefix)
+            )
+            band = (rule.min_weight_grams, rule.max_weight_grams)
+            regions.setdefault(key, {}).setdefault(band, []).append(
+                (rule.min_subtotal, rule.cost)
+            )
+
+        self.shipping = {}
+        for key, bands in regions.items():
+            compiled = []
+            for (min_weight, max_weight), thresholds in sorted(bands.items(), key=lambda b: b[0][0]):
+                thresholds.sort()
+                compiled.append((
+                    min_weight,
+                    max_weight,
+                    [minimum for minimum, cost in thresholds],
+                    [cost for minimum, cost in thresholds]
+                ))
+            self.shipping[key] = (
+                [band[0] for band in compiled],
+                compiled
+            )
+        self.prefix_lengths = sorted(
+            {len(prefix) for country, state, prefix in self.shipping if prefix},
+            reverse=True
+        )
+
+    def _regions(self, country, state, postal_code):
+        """Candidate shipping region keys, most specific first"""
+        for length in self.prefix_lengths:
+            if len(postal_code) >= length:
+                prefix = postal_code[:length]
+                yield (country, state, prefix)
+                if state:
+                    yield (country, '', prefix)
+        yield (country, state, '')
+        if state:
+            yield (country, '', '')
+
+    def shipping_cost(self, country, state_province='', postal_code='', weight_grams=0, subtotal=ZERO):
+        """Shipping cost for an order, or None if no rule covers it"""
+        country, state = _normalize(country), _normalize(state_province)
+        for key in self._regions(country, state, _postal(postal_code)):
+            region = self.shipping.get(key)
+            if region is None:
+                continue
+            starts, bands = region
+            index = bisect_right(starts, weight_grams) - 1
+            if index < 0:
+                continue
+            min_weight, max_weight, minimums, costs = bands[index]
+            if max_weight is not None and weight_grams >= max_weight:
+                continue
+            index = bisect_right(minimums, subtotal) - 1
+            if index < 0:
+                continue
+            return costs[index]
+        return None
+
+    def tax_rate(self, country, state_province=''):
+        """Tax percentage for a region (0 if none is configured)"""
+        country, state = _normalize(country), _normalize(state_province)
+        rate = self.tax.get((country, state))
+        if rate is None:
+            rate = self.tax.get((country, ''), ZERO)
+        return rate
+
+    def quote(self, country, state_province='', postal_code='', weight_grams=0, subtotal=ZERO):
+        """
+        Tax and shipping for an order
+        Returns a dict with 'tax', 'tax_rate' and 'shipping_cost'; shipping is
+        0 where no rule applies, matching the old free-shipping behaviour.
+        """
+        rate = self.tax_rate(country, state_province)
+        shipping = self.shipping_cost(country, state_province, postal_code, weight_grams, subtotal)
+        return {
+            'tax_rate': rate,
+            'tax': (subtotal * rate / 100).quantize(CENT),
+            'shipping_cost': shipping if shipping is not None else ZERO,
+        }
+
+
+_table = None
+# time.monotonic() of the last version check; None forces a check
+_checked_at = None
+
+
+def rules_version():
+    """
+    Version of the rate rules, read from the database in two aggregates
+    Every save bumps a rule's updated_at and every delete lowers a count,
+    so any change to either table changes the version.
+    """
+    return tuple(
+        (row['count'], row['latest'])
+        for row in (
+            TaxRate.objects.aggregate(count=Count('pk'), latest=Max('updated_at')),
+            ShippingRate.objects.aggregate(count=Count('pk'), latest=Max('updated_at')),
+        )
+    )
+
+
+def invalidate():
+    """
+    Check the rules again on this process's next quote
+    Other processes notice the change within RATE_TABLE_MAX_AGE seconds.
+    """
+    global _checked_at
+    _checked_at = None
+
+
+def get_rate_table():
+    """
+    Current compiled rate table
+    The rules' version is checked at most every RATE_TABLE_MAX_AGE seconds;
+    the rules themselves are only read again after they have changed.
+    """
+    global _table, _checked_at
+    now = time.monotonic()
+    if (
+        _table is not None
+        and _checked_at is not None
+        and now - _checked_at < settings.RATE_TABLE_MAX_AGE
+    ):
+        return _table
+    version = rules_version()
+    if _table is None or _table.version != version:
+        _table = RateTable(
+            TaxRate.objects.filter(is_active=True),
+            ShippingRate.objects.filter(is_active=True),
+            version=version
+        )
+    _checked_at = now
+    return _table
+
+
+def cart_weight(items):
+    """Total shipping weight in grams of cart items (as yielded by Cart)"""
+    return sum(
+        item['product'].weight_grams * item['quantity']
+        for item in items
+        if 'product' in item
+    )
+
+
+def quote_cart(items, subtotal, country=None, state_province='', postal_code=''):
+    """
+    Tax and shipping for cart items going to an address
+    Without a country this is the estimate shown on the cart page.
+    """
+    return get_rate_table().quote(
+        country or settings.SHIPPING_ESTIMATE_COUNTRY,
+        state_province,
+        postal_code,
+        cart_weight(items),
+        subtotal
+    )
@@ -0,0 +1,280 @@
+"""
+Sales Rollups
+Hourly and daily aggregates of orders, kept up to date incrementally
+Architecture: any day touched by a new or changed order is recomputed from
+source in one transaction (hourly rows first, daily rows summed from them),
+so status changes and cancellations are always reflected correctly.
+"""
+from collections import defaultdict
+from datetime import datetime, timedelta
+from decimal import Decimal
+from django.db import transaction
+from django.db.models import Count, DecimalField, F, Max, Min, Sum
+from django.db.models.functions import TruncDate, TruncHour
+from django.utils import timezone
+from products.models import Product
+from .models import (
+    ArchivedOrder,
+    Order,
+    OrderItem,
+    OrderStatusRollup,
+    RollupCheckpoint,
+    SalesRollup,
+)
+
+CHECKPOINT_NAME = 'sales'
+
+# Re-scan this far behind the checkpoint to catch transactions that were
+# still open (with an older updated_at) when the previous run finished
+CHECKPOINT_OVERLAP = timedelta(minutes=5)
+
+
+def _local_midnight(value):
+    """Start of the local day containing `value` (a date or aware datetime)"""
+    if hasattr(value, 'hour'):
+        value = timezone.localtime(value).date()
+    return timezone.make_aware(datetime(value.year, value.month, value.day))
+
+
+def _archived_rows(start, end):
+    """
+    Hourly sales/status rows for archived orders in [start, end)
+    Same shape as the SQL aggregates in rebuild_range; computed in Python
+    because archived items are stored as JSON. Only old days have any.
+    """
+    sales = defaultdict(lambda: {'order_count': 0, 'unit_count': 0, 'line_revenue': Decimal('0.00')})
+    status = defaultdict(lambda: {'order_count': 0, 'order_revenue': Decimal('0.00')})
+
+    archived = ArchivedOrder.objects.filter(
+        created_at__gte=start,
+        created_at__lt=end
+    ).values_list('created_at', 'status', 'total', 'items')
+    for created_at, order_status, total, items in archived:
+        bucket = timezone.localtime(created_at).replace(minute=0, second=0, microsecond=0)
+        row = status[(bucket, order_status)]
+        row['order_count'] += 1
+        row['order_revenue'] += total
+        if order_status == 'cancelled':
+            continue
+        for product_id in {item['product_id'] for item in items}:
+            sales[(bucket, product_id)]['order_count'] += 1
+        for item in items:
+            row = sales[(bucket, item['product_id'])]
+            row['name'] = item['product_name']
+            row['unit_count'] += item['quantity']
+            row['line_revenue'] += Decimal(item['price']) * item['quantity']
+
+    return (
+        [{'bucket': bucket, 'product_id': pid, **row} for (bucket, pid), row in sales.items()],
+        [{'bucket': bucket, 'status': st, **row} for (bucket, st), row in status.items()],
+    )
+
+
+def _merge_rows(rows, extra, keys, sums):
+    """Combine two lists of aggregate rows, summing `sums` where `keys` match"""
+    merged = {tuple(row[key] for key in keys): dict(row) for row in rows}
+    for row in extra:
+        key = tuple(row[k] for k in keys)
+        if key in merged:
+            for field in sums:
+                merged[key][field] += row[field]
+        else:
+            merged[key] = row
+    return list(merged.values())
+
+
+def rebuild_range(start, end):
+    """
+    Recompute every rollup with a bucket in [start, end)
+    start and end should be local midnights so whole days are rebuilt.
+    Costs three aggregate queries, one archive read, plus bulk deletes/inserts.
+    Archived orders are folded in, so rebuilding a day never loses them.
+    """
+    tz = timezone.get_current_timezone()
+
+    with transaction.atomic():
+        SalesRollup.objects.filter(bucket__gte=start, bucket__lt=end).delete()
+        OrderStatusRollup.objects.filter(bucket__gte=start, bucket__lt=end).delete()
+
+        hourly_sales = list(
+            OrderItem.objects.filter(
+                order__created_at__gte=start,
+                order__created_at__lt=end
+            ).exclude(
+                order__status='cancelled'
+            ).annotate(
+                bucket=TruncHour('order__created_at', tzinfo=tz)
+            ).order_by().values(
+                'bucket', 'product_id'
+            ).annotate(
+                name=Max('product_name'),
+                order_count=Count('order_id', distinct=True),
+                unit_count=Sum('quantity'),
+                line_revenue=Sum(
+                    F('price') * F('quantity'),
+                    output_field=DecimalField(max_digits=12, decimal_places=2)
+                )
+            )
+        )
+
+        archived_sales, archived_status = _archived_rows(start, end)
+        hourly_sales = _merge_rows(
+            hourly_sales, archived_sales,
+            keys=('bucket', 'product_id'),
+            sums=('order_count', 'unit_count', 'line_revenue')
+        )
+
+        categories = dict(
+            Product.objects.filter(
+                id__in={row['product_id'] for row in hourly_sales}
+            ).values_list('id', 'category_id')
+        )
+
+        sales = []
+        daily = defaultdict(lambda: {'orders': 0, 'units': 0, 'revenue': Decimal('0.00')})
+        for row in hourly_sales:
+            sales.append(SalesRollup(
+                granularity='hour',
+                bucket=row['bucket'],
+                product_id=row['product_id'],
+                product_name=row['name'],
+                category_id=categories.get(row['product_id']),
+                orders=row['order_count'],
+                units=row['unit_count'],
+                revenue=row['line_revenue']
+            ))
+            # Every order falls in exactly one hour, so hourly rows add up to days
+            day = daily[(_local_midnight(row['bucket']), row['product_id'], row['name'])]
+            day['orders'] += row['order_count']
+            day['units'] += row['unit_count']
+            day['revenue'] += row['line_revenue']
+
+        for (bucket, product_id, name), totals in daily.items():
+            sales.append(SalesRollup(
+                granularity='day',
+                bucket=bucket,
+                product_id=product_id,
+                product_name=name,
+                category_id=categories.get(product_id),
+                **totals
+            ))
+        SalesRollup.objects.bulk_create(sales, batch_size=1000)
+
+        hourly_status = _merge_rows(
+            Order.objects.filter(
+                created_at__gte=start,
+                created_at__lt=end
+            ).annotate(
+                bucket=TruncHour('created_at', tzinfo=tz)
+            ).order_by().values(
+                'bucket', 'status'
+            ).annotate(
+                order_count=Count('id'),
+                order_revenue=Sum('total')
+            ),
+            archived_status,
+            keys=('bucket', 'status'),
+            sums=('order_count', 'order_revenue')
+        )
+
+        statuses = []
+        daily = defaultdict(lambda: {'orders': 0, 'revenue': Decimal('0.00')})
+        for row in hourly_status:
+            statuses.append(OrderStatusRollup(
+                granularity='hour',
+                bucket=row['bucket'],
+                status=row['status'],
+                orders=row['order_count'],
+                revenue=row['order_revenue']
+            ))
+            day = daily[(_local_midnight(row['bucket']), row['status'])]
+            day['orders'] += row['order_count']
+            day['revenue'] += row['order_revenue']
+
+        for (bucket, status), totals in daily.items():
+            statuses.append(OrderStatusRollup(
+                granularity='day',
+                bucket=bucket,
+                status=status,
+                **totals
+            ))
+        OrderStatusRollup.objects.bulk_create(statuses, batch_size=1000)
+
+    return len(sales), len(statuses)
+
+
+def backfill(chunk_days=7, progress=None):
+    """
+    Rebuild all rollups from the full order history, `chunk_days` at a time
+    Each chunk is its own transaction, so a long backfill never holds
+    locks on the whole history.
+    """
+    bounds = Order.objects.aggregate(
+        first=Min('created_at'),
+        last=Max('created_at'),
+        watermark=Max('updated_at')
+    )
+    archived = ArchivedOrder.objects.aggregate(
+        first=Min('created_at'),
+        last=Max('created_at')
+    )
+    firsts = [value for value in (bounds['first'], archived['first']) if value]
+    lasts = [value for value in (bounds['last'], archived['last']) if value]
+    if not firsts:
+        return 0
+
+    start = _local_midnight(min(firsts))
+    end = _local_midnight(max(lasts)) + timedelta(days=1)
+    chunks = 0
+    while start < end:
+        chunk_end = min(start + timedelta(days=chunk_days), end)
+        counts = rebuild_range(start, chunk_end)
+        chunks += 1
+        if progress:
+            progress(start, chunk_end, *counts)
+        start = chunk_end
+
+    RollupCheckpoint.objects.update_or_create(
+        name=CHECKPOINT_NAME,
+        defaults={'value': bounds['watermark']}
+    )
+    return chunks
+
+
+def refresh(progress=None):
+    """
+    Fold orders created or changed since the last run into the rollups
+    Only the days those orders were placed on are recomputed.
+
+    Returns:
+        Number of days recomputed
+    """
+    checkpoint = RollupCheckpoint.objects.filter(name=CHECKPOINT_NAME).first()
+    if checkpoint is None or checkpoint.value is None:
+        backfill(progress=progress)
+        return None
+
+    changed = Order.objects.filter(
+        updated_at__gt=checkpoint.value - CHECKPOINT_OVERLAP
+    )
+    watermark = changed.aggregate(watermark=Max('updated_at'))['watermark']
+    if watermark is None:
+        return 0
+
+    tz = timezone.get_current_timezone()
+    days = sorted(set(
+        changed.filter(
+            updated_at__lte=watermark
+        ).annotate(
+            day=TruncDate('created_at', tzinfo=tz)
+        ).order_by().values_list('day', flat=True)
+    ))
+    for day in days:
+        start = _local_midnight(day)
+        counts = rebuild_range(start, start + timedelta(days=1))
+        if progress:
+            progress(start, start + timedelta(days=1), *counts)
+
+    checkpoint.value = max(checkpoint.value, watermark)
+    checkpoint.save(update_fields=['value'])
+    return len(days)
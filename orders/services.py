@@ -0,0 +1,124 @@
+"""
+Order Services
+Checkout write path kept out of the views
+Architecture: every statement runs inside one transaction; stock is decremented
+with a single conditional UPDATE so concurrent checkouts cannot oversell.
+"""
+from django.db import transaction
+from django.db.models import Case, F, PositiveIntegerField, Q, When
+from cart import reservations
+from products import inventory
+from products.models import Product
+from .models import OrderItem
+from .outbox import enqueue_order_placed
+
+
+class InsufficientStock(Exception):
+    """Raised when a cart line asks for more than is left in stock"""
+
+    def __init__(self, product_id, product_name, requested, available):
+        self.product_id = product_id
+        self.product_name = product_name
+        self.requested = requested
+        self.available = available
+        super().__init__(
+            f'Sorry, only {available} of {product_name} left in stock '
+            f'(you asked for {requested}).'
+        )
+
+
+def decrement_stock(quantities, holder=None):
+    """
+    Take stock for several products in one UPDATE ... CASE statement
+    The WHERE clause only matches rows that still have enough stock once
+    other shoppers' active holds are set aside, so the database does the
+    check and the write atomically; no row is read first.
+
+    Args:
+        quantities: dict of {product_id: quantity}
+        holder: the buyer's reservation holder; their own holds don't count against them
+
+    Raises:
+        InsufficientStock for the first short line; the caller's transaction
+        must be rolled back (nothing is applied partially by the caller).
+    """
+    if not quantities:
+        return
+
+    held = reservations.held_by_others(holder)
+    enough = Q()
+    for product_id, quantity in quantities.items():
+        enough |= Q(id=product_id, stock_quantity__gte=held + quantity)
+
+    updated = Product.objects.filter(enough).update(
+        stock_quantity=Case(
+            *[
+                When(id=product_id, then=F('stock_quantity') - quantity)
+                for product_id, quantity in quantities.items()
+            ],
+            default=F('stock_quantity'),
+            output_field=PositiveIntegerField()
+        )
+    )
+    if updated == len(quantities):
+        return
+
+    # Some line was short; one more query to say which
+    current = {
+        product_id: (name, max(stock - others, 0))
+        for product_id, name, stock, others in Product.objects.filter(
+            id__in=quantities
+        ).annotate(
+            others=reservations.held_by_others(holder)
+        ).values_list('id', 'name', 'stock_quantity', 'others')
+    }
+    for product_id, quantity in quantities.items():
+        name, stock = current.get(product_id, ('this product', 0))
+        if stock < quantity:
+            raise InsufficientStock(product_id, name, quantity, stock)
+    # Stock moved again under a concurrent checkout; report the first line
+    product_id, quantity = next(iter(quantities.items()))
+    name, stock = current.get(product_id, ('this product', 0))
+    raise InsufficientStock(product_id, name, quantity, stock)
+
+
+@transaction.atomic
+def place_order(order, items, holder=None):
+    """
+    Persist an order built from the cart
+    - Stock for all lines: one conditional UPDATE
+    - Order row: one INSERT
+    - Order items: one bulk INSERT
+    - Stock ledger: one bulk INSERT of sale movements
+    - Follow-up work (emails, alerts, cache invalidation): one outbox INSERT
+
+    Args:
+        order: unsaved Order with customer details and totals set
+        items: cart items as yielded by Cart (already loaded by the caller)
+        holder: the cart's reservation holder, whose holds this order consumes
+
+    Raises:
+        InsufficientStock if any line cannot be fulfilled; nothing is saved.
+    """
+    lines = [item for item in items if 'product' in item]
+    decrement_stock({item['product'].id: item['quantity'] for item in lines}, holder=holder)
+
+    order.save()
+    OrderItem.objects.bulk_create([
+        OrderItem(
+            order=order,
+            product_id=item['product'].id,
+            product_name=item['product'].name,
+            product_slug=item['product'].slug,
+            price=item['price'],
+            quantity=item['quantity']
+        )
+        for item in lines
+    ])
+    inventory.record(
+        'sale',
+        {item['product'].id: -item['quantity'] for item in lines},
+        reference=order.order_number
+    )
+    enqueue_order_placed(order, [item['product'].id for item in lines])
+    return order
@@ -0,0 +1,32 @@
+"""
+Order Signals
+Recompile the in-memory tax and shipping tables when a rule changes, and
+drop a customer's cached dashboard when one of their orders or order lines
+is saved or deleted
+"""
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from . import dashboard, rates
+from .models import Order, OrderItem, ShippingRate, TaxRate
+
+
+@receiver([post_save, post_delete], sender=TaxRate)
+@receiver([post_save, post_delete], sender=ShippingRate)
+def invalidate_rates(sender, **kwargs):
+    """Rate rules changed; this process rebuilds its table on next use, others within RATE_TABLE_MAX_AGE"""
+    rates.invalidate()
+
+
+@receiver([post_save, post_delete], sender=Order)
+def invalidate_dashboard(sender, instance, **kwargs):
+    """Bulk updates (transitions) invalidate explicitly; deletes of any kind land here"""
+    dashboard.invalidate([instance.user_id])
+
+
+@receiver([post_save, post_delete], sender=OrderItem)
+def invalidate_dashboard_for_item(sender, instance, origin=None, **kwargs):
+    """Line edits change the recent orders' item counts"""
+    # Lines deleted along with their order are covered by the order's signal
+    if isinstance(origin, Order) or getattr(origin, 'model', None) is Order:
+        return
+    dashboard.invalidate([instance.order.user_id])
@@ -0,0 +1,266 @@
+"""
+Order Tests
+Checkout stock decrements against other shoppers' reservations, the
+outbox worker, the compiled rate table, carrier tracking imports and the
+cached account dashboard
+"""
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import IntegrityError
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from cart import reservations
+from cart.models import StockReservation
+from products.models import Category, Product
+from . import carrier, dashboard, outbox, rates
+from .models import Order, OrderItem, OrderStatusHistory, OutboxEvent, TaxRate
+from .services import InsufficientStock, decrement_stock
+
+
+class DecrementStockReservationTests(TestCase):
+    """Stock held by someone else's live reservation cannot be bought"""
+
+    def setUp(self):
+        category = Category.objects.create(name='Shirts', slug='shirts')
+        self.product = Product.objects.create(
+            category=category,
+            name='Shirt',
+            slug='shirt',
+            description='Shirt',
+            price=Decimal('10.00'),
+            stock_quantity=5
+        )
+
+    def _hold(self, holder, quantity, expired=False):
+        now = timezone.now()
+        StockReservation.objects.create(
+            product=self.product,
+            holder=holder,
+            quantity=quantity,
+            expires_at=now - timedelta(minutes=1) if expired else now + timedelta(minutes=15)
+        )
+
+    def _stock(self):
+        self.product.refresh_from_db()
+        return self.product.stock_quantity
+
+    def test_expired_hold_does_not_beat_live_holds(self):
+        self._hold('session:a', 3)
+        self._hold('session:b', 2, expired=True)
+        self._hold('session:c', 2)
+
+        with self.assertRaises(InsufficientStock) as raised:
+            decrement_stock({self.product.id: 2}, holder='session:b')
+        self.assertEqual(raised.exception.available, 0)
+        self.assertEqual(self._stock(), 5)
+
+        # C's live hold still protects C's checkout
+        decrement_stock({self.product.id: 2}, holder='session:c')
+        self.assertEqual(self._stock(), 3)
+
+    def test_competing_active_hold_limits_other_buyers(self):
+        self._hold('user:1', 4)
+
+        with self.assertRaises(InsufficientStock):
+            decrement_stock({self.product.id: 2}, holder='session:other')
+        with self.assertRaises(InsufficientStock):
+            decrement_stock({self.product.id: 2})
+        self.assertEqual(self._stock(), 5)
+
+        decrement_stock({self.product.id: 1}, holder='session:other')
+        self.assertEqual(self._stock(), 4)
+
+        # The holder's own reservation is theirs to buy
+        decrement_stock({self.product.id: 4}, holder='user:1')
+        self.assertEqual(self._stock(), 0)
+
+    def test_refresh_retakes_lapsed_hold_only_up_to_free_stock(self):
+        self._hold('session:a', 3)
+        self._hold('session:b', 4, expired=True)
+
+        reservations.refresh('session:b', {self.product.id: 4})
+        hold = StockReservation.objects.get(holder='session:b')
+        self.assertEqual(hold.quantity, 2)
+        self.assertGreater(hold.expires_at, timezone.now())
+
+
+class ProcessBatchTests(TestCase):
+    """One failing handler must not take the rest of the batch down with it"""
+
+    def test_failed_handler_rolls_back_only_its_own_writes(self):
+        def failing(payload):
+            outbox.enqueue('side.effect', {})
+            raise IntegrityError('duplicate key')
+
+        handled = []
+        outbox.enqueue('test.fails', {})
+        outbox.enqueue('test.works', {'n': 1})
+
+        with mock.patch.dict(outbox.HANDLERS, {
+            'test.fails': failing,
+            'test.works': handled.append,
+        }):
+            self.assertEqual(outbox.process_batch(), (1, 1))
+
+        self.assertEqual(handled, [{'n': 1}])
+        self.assertFalse(OutboxEvent.objects.filter(topic='side.effect').exists())
+        failed = OutboxEvent.objects.get(topic='test.fails')
+        self.assertEqual(failed.status, 'pending')
+        self.assertEqual(failed.attempts, 1)
+        self.assertIn('IntegrityError', failed.last_error)
+        self.assertEqual(OutboxEvent.objects.get(topic='test.works').status, 'done')
+
+
+class RateTableVersionTests(TestCase):
+    """Rule changes reach every process through the database, not a cache"""
+
+    def setUp(self):
+        self.rule = TaxRate.objects.create(country='Nepal', rate=Decimal('13.00'))
+        rates.invalidate()
+
+    def test_other_process_sees_saved_rule(self):
+        self.assertEqual(rates.get_rate_table().tax_rate('Nepal'), Decimal('13.00'))
+
+        # Saved by another worker: this process gets no local invalidation
+        self.rule.rate = Decimal('15.00')
+        with mock.patch.object(rates, 'invalidate'):
+            self.rule.save()
+
+        with override_settings(RATE_TABLE_MAX_AGE=0):
+            self.assertEqual(rates.get_rate_table().tax_rate('Nepal'), Decimal('15.00'))
+
+    def test_deleted_rule_changes_version(self):
+        before = rates.rules_version()
+        with mock.patch.object(rates, 'invalidate'):
+            self.rule.delete()
+        self.assertNotEqual(rates.rules_version(), before)
+
+    def test_table_is_reused_within_max_age(self):
+        table = rates.get_rate_table()
+        with self.assertNumQueries(0):
+            self.assertIs(rates.get_rate_table(), table)
+
+
+class CarrierImportTests(TestCase):
+    """Bad rows are rejected before any order changes status"""
+
+    def _order(self, status):
+        return Order.objects.create(
+            first_name='A',
+            last_name='B',
+            email='a@example.com',
+            phone='1',
+            address_line1='Street',
+            city='Kathmandu',
+            state_province='Bagmati',
+            postal_code='44600',
+            subtotal=Decimal('10.00'),
+            total=Decimal('10.00'),
+            status=status
+        )
+
+    def _row(self, order, tracking, status='shipped', carrier_name=''):
+        return {
+            'order_number': str(order.order_number),
+            'tracking_number': tracking,
+            'status': status,
+            'carrier': carrier_name,
+        }
+
+    def test_rejects_missing_and_overlong_values_without_moving_orders(self):
+        orders = [self._order('processing') for _ in range(3)]
+
+        updated, rejects = carrier.apply_chunk([
+            (2, self._row(orders[0], '')),
+            (3, self._row(orders[1], 'X' * 101)),
+            (4, self._row(orders[2], 'TRK1', carrier_name='C' * 51)),
+        ])
+
+        self.assertEqual(updated, 0)
+        self.assertEqual([reason for _, _, reason in rejects], [
+            'missing tracking number',
+            'tracking number too long',
+            'carrier name too long',
+        ])
+        self.assertEqual(
+            set(Order.objects.values_list('status', flat=True)), {'processing'}
+        )
+        self.assertFalse(OrderStatusHistory.objects.exists())
+
+    def test_delivered_rows_move_through_shipped(self):
+        processing, shipped = self._order('processing'), self._order('shipped')
+
+        updated, rejects = carrier.apply_chunk([
+            (2, self._row(processing, 'TRK1', status='delivered')),
+            (3, self._row(shipped, 'TRK2', status='delivered', carrier_name='Nepal Post')),
+        ], carrier='Default Post')
+
+        self.assertEqual((updated, rejects), (2, []))
+        processing.refresh_from_db()
+        shipped.refresh_from_db()
+        self.assertEqual(
+            (processing.status, processing.tracking_number, processing.carrier),
+            ('delivered', 'TRK1', 'Default Post')
+        )
+        self.assertEqual(
+            (shipped.status, shipped.tracking_number, shipped.carrier),
+            ('delivered', 'TRK2', 'Nepal Post')
+        )
+        self.assertEqual(
+            list(OrderStatusHistory.objects.filter(order=processing).order_by('id').values_list(
+                'from_status', 'to_status'
+            )),
+            [('processing', 'shipped'), ('shipped', 'delivered')]
+        )
+
+
+class DashboardInvalidationTests(TestCase):
+    """Deleting orders and editing their lines drops the cached summary"""
+
+    def setUp(self):
+        self.user = User.objects.create_user('shopper', 'shopper@example.com')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.order = Order.objects.create(
+                user=self.user,
+                first_name='A',
+                last_name='B',
+                email='shopper@example.com',
+                phone='1',
+                address_line1='Street',
+                city='Kathmandu',
+                state_province='Bagmati',
+                postal_code='44600',
+                subtotal=Decimal('20.00'),
+                total=Decimal('20.00')
+            )
+            self.item = OrderItem.objects.create(
+                order=self.order,
+                product_id=1,
+                product_name='Shirt',
+                price=Decimal('10.00'),
+                quantity=2
+            )
+        self.assertEqual(dashboard.get_summary(self.user.pk)['recent_orders'][0]['unit_count'], 2)
+
+    def _cached(self):
+        return cache.get(dashboard.cache_key(self.user.pk))
+
+    def test_line_edit_and_delete_invalidate(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.item.quantity = 3
+            self.item.save()
+        self.assertIsNone(self._cached())
+        self.assertEqual(dashboard.get_summary(self.user.pk)['recent_orders'][0]['unit_count'], 3)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.item.delete()
+        self.assertIsNone(self._cached())
+
+    def test_order_delete_invalidates(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Order.objects.filter(pk=self.order.pk).delete()
+        self.assertIsNone(self._cached())
+        self.assertEqual(dashboard.get_summary(self.user.pk)['recent_orders'], [])
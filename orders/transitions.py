@@ -0,0 +1,151 @@
+"""
+Order Status Transitions
+The one write path for order status changes (admin, API, carrier imports)
+Architecture: orders are locked and grouped by current status, each allowed
+source status is moved with one guarded UPDATE, and the audit trail is
+written with one bulk INSERT per batch.
+"""
+from django.db import transaction
+from django.db.models import Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from . import dashboard
+from .models import Order, OrderStatusHistory
+
+# Allowed moves; delivered and cancelled are final
+TRANSITIONS = {
+    'pending': ('processing', 'cancelled'),
+    'processing': ('shipped', 'cancelled'),
+    'shipped': ('delivered',),
+    'delivered': (),
+    'cancelled': (),
+}
+
+# Timestamp stamped on the order when it enters a status
+STATUS_TIMESTAMPS = {
+    'shipped': 'shipped_at',
+    'delivered': 'delivered_at',
+}
+
+BATCH_SIZE = 1000
+
+
+def can_transition(from_status, to_status):
+    return to_status in TRANSITIONS.get(from_status, ())
+
+
+def _ids(orders):
+    """Primary keys from a queryset or an iterable of pks"""
+    if hasattr(orders, 'values_list'):
+        return list(orders.values_list('pk', flat=True))
+    return list(orders)
+
+
+def transition(orders, to_status, source, user=None, note='', paid=False):
+    """
+    Move orders to `to_status` wherever the state machine allows it
+    Per batch: one locked read, one guarded UPDATE per source status and
+    one bulk INSERT of history rows.
+
+    Args:
+        orders: Order queryset or iterable of order pks
+        to_status: target status
+        source: one of OrderStatusHistory.SOURCE_CHOICES
+        paid: also mark the orders paid (paid_at is kept if already set)
+
+    Returns:
+        (moved, rejected): list of moved pks, and dict of {pk: current status}
+        for orders the state machine refused (None for unknown pks)
+    """
+    if to_status not in TRANSITIONS:
+        raise ValueError(f'Unknown order status {to_status!r}')
+
+    ids = _ids(orders)
+    moved, rejected = [], {}
+    for start in range(0, len(ids), BATCH_SIZE):
+        batch = ids[start:start + BATCH_SIZE]
+        with transaction.atomic():
+            current = {
+                pk: (status, user_id)
+                for pk, status, user_id in Order.objects.select_for_update().filter(
+                    pk__in=batch
+                ).values_list('pk', 'status', 'user_id')
+            }
+            by_status, user_ids = {}, set()
+            for pk in batch:
+                status, user_id = current.get(pk, (None, None))
+                if status is not None and can_transition(status, to_status):
+                    by_status.setdefault(status, []).append(pk)
+                    user_ids.add(user_id)
+                else:
+                    rejected[pk] = status
+
+            now = timezone.now()
+            fields = {'status': to_status, 'updated_at': now}
+            if to_status in STATUS_TIMESTAMPS:
+                fields[STATUS_TIMESTAMPS[to_status]] = now
+            if paid:
+                fields['is_paid'] = True
+                fields['paid_at'] = Coalesce('paid_at', Value(now))
+
+            history = []
+            for from_status, pks in by_status.items():
+                # The status guard keeps the UPDATE safe even without the lock
+                Order.objects.filter(pk__in=pks, status=from_status).update(**fields)
+                history.extend(
+                    OrderStatusHistory(
+                        order_id=pk,
+                        from_status=from_status,
+                        to_status=to_status,
+                        source=source,
+                        changed_by=user,
+                        note=note
+                    )
+                    for pk in pks
+                )
+                moved.extend(pks)
+            OrderStatusHistory.objects.bulk_create(history)
+            dashboard.invalidate(user_ids)
+    return moved, rejected
+
+
+def mark_paid(orders, source, user=None, note='Payment received'):
+    """
+    Record payment for unpaid, uncancelled orders
+    One guarded UPDATE per batch; the status is unchanged, so each history
+    row has the same from and to status.
+
+    Returns:
+        List of pks that were marked paid
+    """
+    ids = _ids(orders)
+    paid = []
+    for start in range(0, len(ids), BATCH_SIZE):
+        batch = ids[start:start + BATCH_SIZE]
+        with transaction.atomic():
+            unpaid = list(
+                Order.objects.select_for_update().filter(
+                    pk__in=batch,
+                    is_paid=False
+                ).exclude(status='cancelled').values_list('pk', 'status')
+            )
+            if not unpaid:
+                continue
+            now = timezone.now()
+            Order.objects.filter(
+                pk__in=[pk for pk, _ in unpaid],
+                is_paid=False
+            ).update(is_paid=True, paid_at=now, updated_at=now)
+            OrderStatusHistory.objects.bulk_create([
+                OrderStatusHistory(
+                    order_id=pk,
+                    from_status=status,
+                    to_status=status,
+                    source=source,
+                    changed_by=user,
+                    note=note
+                )
+                for pk, status in unpaid
+            ])
+            paid.extend(pk for pk, _ in unpaid)
+    return paid
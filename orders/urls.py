@@ -18,4 +18,7 @@ urlpatterns = [
     
     # Individual order details
     path('<uuid:order_number>/', views.order_detail, name='detail'),
+    
+    # Staff API: bulk status changes through the order state machine
+    path('api/status/', views.api_order_status, name='api_status'),
 ]
@@ -2,13 +2,35 @@
 Order Views
 Checkout process and order management
 """
+import json
+import uuid
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import datetime
+from django.http import Http404, JsonResponse
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.db import transaction
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.views.decorators.http import require_POST
 from cart.cart import Cart
-from .models import Order, OrderItem
+from .models import Order
+from .archive import find_order
 from .forms import OrderCreateForm
+from .rates import quote_cart
+from .services import InsufficientStock, place_order
+from .transitions import TRANSITIONS, transition
+
+
+def _replayed_order_number(token):
+    """Order number already created for this checkout token, if any"""
+    try:
+        token = uuid.UUID(str(token))
+    except ValueError:
+        return None
+    return Order.objects.filter(
+        checkout_token=token
+    ).values_list('order_number', flat=True).first()
 
 
 def checkout(request):
@@ -16,52 +38,74 @@ def checkout(request):
     Checkout page
     Creates order from cart contents
     """
+    if request.method == 'POST':
+        # A double-click or retried POST goes straight to the order it already created
+        order_number = _replayed_order_number(request.POST.get('checkout_token'))
+        if order_number is not None:
+            return redirect('orders:confirmation', order_number=order_number)
+    
     cart = Cart(request)
     
     if len(cart) == 0:
         messages.warning(request, 'Your cart is empty.')
         return redirect('products:list')
     
+    # Catch price/stock changes since the items were added (one fresh query)
+    cart_changes = cart.revalidate()
+    for change in cart_changes:
+        messages.warning(request, change['message'])
+    if cart_changes and len(cart) == 0:
+        return redirect('cart:detail')
+    cart.refresh_holds()
+    
+    # Products are loaded once and shared by the quote, the order and the page
+    items = cart.get_items()
+    subtotal = cart.get_total_price()
+    quote = quote_cart(items, subtotal)
+    
     if request.method == 'POST':
         form = OrderCreateForm(request.POST)
         
-        if form.is_valid():
-            # Create order with transaction to ensure data consistency
-            with transaction.atomic():
-                # Create order
-                order = form.save(commit=False)
-                
-                # Link to user if authenticated
-                if request.user.is_authenticated:
-                    order.user = request.user
-                
-                # Calculate totals
-                order.subtotal = cart.get_total_price()
-                order.tax = 0  # Add tax calculation if needed
-                order.shipping_cost = 0  # Add shipping calculation if needed
-                order.total = order.subtotal + order.tax + order.shipping_cost
-                
-                order.save()
-                
-                # Create order items from cart
-                for item in cart:
-                    OrderItem.objects.create(
-                        order=order,
-                        product_id=item['product'].id,
-                        product_name=item['product'].name,
-                        product_slug=item['product'].slug,
-                        price=item['price'],
-                        quantity=item['quantity']
-                    )
-                    
-                    # Reduce stock (optional, can be done on payment confirmation)
-                    product = item['product']
-                    product.stock_quantity -= item['quantity']
-                    product.save()
-                
-                # Clear the cart
-                cart.clear()
-                
+        if cart_changes:
+            # Let the customer review the updated totals before placing the order
+            messages.error(request, 'Your cart was updated. Please review your order.')
+        elif form.is_valid():
+            order = form.save(commit=False)
+            order.checkout_token = form.cleaned_data['checkout_token']
+            
+            # Link to user if authenticated
+            if request.user.is_authenticated:
+                order.user = request.user
+            
+            # Calculate totals (compiled rate tables, no queries)
+            quote = quote_cart(
+                items,
+                subtotal,
+                country=order.country,
+                state_province=order.state_province,
+                postal_code=order.postal_code
+            )
+            order.subtotal = subtotal
+            order.tax = quote['tax']
+            order.shipping_cost = quote['shipping_cost']
+            order.total = order.subtotal + order.tax + order.shipping_cost
+            
+            try:
+                # Order, items, stock and cart cleanup commit or roll back together
+                with transaction.atomic():
+                    place_order(order, items, holder=cart.holder)
+                    # Clearing the cart also releases its stock holds,
+                    # which the stock decrement has now replaced
+                    cart.clear()
+            except InsufficientStock as exc:
+                messages.error(request, str(exc))
+            except IntegrityError:
+                # A concurrent submission with the same token won the race
+                order_number = _replayed_order_number(order.checkout_token)
+                if order_number is None:
+                    raise
+                return redirect('orders:confirmation', order_number=order_number)
+            else:
                 # Redirect to order confirmation
                 return redirect('orders:confirmation', order_number=order.order_number)
         else:
@@ -75,11 +119,16 @@ def checkout(request):
                 'first_name': request.user.first_name,
                 'last_name': request.user.last_name,
             }
+        initial_data['checkout_token'] = uuid.uuid4()
         form = OrderCreateForm(initial=initial_data)
     
     return render(request, 'orders/checkout.html', {
         'form': form,
-        'cart': cart
+        'cart': cart,
+        'items': items,
+        'quote': quote,
+        'total': subtotal + quote['tax'] + quote['shipping_cost'],
+        'cart_changes': cart_changes
     })
 
 
@@ -99,18 +148,52 @@ def order_confirmation(request, order_number):
     })
 
 
+ORDERS_PER_PAGE = 10
+
+
+def _encode_cursor(order):
+    """Opaque keyset cursor for the position just after `order`"""
+    raw = f'{order.created_at.isoformat()}|{order.pk}'
+    return urlsafe_b64encode(raw.encode()).decode()
+
+
+def _decode_cursor(cursor):
+    """(created_at, pk) from a cursor; None if missing or malformed"""
+    try:
+        created_at, pk = urlsafe_b64decode(cursor.encode()).decode().split('|')
+        return datetime.fromisoformat(created_at), int(pk)
+    except (AttributeError, ValueError, UnicodeDecodeError):
+        return None
+
+
 @login_required
 def order_list(request):
     """
     User's order history
     Requires authentication
+    Keyset pagination on (user, -created_at), served by the matching index;
+    items are fetched only for the orders on the page.
     """
     orders = Order.objects.filter(
         user=request.user
-    ).prefetch_related('items').order_by('-created_at')
+    ).with_totals().order_by('-created_at', '-pk')
+    
+    position = _decode_cursor(request.GET.get('after', ''))
+    if position is not None:
+        created_at, pk = position
+        orders = orders.filter(
+            Q(created_at__lt=created_at) | Q(created_at=created_at, pk__lt=pk)
+        )
+    
+    # One extra row tells us whether there is a next page
+    page = list(orders.prefetch_related('items')[:ORDERS_PER_PAGE + 1])
+    has_next = len(page) > ORDERS_PER_PAGE
+    page = page[:ORDERS_PER_PAGE]
     
     return render(request, 'orders/order_list.html', {
-        'orders': orders
+        'orders': page,
+        'next_cursor': _encode_cursor(page[-1]) if has_next else None,
+        'is_first_page': position is None,
     })
 
 
@@ -120,12 +203,51 @@ def order_detail(request, order_number):
     Individual order details
     Only accessible to order owner
     """
-    order = get_object_or_404(
-        Order,
-        order_number=order_number,
-        user=request.user
-    )
+    # Old orders may have been moved to the archive
+    order, items = find_order(order_number, user=request.user)
+    if order is None:
+        raise Http404('Order not found')
     
     return render(request, 'orders/order_detail.html', {
-        'order': order
+        'order': order,
+        'items': items
+    })
+
+
+@require_POST
+def api_order_status(request):
+    """
+    Change the status of several orders (staff only)
+    Body: {"status": "shipped", "order_numbers": ["<uuid>", ...], "paid": false, "note": ""}
+    Goes through the order state machine; orders whose current status does
+    not allow the change are reported back, not modified.
+    """
+    if not request.user.has_perm('orders.change_order'):
+        return JsonResponse({'error': 'Permission denied.'}, status=403)
+
+    try:
+        payload = json.loads(request.body)
+        status = payload['status']
+        order_numbers = {str(uuid.UUID(str(number))) for number in payload['order_numbers']}
+        paid = bool(payload.get('paid', False))
+        note = str(payload.get('note', ''))[:255]
+    except (ValueError, KeyError, TypeError):
+        return JsonResponse({'error': 'Invalid request body.'}, status=400)
+    if status not in TRANSITIONS:
+        return JsonResponse({'error': f'Unknown status {status!r}.'}, status=400)
+
+    pks = {
+        str(number): pk
+        for number, pk in Order.objects.filter(
+            order_number__in=order_numbers
+        ).values_list('order_number', 'pk')
+    }
+    moved, rejected = transition(
+        pks.values(), status, source='api', user=request.user, note=note, paid=paid
+    )
+    numbers = {pk: number for number, pk in pks.items()}
+    return JsonResponse({
+        'moved': sorted(numbers[pk] for pk in moved),
+        'rejected': {numbers[pk]: current for pk, current in rejected.items()},
+        'missing': sorted(order_numbers - set(pks)),
     })
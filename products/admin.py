@@ -3,8 +3,26 @@ Admin Interface for Products
 Enhanced admin with inline image management
 """
 from django.contrib import admin
+from django.contrib.admin.helpers import ACTION_CHECKBOX_NAME
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce, Greatest
+from django.http import JsonResponse
+from django.template.response import TemplateResponse
+from django.urls import path, reverse
 from django.utils.html import format_html
-from .models import Category, Product, ProductImage
+from config.pagination import EstimatedCountPaginator
+from . import bulk_edit, inventory, low_stock
+from .forms import BulkEditForm
+from .models import (
+    BulkEditJob,
+    Category,
+    LowStockEntry,
+    Product,
+    ProductImage,
+    StockMovement,
+    StockSnapshot,
+)
 
 
 class ProductImageInline(admin.TabularInline):
@@ -48,9 +66,16 @@ class CategoryAdmin(admin.ModelAdmin):
         }),
     )
     
+    def get_queryset(self, request):
+        """Active product counts come with the list query, not one query per row"""
+        return super().get_queryset(request).annotate(
+            active_product_total=Count('products', filter=Q(products__is_active=True))
+        )
+    
     def product_count(self, obj):
-        return obj.products.filter(is_active=True).count()
+        return obj.active_product_total
     product_count.short_description = 'Active Products'
+    product_count.admin_order_field = 'active_product_total'
 
 
 @admin.register(Product)
@@ -77,6 +102,10 @@ class ProductAdmin(admin.ModelAdmin):
     prepopulated_fields = {'slug': ('name',)}
     readonly_fields = ['created_at', 'updated_at']
     inlines = [ProductImageInline]
+    list_select_related = ['category']
+    date_hierarchy = 'created_at'
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     
     fieldsets = (
         ('Basic Information', {
@@ -92,7 +121,13 @@ class ProductAdmin(admin.ModelAdmin):
             )
         }),
         ('Pricing & Inventory', {
-            'fields': ('price', 'compare_at_price', 'stock_quantity')
+            'fields': (
+                'price',
+                'compare_at_price',
+                'stock_quantity',
+                'low_stock_threshold',
+                'weight_grams'
+            )
         }),
         ('Product Flags', {
             'fields': (
@@ -113,8 +148,20 @@ class ProductAdmin(admin.ModelAdmin):
         }),
     )
     
+    def get_queryset(self, request):
+        """
+        Image counts from a correlated subquery, evaluated only for the rows
+        on the page and dropped from the changelist COUNT
+        """
+        images = ProductImage.objects.filter(
+            product=OuterRef('pk')
+        ).order_by().values('product').annotate(total=Count('pk')).values('total')
+        return super().get_queryset(request).annotate(
+            image_total=Coalesce(Subquery(images), 0)
+        )
+    
     def image_count(self, obj):
-        count = obj.images.count()
+        count = obj.image_total
         return format_html(
             '<span style="color: {};">{} image{}</span>',
             'green' if count > 0 else 'red',
@@ -122,8 +169,23 @@ class ProductAdmin(admin.ModelAdmin):
             's' if count != 1 else ''
         )
     image_count.short_description = 'Images'
+    image_count.admin_order_field = 'image_total'
     
-    actions = ['mark_as_featured', 'mark_as_not_featured', 'mark_out_of_stock']
+    def save_model(self, request, obj, form, change):
+        """Record manual stock edits in the ledger and the low-stock index"""
+        with transaction.atomic():
+            super().save_model(request, obj, form, change)
+            if 'stock_quantity' in form.changed_data:
+                previous = (form.initial.get('stock_quantity') or 0) if change else 0
+                inventory.record(
+                    'adjustment',
+                    {obj.pk: obj.stock_quantity - previous},
+                    note=f'Edited in admin by {request.user}'
+                )
+            if {'stock_quantity', 'low_stock_threshold', 'is_active'} & set(form.changed_data):
+                low_stock.refresh([obj.pk])
+    
+    actions = ['mark_as_featured', 'mark_as_not_featured', 'mark_out_of_stock', 'bulk_edit']
     
     def mark_as_featured(self, request, queryset):
         updated = queryset.update(is_featured=True)
@@ -136,9 +198,50 @@ class ProductAdmin(admin.ModelAdmin):
     mark_as_not_featured.short_description = 'Remove from featured'
     
     def mark_out_of_stock(self, request, queryset):
-        updated = queryset.update(stock_quantity=0)
+        with transaction.atomic():
+            written_off = dict(
+                queryset.select_for_update().filter(stock_quantity__gt=0).values_list('pk', 'stock_quantity')
+            )
+            updated = queryset.update(stock_quantity=0)
+            inventory.record(
+                'adjustment',
+                {pk: -stock for pk, stock in written_off.items()},
+                note=f'Marked out of stock by {request.user}'
+            )
+            low_stock.refresh(written_off)
         self.message_user(request, f'{updated} product(s) marked as out of stock.')
     mark_out_of_stock.short_description = 'Mark as out of stock'
+    
+    def bulk_edit(self, request, queryset):
+        """
+        Queue price, compare-at price and flag changes for the selection
+        The changes are applied in the background by run_bulk_edit_jobs.
+        """
+        form = BulkEditForm(request.POST if 'apply' in request.POST else None)
+        if form.is_valid():
+            job = bulk_edit.queue(
+                queryset.values_list('pk', flat=True),
+                form.get_changes(),
+                user=request.user,
+                chunk_size=form.cleaned_data['chunk_size']
+            )
+            self.message_user(request, format_html(
+                'Bulk edit of {} product(s) queued as <a href="{}">job #{}</a>.',
+                job.total,
+                reverse('admin:products_bulkeditjob_change', args=[job.pk]),
+                job.pk
+            ))
+            return None
+        return TemplateResponse(request, 'admin/products/product/bulk_edit.html', {
+            **self.admin_site.each_context(request),
+            'title': 'Bulk edit products',
+            'opts': self.model._meta,
+            'form': form,
+            'product_count': queryset.count(),
+            'selected': request.POST.getlist(ACTION_CHECKBOX_NAME),
+            'select_across': request.POST.get('select_across', '0'),
+        })
+    bulk_edit.short_description = 'Bulk edit prices and flags'
 
 
 @admin.register(ProductImage)
@@ -156,3 +259,156 @@ class ProductImageAdmin(admin.ModelAdmin):
             )
         return "No image"
     image_preview.short_description = 'Preview'
+
+
+@admin.register(StockMovement)
+class StockMovementAdmin(admin.ModelAdmin):
+    """The ledger is append-only: rows can be added but never edited or deleted"""
+    list_display = ['created_at', 'product', 'kind', 'quantity', 'reference', 'note']
+    list_filter = ['kind', 'created_at']
+    search_fields = ['product__name', 'reference']
+    raw_id_fields = ['product']
+    list_select_related = ['product']
+    date_hierarchy = 'created_at'
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    
+    def save_model(self, request, obj, form, change):
+        """A restock, return or adjustment entered here moves stock with it"""
+        with transaction.atomic():
+            super().save_model(request, obj, form, change)
+            if not change:
+                Product.objects.filter(pk=obj.product_id).update(
+                    stock_quantity=Greatest(F('stock_quantity') + obj.quantity, 0)
+                )
+                low_stock.refresh([obj.product_id])
+    
+    def get_readonly_fields(self, request, obj=None):
+        if obj is not None:
+            return ['product', 'kind', 'quantity', 'reference', 'note', 'created_at']
+        return []
+    
+    def has_change_permission(self, request, obj=None):
+        return obj is None
+    
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(StockSnapshot)
+class StockSnapshotAdmin(admin.ModelAdmin):
+    list_display = ['product', 'quantity', 'movement_id', 'taken_at']
+    search_fields = ['product__name']
+    list_select_related = ['product']
+    readonly_fields = ['product', 'quantity', 'movement_id', 'taken_at']
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(LowStockEntry)
+class LowStockEntryAdmin(admin.ModelAdmin):
+    """
+    Merchandising view of the low-stock index
+    Reads only the indexed rows; a JSON copy is served at low-stock.json.
+    """
+    list_display = [
+        'product',
+        'stock_quantity',
+        'threshold',
+        'sales_velocity',
+        'days_until_stockout',
+        'updated_at'
+    ]
+    list_select_related = ['product']
+    search_fields = ['product__name']
+    ordering = ['stock_quantity', 'days_until_stockout']
+    readonly_fields = list_display
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+    
+    def get_urls(self):
+        custom_urls = [
+            path(
+                'low-stock.json',
+                self.admin_site.admin_view(self.json_view),
+                name='products_lowstockentry_json'
+            ),
+        ]
+        return custom_urls + super().get_urls()
+    
+    def json_view(self, request):
+        """The whole index as JSON, most urgent first"""
+        entries = LowStockEntry.objects.select_related('product').order_by(
+            'stock_quantity', 'days_until_stockout'
+        )
+        return JsonResponse({
+            'products': [
+                {
+                    'product_id': entry.product_id,
+                    'name': entry.product.name,
+                    'slug': entry.product.slug,
+                    'stock_quantity': entry.stock_quantity,
+                    'threshold': entry.threshold,
+                    'sales_velocity': str(entry.sales_velocity),
+                    'days_until_stockout': (
+                        str(entry.days_until_stockout)
+                        if entry.days_until_stockout is not None else None
+                    ),
+                    'updated_at': entry.updated_at.isoformat(),
+                }
+                for entry in entries
+            ]
+        })
+
+
+@admin.register(BulkEditJob)
+class BulkEditJobAdmin(admin.ModelAdmin):
+    """Progress of queued and running bulk edits"""
+    list_display = ['id', 'status', 'progress_bar', 'created_by', 'created_at', 'finished_at']
+    list_filter = ['status']
+    list_select_related = ['created_by']
+    readonly_fields = [
+        'status',
+        'progress_bar',
+        'changes',
+        'chunk_size',
+        'total',
+        'processed',
+        'last_error',
+        'created_by',
+        'created_at',
+        'started_at',
+        'finished_at'
+    ]
+    exclude = ['product_ids']
+    
+    actions = ['requeue']
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def progress_bar(self, obj):
+        return format_html(
+            '<progress max="100" value="{}"></progress> {} / {} ({}%)',
+            obj.progress,
+            obj.processed,
+            obj.total,
+            obj.progress
+        )
+    progress_bar.short_description = 'Progress'
+    
+    def requeue(self, request, queryset):
+        updated = bulk_edit.requeue(queryset)
+        self.message_user(
+            request,
+            f'{updated} job(s) queued to resume. Done, queued and still-running jobs are left as they are.'
+        )
+    requeue.short_description = 'Resume selected failed or stalled jobs'
@@ -0,0 +1,167 @@
+"""
+Bulk Product Edits
+Queue and apply price and flag changes for many products
+Architecture: the admin only records a BulkEditJob; the worker applies it
+chunk by chunk with one UPDATE ... CASE each, reporting progress as it goes.
+"""
+from datetime import timedelta
+from decimal import ROUND_HALF_UP, Decimal
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Case, DecimalField, F, Q, Value, When
+from django.utils import timezone
+from . import low_stock
+from .cache import product_state_cache_key
+from .models import BulkEditJob, Product
+
+PRICE_ACTIONS = {
+    'percent': 'Change by percent',
+    'amount': 'Change by amount',
+    'set': 'Set to',
+}
+COMPARE_AT_ACTIONS = {
+    'previous': 'Set to the price before this change',
+    'clear': 'Clear',
+}
+FLAGS = ['is_active', 'is_featured', 'is_bestseller', 'is_new_arrival']
+
+CENT = Decimal('0.01')
+
+
+def queue(product_ids, changes, user=None, chunk_size=500):
+    """
+    Record a bulk edit for the worker to apply
+
+    Args:
+        product_ids: products to change
+        changes: dict with optional 'price_action' / 'price_value',
+            'compare_at_action' and 'flags' ({flag name: bool})
+    """
+    product_ids = sorted(product_ids)
+    return BulkEditJob.objects.create(
+        created_by=user,
+        product_ids=product_ids,
+        changes=changes,
+        chunk_size=chunk_size,
+        total=len(product_ids)
+    )
+
+
+def new_price(price, action, value):
+    """Price after a bulk change, rounded to cents and never below 0.01"""
+    value = Decimal(value)
+    if action == 'percent':
+        price = price * (1 + value / 100)
+    elif action == 'amount':
+        price = price + value
+    elif action == 'set':
+        price = value
+    return max(price.quantize(CENT, rounding=ROUND_HALF_UP), CENT)
+
+
+def apply_chunk(job, product_ids):
+    """
+    Apply the job's changes to one chunk of products
+    One locked read, one UPDATE ... CASE and the progress update commit
+    together; caches are invalidated once for the whole chunk afterwards.
+    """
+    changes = job.changes
+    price_action = changes.get('price_action')
+    compare_at_action = changes.get('compare_at_action')
+    flags = {name: value for name, value in changes.get('flags', {}).items() if name in FLAGS}
+
+    with transaction.atomic():
+        fields = {name: value for name, value in flags.items()}
+        if price_action or compare_at_action == 'previous':
+            rows = list(
+                Product.objects.select_for_update().filter(
+                    pk__in=product_ids
+                ).values_list('pk', 'price')
+            )
+            money = DecimalField(max_digits=10, decimal_places=2)
+            if price_action:
+                fields['price'] = Case(
+                    *[
+                        When(pk=pk, then=Value(new_price(price, price_action, changes['price_value'])))
+                        for pk, price in rows
+                    ],
+                    default=F('price'),
+                    output_field=money
+                )
+            if compare_at_action == 'previous':
+                fields['compare_at_price'] = Case(
+                    *[When(pk=pk, then=Value(price)) for pk, price in rows],
+                    default=F('compare_at_price'),
+                    output_field=money
+                )
+        if compare_at_action == 'clear':
+            fields['compare_at_price'] = None
+
+        if fields:
+            Product.objects.filter(pk__in=product_ids).update(
+                updated_at=timezone.now(),
+                **fields
+            )
+        job.processed += len(product_ids)
+        job.save(update_fields=['processed', 'updated_at'])
+
+    cache.delete_many([product_state_cache_key(pk) for pk in product_ids])
+    if 'is_active' in flags:
+        low_stock.refresh(product_ids)
+
+
+def claim_job():
+    """Mark the oldest queued job as running and return it (None if idle)"""
+    with transaction.atomic():
+        job = BulkEditJob.objects.select_for_update(skip_locked=True).filter(
+            status='queued'
+        ).order_by('id').first()
+        if job is None:
+            return None
+        job.status = 'running'
+        job.started_at = job.started_at or timezone.now()
+        job.save(update_fields=['status', 'started_at', 'updated_at'])
+    return job
+
+
+def requeue(jobs):
+    """
+    Queue jobs to resume where they stopped: failed ones, and running ones
+    whose worker has died. A running job's updated_at moves with every
+    chunk, so one left untouched for BULK_EDIT_STALE_AFTER seconds is no
+    longer being worked on; live jobs are left alone so no two workers
+    apply the same job.
+
+    Returns:
+        Number of jobs queued
+    """
+    stale = timezone.now() - timedelta(seconds=settings.BULK_EDIT_STALE_AFTER)
+    return jobs.filter(
+        Q(status='failed') | Q(status='running', updated_at__lt=stale)
+    ).update(status='queued')
+
+
+def run_job(job, progress=None):
+    """
+    Apply a claimed job chunk by chunk, resuming after job.processed
+
+    Args:
+        progress: optional callable(job) invoked after every chunk
+    """
+    try:
+        while job.processed < job.total:
+            apply_chunk(job, job.product_ids[job.processed:job.processed + job.chunk_size])
+            if progress is not None:
+                progress(job)
+    except Exception as exc:
+        job.status = 'failed'
+        job.last_error = f'{type(exc).__name__}: {exc}'
+        job.save(update_fields=['status', 'last_error', 'updated_at'])
+        return job
+
+    job.status = 'done'
+    job.last_error = ''
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'last_error', 'finished_at', 'updated_at'])
+    return job
@@ -0,0 +1,14 @@
+"""
+Product Cache Keys
+Per-product snapshot cached for cart revalidation and cart totals
+Architecture: lives in products so that stock and price writers here can
+invalidate it without depending on the cart app, which reads it.
+"""
+
+# Product fields in the snapshot cached for revalidation and the cart totals
+CATALOG_STATE_FIELDS = ['id', 'name', 'price', 'stock_quantity', 'is_active', 'weight_grams']
+
+
+def product_state_cache_key(product_id):
+    """Cache key for the price/stock/weight snapshot used by cart revalidation"""
+    return f'cart:catalog-state:{product_id}'
@@ -0,0 +1,74 @@
+"""
+Product Forms
+Admin forms for catalog maintenance
+"""
+from django import forms
+from .bulk_edit import COMPARE_AT_ACTIONS, FLAGS, PRICE_ACTIONS
+
+FLAG_CHOICES = [('', 'Leave unchanged'), ('1', 'Yes'), ('0', 'No')]
+
+
+def _flag_field():
+    """Yes / No / leave unchanged, cleaned to True, False or None"""
+    return forms.TypedChoiceField(
+        choices=FLAG_CHOICES,
+        coerce=lambda value: value == '1',
+        empty_value=None,
+        required=False
+    )
+
+
+class BulkEditForm(forms.Form):
+    """
+    Changes applied by a bulk edit job
+    Every field defaults to leaving the products as they are
+    """
+    price_action = forms.ChoiceField(
+        choices=[('', 'Leave unchanged')] + list(PRICE_ACTIONS.items()),
+        required=False
+    )
+    price_value = forms.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        required=False,
+        help_text='Percent (e.g. -20) or NPR amount'
+    )
+    compare_at_action = forms.ChoiceField(
+        label='Compare-at price',
+        choices=[('', 'Leave unchanged')] + list(COMPARE_AT_ACTIONS.items()),
+        required=False
+    )
+    is_active = _flag_field()
+    is_featured = _flag_field()
+    is_bestseller = _flag_field()
+    is_new_arrival = _flag_field()
+    chunk_size = forms.IntegerField(min_value=1, max_value=10000, initial=500)
+
+    def clean(self):
+        cleaned = super().clean()
+        if cleaned.get('price_action') and cleaned.get('price_value') is None:
+            self.add_error('price_value', 'Enter the price change.')
+        if cleaned.get('price_action') == 'set' and (cleaned.get('price_value') or 0) <= 0:
+            self.add_error('price_value', 'The new price must be positive.')
+        if not self.errors and not self.get_changes()['flags'] and not (
+            cleaned.get('price_action') or cleaned.get('compare_at_action')
+        ):
+            raise forms.ValidationError('Choose at least one change.')
+        return cleaned
+
+    def get_changes(self):
+        """Changes in the JSON shape stored on BulkEditJob"""
+        cleaned = self.cleaned_data
+        changes = {
+            'flags': {
+                name: cleaned[name]
+                for name in FLAGS
+                if cleaned.get(name) is not None
+            }
+        }
+        if cleaned.get('price_action'):
+            changes['price_action'] = cleaned['price_action']
+            changes['price_value'] = str(cleaned['price_value'])
+        if cleaned.get('compare_at_action'):
+            changes['compare_at_action'] = cleaned['compare_at_action']
+        return changes
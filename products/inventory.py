@@ -0,0 +1,172 @@
+"""
+Inventory Ledger
+Append-only stock movements with periodic snapshots
+Architecture: movements are only ever inserted. A product's ledger level is its
+latest snapshot plus the movements after it, computed for many products in one
+query; Product.stock_quantity is the fast counter rebuilt from that level.
+"""
+from datetime import timedelta
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import (
+    BigIntegerField,
+    Case,
+    Exists,
+    IntegerField,
+    Max,
+    OuterRef,
+    PositiveIntegerField,
+    Subquery,
+    Sum,
+    Value,
+    When,
+)
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from . import low_stock
+from .cache import product_state_cache_key
+from .models import Product, StockMovement, StockSnapshot
+
+# Movements younger than this are left out of snapshots so a transaction that
+# is still open with a lower id cannot be skipped over
+SNAPSHOT_SETTLE_TIME = timedelta(minutes=5)
+
+
+def record(kind, quantities, reference='', note=''):
+    """
+    Append one movement per product in a single INSERT
+
+    Args:
+        kind: one of StockMovement.KIND_CHOICES
+        quantities: dict of {product_id: signed quantity}; zero entries are skipped
+        reference: source of the movement, e.g. an order number
+    """
+    return StockMovement.objects.bulk_create([
+        StockMovement(
+            product_id=product_id,
+            kind=kind,
+            quantity=quantity,
+            reference=str(reference),
+            note=note
+        )
+        for product_id, quantity in quantities.items()
+        if quantity
+    ])
+
+
+def with_ledger_stock(queryset, up_to=None):
+    """
+    Annotate products with their ledger position
+    - snapshot_quantity / snapshot_movement_id: latest snapshot (0 if none)
+    - ledger_delta: sum of movements after that snapshot
+    - is_tracked: the product has any snapshot or movement at all
+    Ledger stock is snapshot_quantity + ledger_delta.
+
+    Args:
+        up_to: ignore snapshots and movements past this ledger id
+    """
+    snapshots = StockSnapshot.objects.filter(product=OuterRef('pk')).order_by('-movement_id')
+    movements = StockMovement.objects.filter(product=OuterRef('pk'))
+    if up_to is not None:
+        snapshots = snapshots.filter(movement_id__lte=up_to)
+        movements = movements.filter(id__lte=up_to)
+    later = movements.filter(id__gt=OuterRef('snapshot_movement_id'))
+
+    return queryset.annotate(
+        snapshot_quantity=Coalesce(
+            Subquery(snapshots.values('quantity')[:1]), 0, output_field=IntegerField()
+        ),
+        snapshot_movement_id=Coalesce(
+            Subquery(snapshots.values('movement_id')[:1]), 0, output_field=BigIntegerField()
+        ),
+    ).annotate(
+        ledger_delta=Coalesce(
+            Subquery(
+                later.order_by().values('product').annotate(total=Sum('quantity')).values('total')
+            ),
+            0,
+            output_field=IntegerField()
+        ),
+        has_new_movements=Exists(later),
+        is_tracked=Exists(snapshots) | Exists(movements),
+    )
+
+
+def take_snapshots(batch_size=1000):
+    """
+    Write a snapshot for every product with movements since its last one
+    Products are walked in primary key order, one annotated query and one
+    bulk INSERT per batch.
+
+    Returns:
+        Number of snapshots written
+    """
+    up_to = StockMovement.objects.filter(
+        created_at__lte=timezone.now() - SNAPSHOT_SETTLE_TIME
+    ).aggregate(top=Max('id'))['top']
+    if up_to is None:
+        return 0
+
+    pending = with_ledger_stock(Product.objects.order_by('pk'), up_to=up_to).filter(
+        has_new_movements=True
+    )
+    written, last_pk = 0, 0
+    while True:
+        rows = list(pending.filter(pk__gt=last_pk).values_list(
+            'pk', 'snapshot_quantity', 'ledger_delta'
+        )[:batch_size])
+        if not rows:
+            return written
+        StockSnapshot.objects.bulk_create([
+            StockSnapshot(product_id=pk, quantity=quantity + delta, movement_id=up_to)
+            for pk, quantity, delta in rows
+        ])
+        written += len(rows)
+        last_pk = rows[-1][0]
+
+
+def reconcile(batch_size=500, apply=True):
+    """
+    Compare stock_quantity with the ledger, batch by batch
+    Each batch locks its product rows, so checkouts touching them wait
+    instead of racing the rewrite, then fixes drift with one UPDATE ... CASE.
+    Products with no ledger history at all are left alone. Fixed products
+    are refreshed in the low-stock index.
+
+    Yields:
+        (products checked, list of (product_id, stored, ledger)) per batch;
+        ledger levels below zero are clamped to 0
+    """
+    last_pk = 0
+    while True:
+        with transaction.atomic():
+            stored = dict(
+                Product.objects.select_for_update().filter(pk__gt=last_pk).order_by('pk').values_list(
+                    'pk', 'stock_quantity'
+                )[:batch_size]
+            )
+            if not stored:
+                return
+            levels = {
+                pk: max(quantity + delta, 0)
+                for pk, quantity, delta in with_ledger_stock(
+                    Product.objects.filter(pk__in=stored)
+                ).filter(is_tracked=True).values_list('pk', 'snapshot_quantity', 'ledger_delta')
+            }
+            drift = [
+                (pk, stored[pk], level)
+                for pk, level in levels.items()
+                if stored[pk] != level
+            ]
+            if apply and drift:
+                Product.objects.filter(pk__in=[pk for pk, _, _ in drift]).update(
+                    stock_quantity=Case(
+                        *[When(pk=pk, then=Value(level)) for pk, _, level in drift],
+                        output_field=PositiveIntegerField()
+                    ),
+                    updated_at=timezone.now()
+                )
+                cache.delete_many([product_state_cache_key(pk) for pk, _, _ in drift])
+                low_stock.refresh([pk for pk, _, _ in drift])
+        last_pk = max(stored)
+        yield len(stored), drift
@@ -0,0 +1,130 @@
+"""
+Low-Stock Index
+Maintain LowStockEntry rows for products that are running out
+Architecture: refresh() recomputes the index for just the products whose
+stock changed (one read, one upsert, one delete); update_velocity() is the
+periodic batch job that turns recent order lines into sales velocity.
+"""
+from datetime import timedelta
+from decimal import Decimal
+from django.conf import settings
+from django.db.models import Case, DecimalField, Q, Sum, Value, When
+from django.utils import timezone
+from orders.models import OrderItem
+from .models import LowStockEntry, Product
+
+# Precision of days_until_stockout (tenths of a day)
+DAYS_QUANTUM = Decimal('0.1')
+
+
+def _entry(product_id, stock, threshold, velocity):
+    """LowStockEntry for a product, or None if it is not running low"""
+    threshold = settings.LOW_STOCK_THRESHOLD if threshold is None else threshold
+    days = (Decimal(stock) / velocity).quantize(DAYS_QUANTUM) if velocity > 0 else None
+    if stock > threshold and (days is None or days > settings.STOCKOUT_WARNING_DAYS):
+        return None
+    return LowStockEntry(
+        product_id=product_id,
+        stock_quantity=stock,
+        threshold=threshold,
+        sales_velocity=velocity,
+        days_until_stockout=days
+    )
+
+
+def refresh(product_ids=None):
+    """
+    Bring the index in line with current stock
+    Call after any stock write; inactive products drop out of the index.
+
+    Args:
+        product_ids: products whose stock changed; None rebuilds every entry
+
+    Returns:
+        List of LowStockEntry rows now in the index for those products
+    """
+    products = Product.objects.filter(is_active=True)
+    if product_ids is not None:
+        product_ids = list(product_ids)
+        if not product_ids:
+            return []
+        products = products.filter(id__in=product_ids)
+
+    entries = [
+        entry
+        for entry in (
+            _entry(*row)
+            for row in products.values_list(
+                'id', 'stock_quantity', 'low_stock_threshold', 'sales_velocity'
+            ).iterator()
+        )
+        if entry is not None
+    ]
+    low_ids = [entry.product_id for entry in entries]
+
+    stale = LowStockEntry.objects.exclude(product_id__in=low_ids)
+    if product_ids is not None:
+        stale = stale.filter(product_id__in=product_ids)
+    stale.delete()
+    LowStockEntry.objects.bulk_create(
+        entries,
+        batch_size=1000,
+        update_conflicts=True,
+        unique_fields=['product'],
+        update_fields=[
+            'stock_quantity',
+            'threshold',
+            'sales_velocity',
+            'days_until_stockout',
+            'updated_at'
+        ]
+    )
+    return entries
+
+
+def update_velocity(days=None, batch_size=1000):
+    """
+    Recompute every product's sales velocity from recent order lines
+    Units sold per product come from one GROUP BY over OrderItem; velocities
+    are written with one UPDATE ... CASE per batch and the whole index is
+    then rebuilt.
+
+    Returns:
+        Number of products whose velocity changed
+    """
+    days = days or settings.SALES_VELOCITY_DAYS
+    since = timezone.now() - timedelta(days=days)
+    sold = dict(
+        OrderItem.objects.filter(
+            order__created_at__gte=since
+        ).exclude(
+            order__status='cancelled'
+        ).values('product_id').annotate(
+            units=Sum('quantity')
+        ).order_by().values_list('product_id', 'units')
+    )
+    velocity = {
+        product_id: (Decimal(units) / days).quantize(Decimal('0.001'))
+        for product_id, units in sold.items()
+    }
+
+    # Only rows whose value changes are written, including products that
+    # stopped selling and drop back to zero
+    changed = [
+        (product_id, velocity.get(product_id, Decimal('0.000')))
+        for product_id, current in Product.objects.filter(
+            Q(id__in=velocity) | Q(sales_velocity__gt=0)
+        ).values_list('id', 'sales_velocity').iterator()
+        if velocity.get(product_id, Decimal('0.000')) != current
+    ]
+    for start in range(0, len(changed), batch_size):
+        batch = changed[start:start + batch_size]
+        Product.objects.filter(id__in=[product_id for product_id, _ in batch]).update(
+            sales_velocity=Case(
+                *[When(id=product_id, then=Value(value)) for product_id, value in batch],
+                output_field=DecimalField(max_digits=10, decimal_places=3)
+            )
+        )
+
+    refresh()
+    return len(changed)
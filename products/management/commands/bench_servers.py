@@ -0,0 +1,178 @@
+"""
+Server Benchmark Command
+Compare gunicorn/WSGI (sync views) with uvicorn/ASGI (async views) on the
+catalog and cart pages under many concurrent clients
+
+Each server is started on a local port with the same number of workers and
+hit with the same request mix; every request opens its own connection, like
+clients arriving from the internet. Run against a database with realistic
+data and after collectstatic, with the settings of the environment being sized.
+
+Usage:
+    python manage.py bench_servers
+    python manage.py bench_servers --concurrency 500 --requests 5000 --workers 4
+    python manage.py bench_servers --servers uvicorn --path /products/?q=shirt
+"""
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+from products.models import Product
+
+SERVERS = {
+    'gunicorn': {
+        'async_views': False,
+        'command': lambda port, workers, threads: [
+            sys.executable, '-m', 'gunicorn', 'config.wsgi:application',
+            # Production profile (preload, warm-up); sizing from the options below
+            '--config', 'config/gunicorn.py',
+            '--bind', f'127.0.0.1:{port}',
+            '--workers', str(workers),
+            '--threads', str(threads),
+        ],
+    },
+    'uvicorn': {
+        'async_views': True,
+        'command': lambda port, workers, threads: [
+            sys.executable, '-m', 'uvicorn', 'config.asgi:application',
+            '--host', '127.0.0.1',
+            '--port', str(port),
+            '--workers', str(workers),
+            '--no-access-log',
+        ],
+    },
+}
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+async def _get(port, host, path, timeout):
+    """One GET on a fresh connection; returns the status code (0 on failure)"""
+    try:
+        reader, writer = await asyncio.wait_for(
+            asyncio.open_connection('127.0.0.1', port), timeout
+        )
+        writer.write(
+            f'GET {path} HTTP/1.1\r\nHost: {host}\r\nConnection: close\r\n\r\n'.encode()
+        )
+        await writer.drain()
+        status_line = await asyncio.wait_for(reader.readline(), timeout)
+        # Drain the body so the server finishes writing the response
+        while await asyncio.wait_for(reader.read(65536), timeout):
+            pass
+        writer.close()
+        return int(status_line.split()[1])
+    except (OSError, asyncio.TimeoutError, IndexError, ValueError):
+        return 0
+
+
+async def _load(port, host, paths, total, concurrency, timeout):
+    """Fire `total` requests from `concurrency` clients; returns (elapsed, latencies, statuses)"""
+    latencies, statuses = [], {}
+    counter = iter(range(total))
+
+    async def client():
+        for index in counter:
+            started = time.perf_counter()
+            status = await _get(port, host, paths[index % len(paths)], timeout)
+            latencies.append(time.perf_counter() - started)
+            statuses[status] = statuses.get(status, 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return time.perf_counter() - started, sorted(latencies), statuses
+
+
+class Command(BaseCommand):
+    help = 'Benchmark gunicorn/WSGI against uvicorn/ASGI on catalog pages'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--servers', nargs='+', choices=list(SERVERS), default=list(SERVERS))
+        parser.add_argument('--path', action='append', dest='paths', help='Path to request (repeatable; default: home, catalog, a product, cart)')
+        parser.add_argument('--requests', type=int, default=2000, help='Requests per server (default: 2000)')
+        parser.add_argument('--concurrency', type=int, default=200, help='Concurrent clients (default: 200)')
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Worker processes per server (default: CPU count)')
+        parser.add_argument('--threads', type=int, default=1, help='gunicorn threads per worker (default: 1)')
+        parser.add_argument('--timeout', type=float, default=30, help='Per-request timeout in seconds (default: 30)')
+
+    def _paths(self, paths):
+        if paths:
+            return paths
+        paths = [reverse('products:home'), reverse('products:list'), reverse('cart:detail')]
+        slug = Product.objects.filter(is_active=True).values_list('slug', flat=True).first()
+        if slug:
+            paths.append(reverse('products:detail', kwargs={'slug': slug}))
+        return paths
+
+    def _host(self):
+        for host in settings.ALLOWED_HOSTS:
+            if host != '*' and not host.startswith('.'):
+                return host
+        return 'localhost'
+
+    def _wait_ready(self, process, port, host, path, timeout=30):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                return False
+            if asyncio.run(_get(port, host, path, 5)):
+                return True
+            time.sleep(0.2)
+        return False
+
+    def handle(self, *args, **options):
+        if min(options['requests'], options['concurrency'], options['workers'], options['threads']) < 1:
+            raise CommandError('--requests, --concurrency, --workers and --threads must be at least 1.')
+
+        paths, host = self._paths(options['paths']), self._host()
+        self.stdout.write(
+            f"{options['requests']} requests, {options['concurrency']} concurrent clients, "
+            f"{options['workers']} worker(s); paths: {', '.join(paths)}"
+        )
+
+        for name in options['servers']:
+            server, port = SERVERS[name], _free_port()
+            env = dict(
+                os.environ,
+                DJANGO_SETTINGS_MODULE=os.environ.get('DJANGO_SETTINGS_MODULE', 'config.settings'),
+                ASYNC_VIEWS=str(server['async_views']),
+                # Plain HTTP on localhost; don't benchmark the HTTPS redirect
+                SECURE_SSL_REDIRECT='False'
+            )
+            process = subprocess.Popen(
+                server['command'](port, options['workers'], options['threads']),
+                env=env,
+                cwd=settings.BASE_DIR,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL
+            )
+            try:
+                if not self._wait_ready(process, port, host, paths[0]):
+                    raise CommandError(f'{name} did not start; is it installed? Try running it by hand.')
+                elapsed, latencies, statuses = asyncio.run(_load(
+                    port, host, paths, options['requests'], options['concurrency'], options['timeout']
+                ))
+            finally:
+                process.terminate()
+                process.wait()
+
+            def percentile(p):
+                return latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000
+
+            codes = ', '.join(f'{count}x {code or "error"}' for code, count in sorted(statuses.items()))
+            self.stdout.write(
+                f'{name:<9} {len(latencies) / elapsed if elapsed else 0:.0f} req/s; '
+                f'p50 {percentile(0.5):.0f} ms, p95 {percentile(0.95):.0f} ms, '
+                f'p99 {percentile(0.99):.0f} ms ({codes})'
+            )
+
+        self.stdout.write(self.style.SUCCESS('Benchmark finished.'))
@@ -0,0 +1,143 @@
+"""
+Startup Benchmark Command
+Measure cold-start import time with `python -X importtime` and hold it to a
+budget stored in config/startup_budget.json
+
+Each target is started in a fresh interpreter several times; the median
+total import time is compared with the target's budget, and modules listed
+as forbidden for a target must not be imported by it at all. Exits with an
+error when over budget, so it can gate CI. Budgets are machine-specific:
+record them on the same class of machine that runs the check.
+
+Usage:
+    python manage.py bench_startup
+    python manage.py bench_startup --top 25
+    python manage.py bench_startup --write-budget
+"""
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+BUDGET_FILE = Path(settings.BASE_DIR) / 'config' / 'startup_budget.json'
+
+# What each target starts, and extra environment for it
+TARGETS = {
+    # One-off management commands and cron jobs
+    'setup': {
+        'code': 'import django; django.setup()',
+        'env': {},
+    },
+    # Worker/cron containers, which don't serve the login pages
+    'setup_no_social': {
+        'code': 'import django; django.setup()',
+        'env': {'SOCIAL_LOGIN_ENABLED': 'False'},
+    },
+    # A WSGI worker ready for its first request: middleware and URLconf loaded
+    'wsgi': {
+        'code': (
+            'from config.wsgi import application; '
+            'from django.urls import get_resolver; get_resolver().url_patterns'
+        ),
+        'env': {},
+    },
+}
+
+# Headroom given to measured times by --write-budget
+BUDGET_HEADROOM = 1.25
+
+
+def parse_importtime(stderr):
+    """
+    Parse `-X importtime` output
+    Returns (total µs, {module: (self µs, cumulative µs)}); the total is the
+    sum of the top-level imports' cumulative times.
+    """
+    modules, total = {}, 0
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        # One space after the separator, then two per level of nesting
+        name = name[1:].rstrip()
+        if not name.startswith(' '):
+            total += int(cumulative_us)
+        modules[name.strip()] = (int(self_us), int(cumulative_us))
+    return total, modules
+
+
+def by_package(modules):
+    """Self time summed per top-level package, largest first"""
+    packages = {}
+    for name, (self_us, _) in modules.items():
+        root = name.split('.')[0]
+        packages[root] = packages.get(root, 0) + self_us
+    return sorted(packages.items(), key=lambda item: item[1], reverse=True)
+
+
+class Command(BaseCommand):
+    help = 'Measure startup import time and compare it with the stored budget'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=5, help='Runs per target; the median counts (default: 5)')
+        parser.add_argument('--top', type=int, default=10, help='Packages listed per target (default: 10)')
+        parser.add_argument('--write-budget', action='store_true', help='Store the measured times (plus headroom) as the new budget')
+
+    def _measure(self, target, repeat):
+        env = dict(
+            os.environ,
+            DJANGO_SETTINGS_MODULE=os.environ.get('DJANGO_SETTINGS_MODULE', 'config.settings'),
+            **target['env']
+        )
+        runs = []
+        for _ in range(repeat):
+            result = subprocess.run(
+                [sys.executable, '-X', 'importtime', '-c', target['code']],
+                env=env,
+                cwd=settings.BASE_DIR,
+                capture_output=True,
+                text=True
+            )
+            if result.returncode:
+                raise CommandError(result.stderr.strip().splitlines()[-1])
+            runs.append(parse_importtime(result.stderr))
+        runs.sort(key=lambda run: run[0])
+        return runs[len(runs) // 2]
+
+    def handle(self, *args, **options):
+        if options['repeat'] < 1:
+            raise CommandError('--repeat must be at least 1.')
+
+        budget = json.loads(BUDGET_FILE.read_text()) if BUDGET_FILE.exists() else {'targets': {}}
+        failures, measured = [], {}
+
+        for name, target in TARGETS.items():
+            total, modules = self._measure(target, options['repeat'])
+            measured[name] = total / 1000
+            limits = budget['targets'].get(name, {})
+            max_ms = limits.get('max_ms')
+
+            status = f'budget {max_ms} ms' if max_ms else 'no budget'
+            self.stdout.write(f'\n{name}: {total / 1000:.0f} ms of imports ({status})')
+            for package, self_us in by_package(modules)[:options['top']]:
+                self.stdout.write(f'  {self_us / 1000:8.1f} ms  {package}')
+
+            if max_ms and total / 1000 > max_ms:
+                failures.append(f'{name} took {total / 1000:.0f} ms (budget {max_ms} ms)')
+            for module in limits.get('forbidden', []):
+                if module in modules:
+                    failures.append(f'{name} imports {module}, which should be deferred')
+
+        if options['write_budget']:
+            for name, total_ms in measured.items():
+                budget['targets'].setdefault(name, {})['max_ms'] = round(total_ms * BUDGET_HEADROOM)
+            BUDGET_FILE.write_text(json.dumps(budget, indent=2) + '\n')
+            self.stdout.write(self.style.SUCCESS(f'\nBudget written to {BUDGET_FILE}.'))
+            return
+
+        if failures:
+            raise CommandError('Startup budget exceeded:\n  ' + '\n  '.join(failures))
+        self.stdout.write(self.style.SUCCESS('\nStartup within budget.'))
@@ -0,0 +1,53 @@
+"""
+Reconcile Stock Command
+Rebuild Product.stock_quantity from the inventory ledger in bulk
+Each batch is locked, compared with snapshot + later movements, and fixed
+with a single UPDATE. Products without any ledger history are skipped.
+
+Usage:
+    python manage.py reconcile_stock
+    python manage.py reconcile_stock --dry-run
+    python manage.py reconcile_stock --batch-size 2000
+"""
+import time
+from django.core.management.base import BaseCommand, CommandError
+from products.inventory import reconcile
+
+
+class Command(BaseCommand):
+    help = 'Rebuild product stock levels from the stock ledger'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Products checked per transaction (default: 500)'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Report drift without changing stock'
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        if batch_size < 1:
+            raise CommandError('--batch-size must be at least 1.')
+        dry_run = options['dry_run']
+
+        started = time.monotonic()
+        checked = fixed = 0
+        for count, drift in reconcile(batch_size, apply=not dry_run):
+            checked += count
+            fixed += len(drift)
+            for product_id, stored, level in drift:
+                self.stdout.write(f'  product {product_id}: {stored} -> {level}')
+            self.stdout.write(f'Checked {checked} product(s), {fixed} drifted')
+
+        elapsed = time.monotonic() - started
+        verb = 'Found' if dry_run else 'Fixed'
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb} {fixed} of {checked} product(s) in {elapsed:.2f}s '
+            f'({checked / elapsed if elapsed else 0:.0f} products/s).'
+        ))
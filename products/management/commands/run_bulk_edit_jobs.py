@@ -0,0 +1,69 @@
+"""
+Bulk Edit Worker Command
+Apply queued product bulk edits chunk by chunk
+Several workers can run at once on PostgreSQL (jobs are claimed with SKIP LOCKED)
+
+Usage:
+    python manage.py run_bulk_edit_jobs
+    python manage.py run_bulk_edit_jobs --once
+"""
+import time
+from django.core.management.base import BaseCommand
+from products.bulk_edit import claim_job, run_job
+
+
+class Command(BaseCommand):
+    help = 'Apply queued bulk price and flag edits in chunks'
+    # Long-running worker; restarts should not wait on system checks
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=5.0,
+            help='Seconds to wait when no job is queued (default: 5)'
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Exit as soon as no job is queued instead of polling'
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        jobs = products = 0
+
+        try:
+            while True:
+                job = claim_job()
+                if job is None:
+                    if options['once']:
+                        break
+                    time.sleep(options['poll_interval'])
+                    continue
+
+                job_started = time.monotonic()
+                resumed_at = job.processed
+
+                def progress(job):
+                    elapsed = time.monotonic() - job_started
+                    done = job.processed - resumed_at
+                    self.stdout.write(
+                        f'Job #{job.pk}: {job.processed}/{job.total} '
+                        f'({done / elapsed if elapsed else 0:.0f} products/s)'
+                    )
+
+                run_job(job, progress=progress)
+                jobs += 1
+                products += job.processed - resumed_at
+                if job.status == 'failed':
+                    self.stderr.write(f'Job #{job.pk} failed: {job.last_error}')
+        except KeyboardInterrupt:
+            pass
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Ran {jobs} job(s), {products} product(s) updated in {elapsed:.2f}s '
+            f'({products / elapsed if elapsed else 0:.0f} products/s).'
+        ))
@@ -0,0 +1,37 @@
+"""
+Snapshot Stock Command
+Fold recent ledger movements into new stock snapshots
+Run periodically (e.g. hourly) so ledger reads only sum a short tail.
+
+Usage:
+    python manage.py snapshot_stock
+    python manage.py snapshot_stock --batch-size 5000
+"""
+import time
+from django.core.management.base import BaseCommand, CommandError
+from products.inventory import take_snapshots
+
+
+class Command(BaseCommand):
+    help = 'Write stock snapshots for products with new ledger movements'
+    # Cron job; system checks run at deploy, not on every invocation
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Products snapshotted per query (default: 1000)'
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        if batch_size < 1:
+            raise CommandError('--batch-size must be at least 1.')
+
+        started = time.monotonic()
+        written = take_snapshots(batch_size)
+        self.stdout.write(self.style.SUCCESS(
+            f'Wrote {written} snapshot(s) in {time.monotonic() - started:.2f}s.'
+        ))
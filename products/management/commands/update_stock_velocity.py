@@ -0,0 +1,46 @@
+"""
+Update Stock Velocity Command
+Recompute sales velocity from recent order lines and rebuild the low-stock index
+Run daily so days-until-stockout figures stay current.
+
+Usage:
+    python manage.py update_stock_velocity
+    python manage.py update_stock_velocity --days 14
+"""
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from products.low_stock import update_velocity
+from products.models import LowStockEntry
+
+
+class Command(BaseCommand):
+    help = 'Recompute product sales velocity and the low-stock index'
+    # Cron job; system checks run at deploy, not on every invocation
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=settings.SALES_VELOCITY_DAYS,
+            help=f'Days of order history to average (default: {settings.SALES_VELOCITY_DAYS})'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Products updated per statement (default: 1000)'
+        )
+
+    def handle(self, *args, **options):
+        if options['days'] < 1 or options['batch_size'] < 1:
+            raise CommandError('--days and --batch-size must be at least 1.')
+
+        started = time.monotonic()
+        changed = update_velocity(options['days'], options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Updated velocity for {changed} product(s); '
+            f'{LowStockEntry.objects.count()} product(s) running low '
+            f'({time.monotonic() - started:.2f}s).'
+        ))
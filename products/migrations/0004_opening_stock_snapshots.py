@@ -0,0 +1,31 @@
+# Generated by Django 5.0.1 on 2026-10-19 04:26
+
+from django.db import migrations
+
+
+def create_opening_snapshots(apps, schema_editor):
+    """Seed the ledger with current stock so reconciliation starts from today's levels"""
+    Product = apps.get_model('products', 'Product')
+    StockSnapshot = apps.get_model('products', 'StockSnapshot')
+    StockSnapshot.objects.bulk_create(
+        (
+            StockSnapshot(product_id=product_id, quantity=stock, movement_id=0)
+            for product_id, stock in Product.objects.values_list('id', 'stock_quantity').iterator()
+        ),
+        batch_size=1000
+    )
+
+
+def delete_opening_snapshots(apps, schema_editor):
+    apps.get_model('products', 'StockSnapshot').objects.filter(movement_id=0).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0003_stock_ledger'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_opening_snapshots, delete_opening_snapshots),
+    ]
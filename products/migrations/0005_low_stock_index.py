@@ -0,0 +1,41 @@
+# Generated by Django 5.0.1 on 2026-10-19 04:28
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0004_opening_stock_snapshots'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='low_stock_threshold',
+            field=models.PositiveIntegerField(blank=True, help_text='Blank uses the site-wide LOW_STOCK_THRESHOLD', null=True),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='sales_velocity',
+            field=models.DecimalField(decimal_places=3, default=Decimal('0'), editable=False, help_text='Average units sold per day, set by update_stock_velocity', max_digits=10),
+        ),
+        migrations.CreateModel(
+            name='LowStockEntry',
+            fields=[
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='low_stock', serialize=False, to='products.product')),
+                ('stock_quantity', models.PositiveIntegerField()),
+                ('threshold', models.PositiveIntegerField()),
+                ('sales_velocity', models.DecimalField(decimal_places=3, max_digits=10)),
+                ('days_until_stockout', models.DecimalField(blank=True, decimal_places=1, help_text='Blank when the product is not selling', max_digits=10, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'low stock entries',
+                'ordering': ['stock_quantity', 'days_until_stockout'],
+                'indexes': [models.Index(fields=['stock_quantity'], name='products_lo_stock_q_d3f87c_idx'), models.Index(fields=['days_until_stockout'], name='products_lo_days_un_7d3c59_idx')],
+            },
+        ),
+    ]
@@ -3,6 +3,7 @@ Product Models
 Architecture: Designed for future expansion (variants, inventory management, multi-warehouse)
 """
 from django.db import models
+from django.contrib.auth.models import User
 from django.urls import reverse
 from django.utils.text import slugify
 from django.core.validators import MinValueValidator
@@ -93,6 +94,22 @@ class Product(models.Model):
         help_text="Original price for sale display"
     )
     stock_quantity = models.PositiveIntegerField(default=0)
+    weight_grams = models.PositiveIntegerField(
+        default=0,
+        help_text="Shipping weight in grams"
+    )
+    low_stock_threshold = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        help_text="Blank uses the site-wide LOW_STOCK_THRESHOLD"
+    )
+    sales_velocity = models.DecimalField(
+        max_digits=10,
+        decimal_places=3,
+        default=Decimal('0'),
+        editable=False,
+        help_text="Average units sold per day, set by update_stock_velocity"
+    )
     
     # Product Status
     is_active = models.BooleanField(default=True, db_index=True)
@@ -189,3 +206,170 @@ class ProductImage(models.Model):
                 is_primary=True
             ).exclude(pk=self.pk).update(is_primary=False)
         super().save(*args, **kwargs)
+
+
+class StockMovement(models.Model):
+    """
+    Append-only stock ledger
+    Design decisions:
+    - Signed quantity: sales and write-downs are negative, restocks and
+      returns positive; rows are never updated or deleted
+    - Writers insert rows instead of rewriting history; stock_quantity on
+      Product stays as the fast, locked counter checkout decrements, and
+      `manage.py reconcile_stock` rebuilds it from the ledger
+    - reference ties a movement to its source (e.g. an order number)
+    """
+    KIND_CHOICES = [
+        ('sale', 'Sale'),
+        ('restock', 'Restock'),
+        ('adjustment', 'Adjustment'),
+        ('return', 'Return'),
+    ]
+
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.CASCADE,
+        related_name='stock_movements'
+    )
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    quantity = models.IntegerField(help_text="Signed change in stock")
+    reference = models.CharField(max_length=100, blank=True)
+    note = models.CharField(max_length=200, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-id']
+        indexes = [
+            models.Index(fields=['product', 'id']),
+            models.Index(fields=['created_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} {self.quantity:+d} of {self.product_id}"
+
+
+class StockSnapshot(models.Model):
+    """
+    Stock level of a product as of a ledger position
+    Current stock = latest snapshot + movements with a higher id, so the
+    ledger never has to be summed from the beginning.
+    """
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.CASCADE,
+        related_name='stock_snapshots'
+    )
+    quantity = models.IntegerField()
+    movement_id = models.BigIntegerField(
+        default=0,
+        help_text="Last ledger row included in this snapshot"
+    )
+    taken_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-movement_id']
+        indexes = [
+            models.Index(fields=['product', '-movement_id']),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id}: {self.quantity} @ {self.movement_id}"
+
+
+class LowStockEntry(models.Model):
+    """
+    Materialized low-stock index
+    Design decisions:
+    - One row per product that is at or below its threshold, or that will
+      run out within STOCKOUT_WARNING_DAYS at its current sales velocity
+    - Kept in step by products.low_stock.refresh() wherever stock changes,
+      so merchandising reads only the rows that matter
+    """
+    product = models.OneToOneField(
+        Product,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='low_stock'
+    )
+    stock_quantity = models.PositiveIntegerField()
+    threshold = models.PositiveIntegerField()
+    sales_velocity = models.DecimalField(max_digits=10, decimal_places=3)
+    days_until_stockout = models.DecimalField(
+        max_digits=10,
+        decimal_places=1,
+        null=True,
+        blank=True,
+        help_text="Blank when the product is not selling"
+    )
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['stock_quantity', 'days_until_stockout']
+        verbose_name_plural = 'low stock entries'
+        indexes = [
+            models.Index(fields=['stock_quantity']),
+            models.Index(fields=['days_until_stockout']),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id}: {self.stock_quantity} left"
+
+    @property
+    def is_out_of_stock(self):
+        return self.stock_quantity == 0
+
+
+class BulkEditJob(models.Model):
+    """
+    Price and flag changes for many products, applied in the background
+    Design decisions:
+    - Created by the ProductAdmin bulk edit action, run by
+      `manage.py run_bulk_edit_jobs` in chunks of chunk_size products
+    - Each chunk is one transaction: one locked read, one UPDATE ... CASE
+      and the progress counter, so a failed job resumes where it stopped
+      without applying any change twice
+    """
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+
+    created_by = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+'
+    )
+    status = models.CharField(
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default='queued'
+    )
+    product_ids = models.JSONField(default=list)
+    changes = models.JSONField(default=dict)
+    chunk_size = models.PositiveIntegerField(default=500)
+    total = models.PositiveIntegerField(default=0)
+    processed = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-id']
+        indexes = [
+            models.Index(fields=['status', 'id']),
+        ]
+
+    def __str__(self):
+        return f"Bulk edit #{self.pk} ({self.status})"
+
+    @property
+    def progress(self):
+        """Percentage of products processed"""
+        return int(self.processed * 100 / self.total) if self.total else 100
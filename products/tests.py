@@ -0,0 +1,39 @@
+"""
+Product Tests
+Resuming bulk edit jobs from the admin
+"""
+from datetime import timedelta
+from django.test import TestCase
+from django.utils import timezone
+from . import bulk_edit
+from .models import BulkEditJob
+
+
+class RequeueBulkEditJobTests(TestCase):
+    """Only jobs nobody is working on may be queued again"""
+
+    def _job(self, status, idle=timedelta(0)):
+        job = BulkEditJob.objects.create(status=status, total=10, processed=4)
+        # updated_at is auto_now; move it back with a queryset update
+        BulkEditJob.objects.filter(pk=job.pk).update(updated_at=timezone.now() - idle)
+        return job
+
+    def _status(self, job):
+        job.refresh_from_db()
+        return job.status
+
+    def test_running_job_is_not_requeued(self):
+        job = self._job('running')
+
+        self.assertEqual(bulk_edit.requeue(BulkEditJob.objects.all()), 0)
+        self.assertEqual(self._status(job), 'running')
+
+    def test_failed_and_stalled_jobs_are_requeued(self):
+        failed = self._job('failed')
+        stalled = self._job('running', idle=timedelta(hours=1))
+        done = self._job('done', idle=timedelta(hours=1))
+
+        self.assertEqual(bulk_edit.requeue(BulkEditJob.objects.all()), 2)
+        self.assertEqual(self._status(failed), 'queued')
+        self.assertEqual(self._status(stalled), 'queued')
+        self.assertEqual(self._status(done), 'done')
@@ -2,21 +2,32 @@
 Products URL Configuration
 Clean, SEO-friendly URL structure
 """
+from django.conf import settings
 from django.urls import path
 from . import views
 
+# Catalog reads are served by async views when running under ASGI
+if settings.ASYNC_VIEWS:
+    HomeView = views.AsyncHomeView
+    ProductListView = views.AsyncProductListView
+    ProductDetailView = views.AsyncProductDetailView
+else:
+    HomeView = views.HomeView
+    ProductListView = views.ProductListView
+    ProductDetailView = views.ProductDetailView
+
 app_name = 'products'
 
 urlpatterns = [
     # Homepage
-    path('', views.HomeView.as_view(), name='home'),
+    path('', HomeView.as_view(), name='home'),
     
     # Product catalog
-    path('products/', views.ProductListView.as_view(), name='list'),
+    path('products/', ProductListView.as_view(), name='list'),
     
     # Category pages
     path('category/<slug:slug>/', views.CategoryView.as_view(), name='category'),
     
     # Product detail
-    path('product/<slug:slug>/', views.ProductDetailView.as_view(), name='detail'),
+    path('product/<slug:slug>/', ProductDetailView.as_view(), name='detail'),
 ]
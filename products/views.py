@@ -1,7 +1,10 @@
 """
 Product Views
 Architecture: Class-based views for consistency and reusability
+Async variants of the catalog read views are served instead when ASYNC_VIEWS is on (ASGI)
 """
+import asyncio
+from django.http import Http404
 from django.views.generic import ListView, DetailView
 from django.db.models import Q, Prefetch
 from .models import Product, Category, ProductImage
@@ -28,24 +31,30 @@ class HomeView(ListView):
             )
         )[:6]
     
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        
-        # Get new arrivals
-        context['new_arrivals'] = Product.objects.filter(
+    def get_new_arrivals(self):
+        return Product.objects.filter(
             is_active=True,
             is_new_arrival=True
         ).select_related('category').prefetch_related(
             'images'
         )[:3]
-        
-        # Get bestsellers
-        context['bestsellers'] = Product.objects.filter(
+    
+    def get_bestsellers(self):
+        return Product.objects.filter(
             is_active=True,
             is_bestseller=True
         ).select_related('category').prefetch_related(
             'images'
         )[:3]
+    
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        
+        # Get new arrivals
+        context['new_arrivals'] = self.get_new_arrivals()
+        
+        # Get bestsellers
+        context['bestsellers'] = self.get_bestsellers()
         
         return context
 
@@ -90,13 +99,16 @@ class ProductListView(ListView):
         
         return queryset
     
+    def get_categories(self):
+        return Category.objects.filter(
+            is_active=True
+        ).order_by('name')
+    
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         
         # Add categories for filter sidebar
-        context['categories'] = Category.objects.filter(
-            is_active=True
-        ).order_by('name')
+        context['categories'] = self.get_categories()
         
         # Current category
         category_slug = self.kwargs.get('category_slug')
@@ -125,16 +137,19 @@ class ProductDetailView(DetailView):
             is_active=True
         ).select_related('category').prefetch_related('images')
     
+    def get_related_products(self, product):
+        return Product.objects.filter(
+            category_id=product.category_id,
+            is_active=True
+        ).exclude(
+            pk=product.pk
+        ).prefetch_related('images')[:4]
+    
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         
         # Related products from same category
-        context['related_products'] = Product.objects.filter(
-            category=self.object.category,
-            is_active=True
-        ).exclude(
-            pk=self.object.pk
-        ).prefetch_related('images')[:4]
+        context['related_products'] = self.get_related_products(self.object)
         
         return context
 
@@ -162,3 +177,105 @@ class CategoryView(ListView):
         context = super().get_context_data(**kwargs)
         context['category'] = self.category
         return context
+
+
+async def _fetch(queryset):
+    """Evaluate a queryset (prefetches included) without blocking the event loop"""
+    return [obj async for obj in queryset]
+
+
+class AsyncHomeView(HomeView):
+    """
+    HomeView for ASGI
+    The three product rows are independent, so they are awaited together.
+    Django 5.0's async ORM still runs each query on the request's sync
+    thread; gather() keeps the view ready for a native async backend.
+    """
+    
+    async def get(self, request, *args, **kwargs):
+        products, new_arrivals, bestsellers = await asyncio.gather(
+            _fetch(self.get_queryset()),
+            _fetch(self.get_new_arrivals()),
+            _fetch(self.get_bestsellers())
+        )
+        self.object_list = products
+        # Templates (and context processors) render on the sync thread
+        return self.render_to_response({
+            'view': self,
+            'object_list': products,
+            'products': products,
+            'new_arrivals': new_arrivals,
+            'bestsellers': bestsellers,
+        })
+
+
+class AsyncProductListView(ProductListView):
+    """
+    ProductListView for ASGI
+    The page count, category sidebar and current category are awaited
+    together, then the requested page is fetched.
+    """
+    
+    def get_paginator(self, queryset, per_page, **kwargs):
+        paginator = super().get_paginator(queryset, per_page, **kwargs)
+        # Counted up front alongside the other queries
+        paginator.count = self.total
+        return paginator
+    
+    async def _current_category(self):
+        category_slug = self.kwargs.get('category_slug')
+        if not category_slug:
+            return None
+        try:
+            return await Category.objects.aget(slug=category_slug)
+        except Category.DoesNotExist:
+            raise Http404('No category found matching the query')
+    
+    async def get(self, request, *args, **kwargs):
+        queryset = self.get_queryset()
+        self.total, categories, current_category = await asyncio.gather(
+            queryset.acount(),
+            _fetch(self.get_categories()),
+            self._current_category()
+        )
+        paginator, page, page_queryset, is_paginated = self.paginate_queryset(
+            queryset, self.paginate_by
+        )
+        page.object_list = self.object_list = await _fetch(page_queryset)
+        
+        context = {
+            'view': self,
+            'paginator': paginator,
+            'page_obj': page,
+            'is_paginated': is_paginated,
+            'object_list': page.object_list,
+            'products': page.object_list,
+            'categories': categories,
+            'search_query': request.GET.get('q', ''),
+            'current_sort': request.GET.get('sort', '-created_at'),
+        }
+        if current_category is not None:
+            context['current_category'] = current_category
+        return self.render_to_response(context)
+
+
+class AsyncProductDetailView(ProductDetailView):
+    """
+    ProductDetailView for ASGI
+    Related products depend on the product's category, so the two reads
+    are awaited in turn.
+    """
+    
+    async def get(self, request, *args, **kwargs):
+        try:
+            product = await self.get_queryset().aget(slug=self.kwargs[self.slug_url_kwarg])
+        except Product.DoesNotExist:
+            raise Http404('No product found matching the query')
+        self.object = product
+        related_products = await _fetch(self.get_related_products(product))
+        return self.render_to_response({
+            'view': self,
+            'object': product,
+            'product': product,
+            'related_products': related_products,
+        })